@@ -1,26 +1,26 @@
 # DevTools/agent.py
 
 from google.adk.agents import BaseAgent, Agent, LlmAgent, SequentialAgent, LoopAgent, ParallelAgent
-from google.adk.tools.mcp_tool.mcp_toolset import (
-    MCPToolset,
-    # StdioConnectionParams,
-    StdioServerParameters
-)
 # from google.adk.auth import AuthCredentialTypes, AuthCredential, OAuth2Auth
 from .custom_utils.enviroment_interaction import load_instruction_from_file
-from google.adk.tools.toolbox_toolset import ToolboxToolset # from toolbox_core import ToolboxClient
-from .code_parser_tools import extract_function_source_tool
+from .custom_utils.lazy_toolset import LazyToolset
+from .code_parser_tools import extract_function_source_tool, extract_functions_batch_tool, query_call_graph_tool, read_source_lines_tool, search_symbols_tool, watch_project_index
+from .git_tools import extract_function_at_revision_tool, diff_functions_tool
+from .custom_utils.fs_watcher import watching_enabled
 # from .media_parser_tools import 
-from .lookup_tools import get_lookup_url
+from .lookup_tools import get_lookup_url, get_lookup_urls
 from dotenv import load_dotenv
 # from pathlib import Path
 # import asyncio
+from functools import lru_cache
 import os
 
 load_dotenv()
 
 MODEL = os.getenv('GOOGLE_GENAI_MODEL', 'gemini-2.0-flash')
 BASE_PATH = os.getenv('BASE_PATH', "NOT GIVEN PATH!")
+if watching_enabled() and os.path.isdir(BASE_PATH):
+    watch_project_index(BASE_PATH)  # keep the code index warm while the agent runs
 
 TOOLSET_LINK = os.getenv('TOOLSET_LINK', 'http://127.0.0.1:5000')
 # GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
@@ -32,52 +32,77 @@ TOOLSET_LINK = os.getenv('TOOLSET_LINK', 'http://127.0.0.1:5000')
 #         client_secret=GOOGLE_CLIENT_SECRET
 #     ),
 # )
-db_toolset = ToolboxToolset(
-    server_url=TOOLSET_LINK,
-    toolset_name="master_toolset", # 'default'
-    # auth_token_getters={
-    #     'my-google-auth': auth_credential,
-    # }
-    # tool_names=[],
-    # bound_params={
-    #     'my-mysql': lambda: {
-    #         'host': os.getenv('MYSQL_HOST', 'localhost'),
-    #         'port': os.getenv('MYSQL_PORT', 3306),
-    #         'database': os.getenv('MYSQL_DATABASE', 'maritim1_mss_db'),
-    #         'user': os.getenv('MYSQL_USER', 'root'),
-    #         'password': os.getenv('MYSQL_PASSWORD', 'root'),
-    #     }
-    # }
-)
+# Toolsets are built on first use (see LazyToolset): importing the agent must stay cheap
+# for `adk web` / `api_server` workers, and the GitHub one starts a Docker container.
+def _db_toolset():
+    from google.adk.tools.toolbox_toolset import ToolboxToolset # from toolbox_core import ToolboxClient
+    return ToolboxToolset(
+        server_url=TOOLSET_LINK,
+        toolset_name="master_toolset", # 'default'
+        # auth_token_getters={
+        #     'my-google-auth': auth_credential,
+        # }
+        # tool_names=[],
+        # bound_params={
+        #     'my-mysql': lambda: {
+        #         'host': os.getenv('MYSQL_HOST', 'localhost'),
+        #         'port': os.getenv('MYSQL_PORT', 3306),
+        #         'database': os.getenv('MYSQL_DATABASE', 'maritim1_mss_db'),
+        #         'user': os.getenv('MYSQL_USER', 'root'),
+        #         'password': os.getenv('MYSQL_PASSWORD', 'root'),
+        #     }
+        # }
+    )
+
+db_toolset = LazyToolset(_db_toolset)
 
 GITHUB_PAT = os.getenv('GITHUB_PERSONAL_ACCESS_TOKEN')
-copilot_toolset = MCPToolset(
-    connection_params=StdioServerParameters(
-        command="docker",
-        args=[
-            "run",
-            "-i",
-            "--rm",
-            "-e",
-            "GITHUB_PERSONAL_ACCESS_TOKEN",
-            "ghcr.io/github/github-mcp-server"
-        ],
-        env={
-            "GITHUB_PERSONAL_ACCESS_TOKEN": GITHUB_PAT
-        },
-    ),
-    # tool_filter=[] # Optional: ensure only specific tools are loaded
-)
+def _copilot_toolset():
+    from google.adk.tools.mcp_tool.mcp_toolset import (
+        MCPToolset,
+        # StdioConnectionParams,
+        StdioServerParameters
+    )
+    return MCPToolset(
+        connection_params=StdioServerParameters(
+            command="docker",
+            args=[
+                "run",
+                "-i",
+                "--rm",
+                "-e",
+                "GITHUB_PERSONAL_ACCESS_TOKEN",
+                "ghcr.io/github/github-mcp-server"
+            ],
+            env={
+                "GITHUB_PERSONAL_ACCESS_TOKEN": GITHUB_PAT
+            },
+        ),
+        # tool_filter=[] # Optional: ensure only specific tools are loaded
+    )
+
+copilot_toolset = LazyToolset(_copilot_toolset)
+
+@lru_cache(maxsize=1)
+def _load_instruction() -> str:
+    return load_instruction_from_file("code_mcp.prompt", subs={"base_path": BASE_PATH})
 
 root_agent = LlmAgent(
     model=MODEL,
     name="root_agent",
     # description='Welcome Agent',
-    instruction=load_instruction_from_file("code_mcp.prompt", subs={"base_path": BASE_PATH}),
+    instruction=lambda readonly_context: _load_instruction(),  # read on the first turn, then cached
     tools=[
         # db_toolset,
         get_lookup_url,
+        get_lookup_urls,
         # copilot_toolset,
         extract_function_source_tool,
+        extract_functions_batch_tool,
+        query_call_graph_tool,
+        read_source_lines_tool,
+        search_symbols_tool,
+        extract_function_at_revision_tool,
+        diff_functions_tool,
     ],
 )
\ No newline at end of file
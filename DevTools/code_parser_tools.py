@@ -1,12 +1,26 @@
 # DevTools/parser_tools.py
 from __future__ import annotations
 import ast
+import hashlib
+import heapq
+import itertools
+import json
+import math
 import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from functools import lru_cache
-from typing import Optional, Dict, Tuple, List, Union, Iterable, Set, Any
+from typing import Optional, Dict, Tuple, List, Union, Iterable, Set, Any, NamedTuple, Iterator
 from pydantic import BaseModel, Field, field_validator, model_validator  # Pydantic v2
 from google.adk.tools.tool_context import ToolContext # other imports must occur at the beginning of the file
+from .custom_utils.fs_watcher import Subscription, get_watcher
 
 FuncNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
 
@@ -22,12 +36,33 @@ _EXCLUDE_DIRS = {
 }
 
 def create_file_path(base_path, function_path):
+    """
+    Split a dotted path into (file path, qualname). The longest module prefix that
+    exists on disk wins, so 'app.views.View.get' maps to ('.../app/views.py', 'View.get').
+    A shorter prefix (such as a package's __init__.py) only wins for a dotted qualname
+    when that file defines its first part, so a missing 'app.gone.func' is not
+    resolved to 'gone.func' in app/__init__.py. Raises ValueError naming the module
+    when no prefix matches.
+    """
     function_parts = function_path.split(".")
-    function_name = function_parts[-1]  # last part is the function
-    module_parts = function_parts[:-1]  # everything before is the module path
-    for part in module_parts:
-        base_path = os.path.join(base_path, part)
-    return base_path + ".py", function_name
+    for i in range(len(function_parts) - 1, 0, -1):
+        module_path = os.path.join(base_path, *function_parts[:i])
+        for candidate in (module_path + ".py", os.path.join(module_path, "__init__.py")):
+            if not os.path.isfile(candidate):
+                continue
+            if i < len(function_parts) - 1 and not _defines(candidate, function_parts[i]):
+                continue
+            return candidate, ".".join(function_parts[i:])
+    module = ".".join(function_parts[:-1]) or function_path
+    raise ValueError(f"Module '{module}' not found under {base_path}")
+
+def _defines(file_path: str, name: str) -> bool:
+    """Whether `file_path` defines a top-level function or class `name` (unparsable files count as yes)."""
+    try:
+        parsed = _MODULE_CACHE.get(Path(file_path).resolve())
+    except (OSError, SyntaxError, ValueError):
+        return True  # let the extraction report the real error
+    return name in parsed.defs or name in parsed.class_bases
 
 def _iter_py_files(root: Path) -> Iterable[Path]:
     for dirpath, dirnames, filenames in os.walk(root):
@@ -37,6 +72,14 @@ def _iter_py_files(root: Path) -> Iterable[Path]:
             if f.endswith(".py"):
                 yield Path(dirpath) / f
 
+def _is_project_py(root: Path, path: Path) -> bool:
+    """Whether `_iter_py_files(root)` would yield `path`."""
+    try:
+        rel = path.relative_to(root)
+    except ValueError:
+        return False
+    return path.suffix == ".py" and not any(part in _EXCLUDE_DIRS for part in rel.parts[:-1])
+
 def _to_module_qualname(base_path: Path, file_path: Path) -> str:
     rel = file_path.relative_to(base_path)
     if rel.name == "__init__.py":
@@ -45,47 +88,790 @@ def _to_module_qualname(base_path: Path, file_path: Path) -> str:
         rel = rel.with_suffix("")
     return ".".join(rel.parts)
 
-def _gather_defs(module: ast.Module) -> Tuple[Dict[str, FuncNode], Dict[str, Dict[str, FuncNode]]]:
-    """Return (top_level_funcs, class_methods[class_name][func_name])."""
-    top_level_funcs: Dict[str, FuncNode] = {}
-    class_methods: Dict[str, Dict[str, FuncNode]] = {}
-
-    for node in module.body:
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-            top_level_funcs[node.name] = node
-        elif isinstance(node, ast.ClassDef):
-            methods: Dict[str, FuncNode] = {}
-            for b in node.body:
-                if isinstance(b, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                    methods[b.name] = b
-            class_methods[node.name] = methods
-    return top_level_funcs, class_methods
-
-@lru_cache(maxsize=4)
-def _index_project_functions(base_path_str: str):
+def _gather_defs(module: ast.Module, class_nodes: Optional[Dict[str, ast.ClassDef]] = None
+                 ) -> Tuple[Dict[str, FuncNode], Dict[str, List[str]]]:
     """
-    Returns:
-        by_name: Dict[str, List[tuple[Path, str /*module*/, FuncNode]]]
-        by_mod_func: Dict[str /*module.func*/, tuple[Path, FuncNode]]
+    Return (funcs[qualname], class_bases[qualname]).
+    funcs covers top-level functions, methods and nested defs, keyed like
+    'helper', 'View.get' or 'outer.inner'; class_bases maps each class
+    qualname to its base class expressions as written ('View', 'generic.View').
+    If `class_nodes` is given it is filled with the ClassDef of each class qualname.
+    """
+    funcs: Dict[str, FuncNode] = {}
+    class_bases: Dict[str, List[str]] = {}
+
+    def visit(body: Iterable[ast.AST], prefix: str) -> None:
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                funcs[prefix + node.name] = node
+                visit(node.body, f"{prefix}{node.name}.")
+            elif isinstance(node, ast.ClassDef):
+                bases = []
+                for b in node.bases:
+                    root, chain = _get_attr_chain(b)
+                    if root:
+                        bases.append(".".join([root] + chain))
+                class_bases[prefix + node.name] = bases
+                if class_nodes is not None:
+                    class_nodes[prefix + node.name] = node
+                visit(node.body, f"{prefix}{node.name}.")
+            else:  # defs nested in if/try/with blocks share the enclosing scope
+                for field in ("body", "orelse", "finalbody", "handlers"):
+                    visit(getattr(node, field, None) or [], prefix)
+
+    visit(module.body, "")
+    return funcs, class_bases
+
+def _self_arg(fn: FuncNode) -> Optional[str]:
+    """Name of the implicit first parameter (self / cls) of a method, if any."""
+    if any(isinstance(d, ast.Name) and d.id == "staticmethod" for d in fn.decorator_list):
+        return None
+    params = list(getattr(fn.args, "posonlyargs", [])) + list(fn.args.args)
+    return params[0].arg if params else None
+
+# -----------------------------
+# symbol terms (search)
+# -----------------------------
+_TERM_WEIGHTS = {"name": 8, "defines": 4, "string": 3, "doc": 2, "ident": 1}  # per occurrence, by where a term appears
+_MAX_TERM_WEIGHT = 64
+_TF = [0.0] + [1 + math.log(w) for w in range(1, _MAX_TERM_WEIGHT + 1)]  # weight -> ranking factor
+_STOP_TERMS = frozenset({"self", "cls"})  # in nearly every method; only slow down queries
+_MAX_LITERAL_CHARS = 2_000  # only the head of huge string literals (SQL, templates) is indexed
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|[0-9]+")
+_SUBWORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+def _split_terms(text: str) -> List[str]:
+    """Lowercased words of `text`; compound identifiers also yield their snake/camel parts."""
+    out: List[str] = []
+    for word in _WORD_RE.findall(text):
+        low = word.lower()
+        if len(low) > 1 and low not in _STOP_TERMS:
+            out.append(low)
+        parts = _SUBWORD_RE.findall(word)
+        if len(parts) > 1:
+            out.extend(p.lower() for p in parts if len(p) > 1 and p.lower() not in _STOP_TERMS)
+    return out
+
+def _scope_terms(scope: ast.AST, name: str) -> Dict[str, int]:
+    """
+    Weighted terms of one symbol: its own name, the names a class or module body
+    assigns (model fields, constants), docstring, string literals and identifiers.
+    Nested defs/classes are symbols of their own and only contribute their name here.
+    """
+    terms: Dict[str, int] = {}
+
+    def add(text: str, weight: int) -> None:
+        for term in _split_terms(text[:_MAX_LITERAL_CHARS]):
+            terms[term] = min(terms.get(term, 0) + weight, _MAX_TERM_WEIGHT)
+
+    add(name, _TERM_WEIGHTS["name"])
+    body = getattr(scope, "body", None) or []
+    doc_node = None
+    if body and isinstance(body[0], ast.Expr) and isinstance(getattr(body[0], "value", None), ast.Constant) \
+            and isinstance(body[0].value.value, str):
+        doc_node = body[0]
+        add(doc_node.value.value, _TERM_WEIGHTS["doc"])
+    if isinstance(scope, (ast.ClassDef, ast.Module)):
+        for st in body:
+            targets = st.targets if isinstance(st, ast.Assign) else [getattr(st, "target", None)]
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    add(target.id, _TERM_WEIGHTS["defines"])
+
+    stack = [n for n in ast.iter_child_nodes(scope) if n is not doc_node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            add(node.name, _TERM_WEIGHTS["ident"])
+            continue
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, str):
+                add(node.value, _TERM_WEIGHTS["string"])
+        elif isinstance(node, ast.Name):
+            add(node.id, _TERM_WEIGHTS["ident"])
+        elif isinstance(node, ast.Attribute):
+            add(node.attr, _TERM_WEIGHTS["ident"])
+        elif isinstance(node, ast.arg):
+            add(node.arg, _TERM_WEIGHTS["ident"])
+        elif isinstance(node, ast.keyword) and node.arg:
+            add(node.arg, _TERM_WEIGHTS["ident"])
+        elif isinstance(node, ast.alias):
+            add(node.asname or node.name, _TERM_WEIGHTS["ident"])
+        stack.extend(ast.iter_child_nodes(node))
+    return terms
+
+def _gather_symbols(mod: ast.Module, module_name: str, defs: Dict[str, FuncNode],
+                    class_nodes: Dict[str, ast.ClassDef]) -> List[List[Any]]:
+    """[qualname, kind, start_line, end_line, terms] for the module, its classes and functions."""
+    end = max((getattr(n, "end_lineno", n.lineno) for n in mod.body), default=1)
+    symbols: List[List[Any]] = [["", "module", 1, end, _scope_terms(mod, module_name.rpartition(".")[2])]]
+    for kind, nodes in (("class", class_nodes), ("function", defs)):
+        for qualname, node in nodes.items():
+            symbols.append([
+                qualname, kind, _def_start_line(node), getattr(node, "end_lineno", node.lineno),
+                _scope_terms(node, node.name),
+            ])
+    return symbols
+
+# -----------------------------
+# persistent index store
+# -----------------------------
+_INDEX_SCHEMA = 6  # bump whenever the layout of a stored file entry changes
+
+class _FileEntry(NamedTuple):
+    """
+    Index record of one .py file.
+      funcs: (qualname, start_line incl. decorators, end_line, call summary) per function,
+             method and nested def
+      imports: (import_aliases, from_names) as returned by `_parse_import_maps`
+      classes: class qualname -> base class expressions as written
+      urls: Django URLconf summary (see `_gather_urlpatterns`), None for other modules
+    Search terms (`_gather_symbols`) are not part of the entry: they are stored in
+    their own table and only loaded by `_SearchIndex`.
+    """
+    path: str
+    mtime_ns: int
+    size: int
+    sha1: str
+    module: str
+    funcs: Tuple[Tuple[str, int, int, Tuple[str, ...]], ...]
+    imports: Tuple[Dict[str, str], Dict[str, str]]
+    classes: Dict[str, List[str]]
+    urls: Optional[Dict[str, Any]]
+
+_PAYLOAD_FIELDS = ("funcs", "imports", "classes", "urls")  # _FileEntry fields serialized into the JSON payload column
+
+class _FuncRecord:
+    """
+    Compact in-memory index entry for one function. Holds no AST: the source is
+    sliced from disk only when the function is actually requested.
+    """
+    __slots__ = ("path_id", "module", "qualname", "start", "end", "calls")
+
+    def __init__(self, path_id: int, module: str, qualname: str, start: int, end: int, calls: Tuple[str, ...]):
+        self.path_id = path_id
+        self.module = module
+        self.qualname = qualname
+        self.start = start
+        self.end = end
+        self.calls = calls
+
+    @property
+    def name(self) -> str:
+        return self.qualname.rpartition(".")[2]
+
+    @property
+    def dotted(self) -> str:
+        return f"{self.module}.{self.qualname}"
+
+def _cache_dir() -> Path:
+    """Directory holding the on-disk indexes, overridable with DEVTOOLS_CACHE_DIR."""
+    return Path(os.getenv("DEVTOOLS_CACHE_DIR") or Path.home() / ".cache" / "devtools")
+
+class _IndexStore:
+    """
+    SQLite database with one row per indexed file, keyed by path and validated
+    by (mtime_ns, size, sha1), plus the file's search terms in a separate table
+    that is only read when symbol search is used. One database per project root.
+    Falls back to an in-memory database when the cache dir is not writable.
     """
+
+    def __init__(self, base_path: Path):
+        digest = hashlib.sha1(str(base_path).encode("utf-8")).hexdigest()[:16]
+        try:
+            directory = _cache_dir()
+            directory.mkdir(parents=True, exist_ok=True)
+            self.db_path = str(directory / f"index-{digest}.sqlite3")
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except (OSError, sqlite3.Error):
+            self.db_path = ":memory:"
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if row is None or row[0] != str(_INDEX_SCHEMA):
+            self._conn.execute("DROP TABLE IF EXISTS files")
+            self._conn.execute("DROP TABLE IF EXISTS symbols")
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(_INDEX_SCHEMA),))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha1 TEXT, module TEXT, payload TEXT)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS symbols (path TEXT PRIMARY KEY, payload TEXT)")
+        self._conn.commit()
+
+    def load(self) -> Dict[str, _FileEntry]:
+        entries: Dict[str, _FileEntry] = {}
+        for path, mtime_ns, size, sha1, module, payload in self._conn.execute("SELECT * FROM files"):
+            data = json.loads(payload)
+            entries[path] = _FileEntry(path, mtime_ns, size, sha1, module, *(data[f] for f in _PAYLOAD_FIELDS))
+        return entries
+
+    def load_symbols(self, paths: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, List[List[Any]]]]:
+        """(path, symbols) for `paths`, or for every file when None."""
+        if paths is None:
+            rows: Iterable = self._conn.execute("SELECT path, payload FROM symbols").fetchall()
+        else:
+            rows = (
+                (p, row[0]) for p in paths
+                for row in self._conn.execute("SELECT payload FROM symbols WHERE path = ?", (p,)).fetchall()
+            )
+        for path, payload in rows:
+            yield path, json.loads(payload)
+
+    def save(self, upserts: List[_FileEntry], deleted: List[str],
+             symbols: Optional[Dict[str, List[List[Any]]]] = None) -> None:
+        if not upserts and not deleted:
+            return
+        with self._conn:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in deleted])
+            self._conn.executemany("DELETE FROM symbols WHERE path = ?", [(p,) for p in deleted])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO symbols VALUES (?, ?)",
+                [(path, json.dumps(rows)) for path, rows in (symbols or {}).items()],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (e.path, e.mtime_ns, e.size, e.sha1, e.module, json.dumps({f: getattr(e, f) for f in _PAYLOAD_FIELDS}))
+                    for e in upserts
+                ],
+            )
+
+_Indexed = Tuple[_FileEntry, Optional[List[List[Any]]]]  # entry, search terms (`_gather_symbols`)
+
+def _index_file(path_str: str, base_path_str: str, known_sha1: Optional[str] = None) -> Optional[_Indexed]:
+    """
+    Stat, hash and parse one file into (entry, symbols). Returns None if the file
+    vanished. When the content hash equals `known_sha1` the parse is skipped and
+    the payload fields and symbols are None (the caller keeps its previous
+    records). Syntactically invalid files get no funcs.
+    """
+    py = Path(path_str)
+    try:
+        st = py.stat()
+        raw = py.read_bytes()
+    except OSError:
+        return None
+    sha1 = hashlib.sha1(raw).hexdigest()
+    module_name = _to_module_qualname(Path(base_path_str), py)
+    if sha1 == known_sha1:
+        return _FileEntry(path_str, st.st_mtime_ns, st.st_size, sha1, module_name, *(None,) * len(_PAYLOAD_FIELDS)), None
+    return _index_source(path_str, st.st_mtime_ns, st.st_size, sha1, module_name, raw)
+
+def _index_source(path_str: str, mtime_ns: int, size: int, sha1: str, module_name: str, raw: bytes,
+                  with_symbols: bool = True) -> _Indexed:
+    """
+    Parse one file's content into (entry, symbols) (also used for blobs read from
+    git, which skip the search terms with `with_symbols=False`).
+    """
+    try:
+        mod = ast.parse(raw.decode("utf-8"))
+    except Exception:
+        return _FileEntry(path_str, mtime_ns, size, sha1, module_name, (), ({}, {}), {}, None), []
+
+    class_nodes: Dict[str, ast.ClassDef] = {}
+    defs, class_bases = _gather_defs(mod, class_nodes)
+    funcs = tuple(
+        (
+            qualname,
+            _def_start_line(node),
+            getattr(node, "end_lineno", node.lineno),
+            _summarize_calls(node, _self_arg(node) if qualname.rpartition(".")[0] in class_bases else None),
+        )
+        for qualname, node in defs.items()
+    )
+    imports = _parse_import_maps(mod, module_name)
+    local_names = {q for q in itertools.chain(defs, class_bases) if "." not in q}
+    urls = _gather_urlpatterns(mod, module_name, local_names, *imports)
+    symbols = _gather_symbols(mod, module_name, defs, class_nodes) if with_symbols else None
+    return _FileEntry(path_str, mtime_ns, size, sha1, module_name, funcs, imports, class_bases, urls), symbols
+
+def _index_files_chunk(items: List[Tuple[str, Optional[str]]], base_path_str: str) -> List[Optional[_Indexed]]:
+    """Process-pool worker: index a chunk of (path, known_sha1) pairs into compact picklable entries."""
+    return [_index_file(path_str, base_path_str, known_sha1) for path_str, known_sha1 in items]
+
+_PARALLEL_MIN_FILES = 256  # below this a process pool costs more than it saves
+_PARALLEL_CHUNK_SIZE = 64
+
+def _index_workers() -> int:
+    """Worker processes for indexing; DEVTOOLS_INDEX_WORKERS=1 forces serial parsing."""
+    try:
+        return max(1, int(os.getenv("DEVTOOLS_INDEX_WORKERS", "0")) or os.cpu_count() or 1)
+    except ValueError:
+        return 1
+
+def _index_files(items: List[Tuple[str, Optional[str]]], base_path_str: str, workers: int) -> List[Optional[_Indexed]]:
+    """Index files serially, or across a process pool in chunks when there are enough of them."""
+    if workers <= 1 or len(items) < _PARALLEL_MIN_FILES:
+        return _index_files_chunk(items, base_path_str)
+    chunks = [items[i : i + _PARALLEL_CHUNK_SIZE] for i in range(0, len(items), _PARALLEL_CHUNK_SIZE)]
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            results = pool.map(_index_files_chunk, chunks, [base_path_str] * len(chunks))
+            return [entry for chunk in results for entry in chunk]
+    except (OSError, BrokenProcessPool):
+        return _index_files_chunk(items, base_path_str)  # sandboxed / fork-less hosts
+
+class _CallGraph:
+    """
+    Project-wide call graph over integer function ids. Forward (callees) and
+    reverse (callers) adjacency rows are sorted `array('i')`s indexed by id.
+    Kept current per file: a changed file re-resolves its own functions, those
+    of every file importing its module and those of every file holding a
+    subclass (at any depth) of one of its classes. Ids of deleted functions
+    are reused once nothing calls them any more.
+    """
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}           # dotted function path -> id (stable while the function exists)
+        self.names: List[Optional[str]] = []    # id -> dotted function path, None for a free id
+        self.callees: List[array] = []
+        self.callers: List[array] = []
+        self.file_funcs: Dict[int, List[int]] = {}   # path_id -> ids defined in that file
+        self.importers: Dict[str, Set[int]] = {}     # imported dotted prefix -> importing path_ids
+        self._file_import_keys: Dict[int, Set[str]] = {}
+        self._orphans: Set[int] = set()  # ids no file defines any more, freed once uncalled
+        self._free: List[int] = []
+
+    def _id(self, dotted: str) -> int:
+        fid = self.ids.get(dotted)
+        if fid is None:
+            if self._free:
+                fid = self._free.pop()
+                self.names[fid] = dotted
+            else:
+                fid = len(self.names)
+                self.names.append(dotted)
+                self.callees.append(array("i"))
+                self.callers.append(array("i"))
+            self.ids[dotted] = fid
+        return fid
+
+    def _set_callees(self, fid: int, targets: Iterable[int]) -> None:
+        new = array("i", sorted(set(targets)))
+        old = self.callees[fid]
+        if new == old:
+            return
+        old_set, new_set = set(old), set(new)
+        for t in old_set - new_set:
+            self.callers[t] = array("i", (c for c in self.callers[t] if c != fid))
+        for t in new_set - old_set:
+            row = self.callers[t]
+            row.append(fid)
+            self.callers[t] = array("i", sorted(row))
+        self.callees[fid] = new
+
+    def _set_imports(self, pid: int, imports: Optional[Tuple[Dict[str, str], Dict[str, str]]]) -> None:
+        for key in self._file_import_keys.pop(pid, ()):
+            self.importers.get(key, set()).discard(pid)
+        keys: Set[str] = set()
+        for target in itertools.chain.from_iterable(m.values() for m in imports or ()):
+            parts = target.split(".")
+            keys.update(".".join(parts[:i]) for i in range(1, len(parts) + 1))
+        for key in keys:
+            self.importers.setdefault(key, set()).add(pid)
+        self._file_import_keys[pid] = keys
+
+    def _sync_file(self, index: "_ProjectIndex", pid: int) -> None:
+        records = index.file_records.get(pid, [])
+        new_ids = [self._id(rec.dotted) for rec in records]
+        for fid in set(self.file_funcs.get(pid, ())) - set(new_ids):
+            self._set_callees(fid, ())
+            if self.names[fid] not in index.by_mod_func:
+                self._orphans.add(fid)
+        for fid, rec in zip(new_ids, records):
+            self._orphans.discard(fid)
+            self._set_callees(fid, (self._id(h) for h in _resolve_record_helpers(index, rec)))
+        if new_ids:
+            self.file_funcs[pid] = new_ids
+        else:
+            self.file_funcs.pop(pid, None)
+        self._set_imports(pid, index.file_imports.get(pid))
+
+    def _release_orphans(self) -> None:
+        for fid in [fid for fid in self._orphans if not self.callers[fid]]:
+            self._orphans.discard(fid)
+            del self.ids[self.names[fid]]
+            self.names[fid] = None
+            self._free.append(fid)
+
+    def build(self, index: "_ProjectIndex") -> None:
+        for pid in index.file_records:
+            self._sync_file(index, pid)
+
+    def update(self, index: "_ProjectIndex", changed: Iterable[int], changed_modules: Iterable[str],
+               changed_classes: Iterable[str] = ()) -> None:
+        affected = set(changed)
+        for module in changed_modules:
+            affected |= self.importers.get(module, set())
+        affected |= index.subclass_files(changed_classes)
+        for pid in affected:
+            self._sync_file(index, pid)
+        self._release_orphans()
+
+    def walk(self, dotted: str, reverse: bool, depth: int, limit: int) -> List[Tuple[int, int]]:
+        """Breadth-first (id, hops) pairs reachable within `depth` hops, at most `limit` of them."""
+        start = self.ids.get(dotted)
+        if start is None:
+            return []
+        adjacency = self.callers if reverse else self.callees
+        found: List[Tuple[int, int]] = []
+        seen, frontier = {start}, [start]
+        for hop in range(1, depth + 1):
+            nxt = []
+            for fid in frontier:
+                for other in adjacency[fid]:
+                    if other in seen:
+                        continue
+                    seen.add(other)
+                    found.append((other, hop))
+                    nxt.append(other)
+                    if len(found) >= limit:
+                        return found
+            frontier = nxt
+        return found
+
+class _SearchIndex:
+    """
+    Inverted index term -> {symbol id: weight} over every module, class and
+    function of the project, loaded from the store's symbols table on the first
+    search and kept current per file like `_CallGraph`. Ranked with idf * (1 + ln weight), scaled by the
+    share of query terms a symbol matches.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.symbols: List[Optional[Tuple[int, str, str, int, int]]] = []  # id -> (path_id, dotted, kind, start, end)
+        self.symbol_terms: List[Tuple[str, ...]] = []
+        self.file_symbols: Dict[int, List[int]] = {}  # path_id -> symbol ids
+        self.live = 0
+
+    def _sync_file(self, index: "_ProjectIndex", pid: int, symbols: Optional[List[List[Any]]]) -> None:
+        for sid in self.file_symbols.pop(pid, ()):
+            for term in self.symbol_terms[sid]:
+                row = self.postings.get(term)
+                if row is not None:
+                    row.pop(sid, None)
+                    if not row:
+                        del self.postings[term]
+            self.symbols[sid] = None
+            self.symbol_terms[sid] = ()
+            self.live -= 1
+        entry = index.files.get(index.paths[pid]) if pid < len(index.paths) else None
+        if entry is None:
+            return
+        sids = []
+        for qualname, kind, start, end, terms in symbols or ():
+            sid = len(self.symbols)
+            dotted = f"{entry.module}.{qualname}" if qualname else entry.module
+            self.symbols.append((pid, dotted, kind, start, end))
+            self.symbol_terms.append(tuple(sys.intern(t) for t in terms))
+            for term, weight in terms.items():
+                self.postings.setdefault(sys.intern(term), {})[sid] = weight
+            sids.append(sid)
+        self.file_symbols[pid] = sids
+        self.live += len(sids)
+
+    def build(self, index: "_ProjectIndex") -> None:
+        for path, symbols in index.load_symbols():
+            if path in index.files:
+                self._sync_file(index, index.path_id(path), symbols)
+
+    def update(self, index: "_ProjectIndex", changed_pids: Iterable[int]) -> None:
+        pids = set(changed_pids)
+        loaded = dict(index.load_symbols([index.paths[pid] for pid in pids]))
+        for pid in pids:
+            self._sync_file(index, pid, loaded.get(index.paths[pid]))
+
+    def search(self, query: str, limit: int = 20, kind: Optional[str] = None) -> List[Tuple[float, int, List[str]]]:
+        """Best `limit` (score, symbol id, matched terms), highest score first."""
+        terms = list(dict.fromkeys(_split_terms(query)))
+        if not terms:
+            return []
+        total = max(1, self.live)
+        scores: Dict[int, float] = {}
+        matched: Dict[int, List[str]] = {}
+        for term in terms:
+            row = self.postings.get(term)
+            if not row:
+                continue
+            idf = math.log(1 + total / len(row))
+            get = scores.get
+            for sid, weight in row.items():
+                scores[sid] = get(sid, 0.0) + idf * _TF[weight]
+                matched.setdefault(sid, []).append(term)
+        ranked = (
+            (score * (len(matched[sid]) / len(terms)) ** 2, sid)  # favour symbols matching every term
+            for sid, score in scores.items()
+            if kind is None or self.symbols[sid][2] == kind
+        )
+        return [(score, sid, matched[sid]) for score, sid in heapq.nlargest(limit, ranked)]
+
+class _ProjectIndex:
+    """In-memory view of one project's index, revalidated against the disk on every refresh."""
+
+    def __init__(self, base_path: Path, files: Optional[Dict[str, _FileEntry]] = None):
+        """`files` gives a fixed snapshot (e.g. a git revision) instead of the on-disk store."""
+        self.base_path = base_path
+        self.store = _IndexStore(base_path) if files is None else None
+        self.files: Dict[str, _FileEntry] = self.store.load() if files is None else files
+        self.paths: List[str] = []                  # path_id -> file path
+        self.path_ids: Dict[str, int] = {}
+        self.file_imports: Dict[int, Tuple[Dict[str, str], Dict[str, str]]] = {}
+        self.class_bases: Dict[str, List[str]] = {}  # dotted class -> resolved dotted bases
+        self.subclasses: Dict[str, Set[str]] = {}    # dotted base -> dotted direct subclasses
+        self.file_classes: Dict[int, List[str]] = {}  # path_id -> dotted classes defined there
+        self.class_files: Dict[str, int] = {}         # dotted class -> defining path_id
+        self.by_name: Dict[str, List[_FuncRecord]] = {}
+        self.by_mod_func: Dict[str, _FuncRecord] = {}
+        self.file_records: Dict[int, List[_FuncRecord]] = {}
+        self.graph: Optional[_CallGraph] = None   # built on first call-graph query
+        self.search: Optional[_SearchIndex] = None  # built on first symbol search
+        self.lock = threading.Lock()
+        self.version = 0   # bumped whenever the lookups change
+        self.refreshed_at = float("-inf")
+        self.watch: Optional[Subscription] = None  # set by `watch_project_index`
+        self._built = False
+
+    def refresh(self, workers: Optional[int] = None) -> None:
+        """
+        Re-parse only files whose (mtime, size) changed and whose content hash differs.
+        While a watcher is running only the paths it reported are checked, instead
+        of walking the whole tree.
+        """
+        if self.store is None:
+            return  # fixed snapshot (see `git_tools`), nothing on disk to revalidate against
+        base_str = str(self.base_path)
+        pending: List[Tuple[str, Optional[str]]] = []
+
+        def check(py: Path) -> None:
+            key = str(py)
+            old = self.files.get(key)
+            if old is not None:
+                try:
+                    st = py.stat()
+                except OSError:
+                    return
+                if old.mtime_ns == st.st_mtime_ns and old.size == st.st_size:
+                    return
+            pending.append((key, old.sha1 if old else None))
+
+        changed_paths = self.watch.drain() if self._built and self.watch is not None and self.watch.alive else None
+        if changed_paths is None:
+            seen: Set[str] = set()
+            for py in _iter_py_files(self.base_path):
+                seen.add(str(py))
+                check(py)
+            deleted = [k for k in self.files if k not in seen]
+        else:
+            deleted = []
+            for key in sorted(changed_paths):
+                py = Path(key)
+                if not _is_project_py(self.base_path, py):
+                    continue
+                if py.is_file():
+                    check(py)
+                elif key in self.files:
+                    deleted.append(key)
+
+        upserts: List[_FileEntry] = []
+        symbols: Dict[str, List[List[Any]]] = {}  # written straight to the store, never kept on the entries
+        for indexed in _index_files(pending, base_str, workers or _index_workers()):
+            if indexed is None:
+                continue
+            entry, file_symbols = indexed
+            if entry.funcs is None:  # touched but unchanged content
+                old = self.files[entry.path]
+                entry = entry._replace(**{f: getattr(old, f) for f in _PAYLOAD_FIELDS})
+            else:
+                symbols[entry.path] = file_symbols
+            upserts.append(entry)
+
+        changed_modules = {self.files[k].module for k in deleted} | {e.module for e in upserts}
+        for k in deleted:
+            del self.files[k]
+        for e in upserts:
+            self.files[e.path] = e
+        self.store.save(upserts, deleted, symbols)
+
+        self.refreshed_at = time.monotonic()
+        if not self._built:
+            self._rebuild_lookups()
+        elif upserts or deleted:
+            changed = [self.path_id(k) for k in deleted] + [self.path_id(e.path) for e in upserts]
+            changed_classes = self._update_lookups(changed)
+            if self.graph is not None:
+                self.graph.update(self, changed, changed_modules, changed_classes)
+            if self.search is not None:
+                self.search.update(self, changed)
+
+    def call_graph(self) -> _CallGraph:
+        """The project call graph, built on first use and then updated by `refresh`."""
+        if self.graph is None:
+            graph = _CallGraph()
+            graph.build(self)
+            self.graph = graph
+        return self.graph
+
+    def search_index(self) -> _SearchIndex:
+        """The symbol search index, built on first use and then updated by `refresh`."""
+        if self.search is None:
+            search = _SearchIndex()
+            search.build(self)
+            self.search = search
+        return self.search
+
+    def load_symbols(self, paths: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, List[List[Any]]]]:
+        """Stored search terms of `paths` (all files when None); fixed snapshots have none."""
+        return self.store.load_symbols(paths) if self.store is not None else iter(())
+
+    def path_id(self, path: str) -> int:
+        pid = self.path_ids.get(path)
+        if pid is None:
+            pid = self.path_ids[path] = len(self.paths)
+            self.paths.append(path)
+        return pid
+
+    def _rebuild_lookups(self) -> None:
+        self.by_name, self.by_mod_func, self.file_records = {}, {}, {}
+        self.file_imports, self.class_bases, self.subclasses = {}, {}, {}
+        self.file_classes, self.class_files = {}, {}
+        for entry in self.files.values():
+            self._add_lookups(entry)
+        self.version += 1
+        self._built = True
+
+    def _update_lookups(self, pids: Iterable[int]) -> Set[str]:
+        """
+        Replace the lookups of the files `pids` with their current entries (dropping
+        deleted ones); returns the dotted classes they defined before or after.
+        """
+        changed_classes: Set[str] = set()
+        for pid in set(pids):
+            changed_classes.update(self._remove_lookups(pid))
+            entry = self.files.get(self.paths[pid])
+            if entry is not None:
+                changed_classes.update(self._add_lookups(entry))
+        self.version += 1
+        return changed_classes
+
+    def _add_lookups(self, entry: _FileEntry) -> List[str]:
+        pid = self.path_id(entry.path)
+        module = sys.intern(entry.module)
+        self.file_imports[pid] = tuple(entry.imports)
+        class_bases = _resolve_class_bases(entry.classes, module, *entry.imports)
+        self.class_bases.update(class_bases)
+        for cls, bases in class_bases.items():
+            self.class_files[cls] = pid
+            for base in bases:
+                self.subclasses.setdefault(base, set()).add(cls)
+        self.file_classes[pid] = list(class_bases)
+        records = []
+        for qualname, start, end, calls in entry.funcs:
+            rec = _FuncRecord(pid, module, sys.intern(qualname), start, end, tuple(sys.intern(c) for c in calls))
+            # copy-on-write: readers outside the lock may be iterating the old list
+            self.by_name[rec.name] = self.by_name.get(rec.name, []) + [rec]
+            self.by_mod_func[rec.dotted] = rec
+            records.append(rec)
+        if records:
+            self.file_records[pid] = records
+        return self.file_classes[pid]
+
+    def _remove_lookups(self, pid: int) -> List[str]:
+        self.file_imports.pop(pid, None)
+        classes = self.file_classes.pop(pid, [])
+        for cls in classes:
+            if self.class_files.get(cls) != pid:
+                continue  # redefined by another file (e.g. mod.py next to mod/__init__.py)
+            del self.class_files[cls]
+            for base in self.class_bases.pop(cls, ()):
+                subclasses = self.subclasses.get(base)
+                if subclasses is not None:
+                    subclasses.discard(cls)
+                    if not subclasses:
+                        del self.subclasses[base]
+        records = self.file_records.pop(pid, [])
+        for name in {rec.name for rec in records}:
+            remaining = [r for r in self.by_name.get(name, ()) if r.path_id != pid]
+            if remaining:
+                self.by_name[name] = remaining
+            else:
+                self.by_name.pop(name, None)
+        for rec in records:
+            if self.by_mod_func.get(rec.dotted) is rec:
+                del self.by_mod_func[rec.dotted]
+        return classes
+
+    def subclass_files(self, classes: Iterable[str]) -> Set[int]:
+        """path_ids of the files defining a subclass, at any depth, of one of `classes`."""
+        found: Set[str] = set()
+        queue = list(classes)
+        while queue:
+            for sub in self.subclasses.get(queue.pop(), ()):
+                if sub not in found:
+                    found.add(sub)
+                    queue.append(sub)
+        return {self.class_files[cls] for cls in found if cls in self.class_files}
+
+_PROJECT_INDEXES: Dict[str, _ProjectIndex] = {}
+_PROJECT_INDEXES_LOCK = threading.Lock()
+
+def _get_project_index(base_path_str: str) -> _ProjectIndex:
     base_path = Path(base_path_str).resolve()
-    by_name: Dict[str, List[Tuple[Path, str, FuncNode]]] = {}
-    by_mod_func: Dict[str, Tuple[Path, FuncNode]] = {}
+    with _PROJECT_INDEXES_LOCK:
+        index = _PROJECT_INDEXES.get(str(base_path))
+        if index is None:
+            index = _PROJECT_INDEXES[str(base_path)] = _ProjectIndex(base_path)
+    return index
+
+def _refreshed_index(base_path_str: str, max_age: float = 0.0) -> _ProjectIndex:
+    """Project index refreshed against the disk, unless that happened less than `max_age` seconds ago."""
+    index = _get_project_index(base_path_str)
+    with index.lock:
+        if time.monotonic() - index.refreshed_at >= max_age:
+            index.refresh()
+    return index
 
-    for py in _iter_py_files(base_path):
+def watch_project_index(base_path_str: str) -> bool:
+    """
+    Keep the project index current in the background: a filesystem watcher
+    (inotify via watchdog, or polling) re-indexes changed modules and updates the
+    call graph as files change, so tool calls find a warm index and skip the tree
+    walk. The first build also runs in the background. Returns False if the watcher
+    could not be started.
+    """
+    index = _get_project_index(base_path_str)
+    with index.lock:
+        if index.watch is not None and index.watch.alive:
+            return True
         try:
-            src = py.read_text(encoding="utf-8")
-            mod = ast.parse(src)
-        except Exception:
-            continue  # skip unreadable / syntactically invalid files
+            watcher = get_watcher(str(index.base_path), ignore_dirs=_EXCLUDE_DIRS)
+        except OSError as e:
+            print(f"watch_project_index: {e}")
+            return False
+
+        def on_change() -> None:
+            with index.lock:
+                index.refresh()
 
-        top_funcs, _ = _gather_defs(mod)
-        module_name = _to_module_qualname(base_path, py)
-        for name, node in top_funcs.items():
-            by_name.setdefault(name, []).append((py, module_name, node))
-            by_mod_func[f"{module_name}.{name}"] = (py, node)
+        index.watch = watcher.subscribe(on_change, suffixes=(".py",))
+    threading.Thread(target=on_change, name="devtools-index-warmup", daemon=True).start()
+    return True
 
-    return by_name, by_mod_func
+def _index_project_functions(base_path_str: str, workers: Optional[int] = None):
+    """
+    Returns the (incrementally refreshed) project index:
+        by_name: Dict[str /*func name*/, List[_FuncRecord]]
+        by_mod_func: Dict[str /*module.func*/, _FuncRecord]
+    Records persist on disk under DEVTOOLS_CACHE_DIR, so warm starts only stat files.
+    Cold starts parse across `workers` processes (default: DEVTOOLS_INDEX_WORKERS or all cores).
+    """
+    index = _get_project_index(base_path_str)
+    with index.lock:
+        index.refresh(workers)
+        return index.by_name, index.by_mod_func
 
 # -----------------------------
 # source slicing & calls
@@ -93,9 +879,7 @@ def _index_project_functions(base_path_str: str):
 
 def _slice_with_decorators(src_lines: List[str], fn: FuncNode) -> Tuple[str, int, int]:
     """Return (code, start_line, end_line), 1-based line numbers inclusive."""
-    start = fn.lineno
-    if getattr(fn, "decorator_list", None):
-        start = min(getattr(dec, "lineno", start) for dec in fn.decorator_list) or start
+    start = _def_start_line(fn)
     end = getattr(fn, "end_lineno", None)
     if end is None:
         full_src = "".join(src_lines)
@@ -106,6 +890,10 @@ def _slice_with_decorators(src_lines: List[str], fn: FuncNode) -> Tuple[str, int
         return seg, start, end
     return "\n".join(src_lines[start - 1 : end]), start, end
 
+def _def_start_line(fn: FuncNode) -> int:
+    """First line of a definition, including its decorators."""
+    return min([fn.lineno] + [getattr(dec, "lineno", fn.lineno) for dec in fn.decorator_list])
+
 def _get_attr_chain(node: ast.AST) -> Tuple[Optional[str], List[str]]:
     """
     For something like pkg.sub.mod.helper, return ("pkg", ["sub", "mod", "helper"]).
@@ -175,6 +963,21 @@ def _collect_calls_and_locals(fn: FuncNode) -> tuple[set[str], list[tuple[str, l
 
     return bare, attrs, bound_locals
 
+def _summarize_calls(fn: FuncNode, self_arg: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    Call-site summary stored in the index: dotted call targets as written,
+    e.g. ('helper', 'utils.slugify'), minus calls rooted at locally bound names.
+    For methods, `self_arg.x()` calls on the instance/class are kept as 'self.x'.
+    """
+    bare, attrs, bound_locals = _collect_calls_and_locals(fn)
+    calls = {name for name in bare if name not in bound_locals}
+    for root, chain in attrs:
+        if root not in bound_locals:
+            calls.add(".".join([root] + chain))
+        elif root == self_arg and len(chain) == 1:
+            calls.add(f"self.{chain[0]}")
+    return tuple(sorted(calls))
+
 # -----------------------------
 # import resolution
 # -----------------------------
@@ -224,10 +1027,640 @@ def _parse_import_maps(mod: ast.Module, this_module: str):
                 from_names[local] = f"{base_mod}.{a.name}"
     return import_aliases, from_names
 
+def _resolve_symbol(dotted: str, this_module: str, local_names: Iterable[str],
+                    import_aliases: Dict[str, str], from_names: Dict[str, str]) -> Optional[str]:
+    """Resolve a dotted name used in `this_module` (e.g. a base class) to an absolute dotted path."""
+    root, _, rest = dotted.partition(".")
+    if root in local_names:
+        full = f"{this_module}.{root}"
+    else:
+        full = import_aliases.get(root) or from_names.get(root)
+        if not full:
+            return None
+    return f"{full}.{rest}" if rest else full
+
+def _resolve_class_bases(classes: Dict[str, List[str]], this_module: str,
+                         import_aliases: Dict[str, str], from_names: Dict[str, str]) -> Dict[str, List[str]]:
+    """Map each class of a module to the absolute dotted paths of its resolvable bases."""
+    resolved: Dict[str, List[str]] = {}
+    for qualname, bases in classes.items():
+        full = (_resolve_symbol(b, this_module, classes, import_aliases, from_names) for b in bases)
+        resolved[f"{this_module}.{qualname}"] = [b for b in full if b]
+    return resolved
+
+def _lookup_method(class_dotted: str, name: str, by_mod_func: Dict[str, _FuncRecord],
+                   class_bases: Dict[str, List[str]]) -> Optional[str]:
+    """Find `name` on a class or (breadth-first, approximating the MRO) on its project base classes."""
+    queue, seen = [class_dotted], set()
+    while queue:
+        cls = queue.pop(0)
+        if cls in seen:
+            continue
+        seen.add(cls)
+        if f"{cls}.{name}" in by_mod_func:
+            return f"{cls}.{name}"
+        queue.extend(class_bases.get(cls, ()))
+    return None
+
+def _resolve_calls(
+    calls: Iterable[str],
+    this_module: str,
+    import_aliases: Dict[str, str],
+    from_names: Dict[str, str],
+    by_name: Dict[str, List[_FuncRecord]],
+    by_mod_func: Dict[str, _FuncRecord],
+    aggressive_fallback: bool = False,
+    self_name: Optional[str] = None,
+    scope: Optional[str] = None,
+    class_bases: Optional[Dict[str, List[str]]] = None,
+) -> Set[str]:
+    """
+    Resolve a call summary (see `_summarize_calls`) of the function `scope`
+    (its qualname, e.g. 'View.get') in `this_module` to dotted paths of indexed
+    project functions, methods and nested defs.
+    """
+    class_bases = class_bases or {}
+    resolved_funcs: Set[str] = set()
+
+    # enclosing function scopes, innermost first ('outer.inner' -> ['outer.inner', 'outer'])
+    enclosing: List[str] = []
+    parts = scope.split(".") if scope else []
+    while parts:
+        q = ".".join(parts)
+        if f"{this_module}.{q}" not in class_bases:  # class bodies are not visible from methods
+            enclosing.append(q)
+        parts.pop()
+    owner_class = None
+    if scope and "." in scope and f"{this_module}.{scope.rpartition('.')[0]}" in class_bases:
+        owner_class = f"{this_module}.{scope.rpartition('.')[0]}"
+
+    for call in calls:
+        root, *chain = call.split(".")
+
+        # ---- Bare calls: helper() ----
+        if not chain:
+            name = root
+            # Nested def in this (or an enclosing) function, then same-file top-level function
+            local = next((f"{this_module}.{q}.{name}" for q in enclosing
+                          if f"{this_module}.{q}.{name}" in by_mod_func), None)
+            if local is None and f"{this_module}.{name}" in by_mod_func:
+                local = f"{this_module}.{name}"
+            if local is None:  # ClassName() -> ClassName.__init__
+                cls = f"{this_module}.{name}" if f"{this_module}.{name}" in class_bases else from_names.get(name)
+                if cls in class_bases:
+                    local = _lookup_method(cls, "__init__", by_mod_func, class_bases)
+            if local:
+                resolved_funcs.add(local)
+                continue
+
+            # from pkg.mod import name [as alias]
+            if name in from_names:
+                full = from_names[name]  # e.g., 'pkg.mod.helper'
+                if full in by_mod_func:
+                    resolved_funcs.add(full)
+                    continue
+
+            # No project-wide name scan unless explicitly allowed
+            if aggressive_fallback:
+                for rec in by_name.get(name, []):
+                    if "." in rec.qualname:
+                        continue  # bare calls only reach top-level functions
+                    # skip the exact same target function identity
+                    if rec.module == this_module and name == self_name:
+                        continue
+                    resolved_funcs.add(rec.dotted)
+            continue
+
+        func = chain[-1]
+
+        # ---- Instance / class calls inside a method: self.helper(), cls.build() ----
+        if root == "self" and len(chain) == 1:
+            if owner_class:
+                method = _lookup_method(owner_class, func, by_mod_func, class_bases)
+                if method:
+                    resolved_funcs.add(method)
+            continue
+
+        # ---- Same-module class calls: ClassName.method() ----
+        if f"{this_module}.{root}" in class_bases:
+            owner = ".".join([this_module, root] + chain[:-1])
+            method = _lookup_method(owner, func, by_mod_func, class_bases)
+            if method:
+                resolved_funcs.add(method)
+            continue
+
+        # ---- Qualified calls: utils.helper(), pkg.sub.mod.helper(), ImportedClass.method() ----
+        prefix = chain[:-1]
+
+        # Root can come from either 'import ... as root' OR 'from ... import root as root'
+        # (if 'root' is actually a submodule imported via 'from X import root', that map points to X.root)
+        base_mod = import_aliases.get(root) or from_names.get(root)
+        if not base_mod:
+            continue  # unknown root → skip
+
+        full_mod = ".".join([base_mod] + prefix) if prefix else base_mod
+        candidate = f"{full_mod}.{func}"
+
+        if candidate in by_mod_func:
+            resolved_funcs.add(candidate)
+        elif full_mod in class_bases and _lookup_method(full_mod, func, by_mod_func, class_bases):
+            resolved_funcs.add(_lookup_method(full_mod, func, by_mod_func, class_bases))
+        elif aggressive_fallback:
+            for rec in by_name.get(func, []):
+                resolved_funcs.add(rec.dotted)
+    return resolved_funcs
+
+def _resolve_record_helpers(index: _ProjectIndex, rec: _FuncRecord, aggressive_fallback: bool = False) -> List[str]:
+    """Dotted paths of the project functions called by an indexed function."""
+    import_aliases, from_names = index.file_imports[rec.path_id]
+    return sorted(_resolve_calls(
+        rec.calls, rec.module, import_aliases, from_names, index.by_name, index.by_mod_func,
+        aggressive_fallback, self_name=rec.name, scope=rec.qualname, class_bases=index.class_bases,
+    ))
+
+_DEFAULT_MAX_DEPTH = 3
+_DEFAULT_MAX_NODES = 40
+_DEFAULT_MAX_BYTES = 200_000
+
+def _expand_helper_graph(
+    index: _ProjectIndex,
+    roots: List[str],
+    max_depth: int,
+    max_nodes: int = _DEFAULT_MAX_NODES,
+    max_bytes: int = _DEFAULT_MAX_BYTES,
+    aggressive_fallback: bool = False,
+    exclude: Iterable[str] = (),
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Breadth-first walk of the helper call graph starting at `roots` (depth 1).
+
+    Every function is extracted at most once (cycles and shared helpers are
+    visited once). Code and line numbers come from the file's current parse in
+    the parsed-module cache (parsed on a miss), not from the index, so they stay
+    right when the index lags behind an edit. The walk stops
+    expanding at `max_depth`, and stops adding nodes once `max_nodes` or
+    `max_bytes` of source would be exceeded.
+
+    Returns (nodes, budget):
+      nodes: [{"function_path", "code", "start_line", "end_line", "function", "file",
+               "depth", "helpers": [dotted callee paths]}] in BFS order, deduplicated
+      budget: limits, usage and the "unexpanded" frontier left out by the limits
+    """
+    parsed_files: Dict[int, Optional[_ParsedModule]] = {}
+    seen: Set[str] = set(exclude)
+    queue: List[Tuple[str, int]] = []
+    for root in roots:
+        if root not in seen:
+            seen.add(root)
+            queue.append((root, 1))
+
+    nodes: List[Dict[str, Any]] = []
+    unexpanded: List[str] = []
+    used_bytes = 0
+    while queue:
+        func_path, depth = queue.pop(0)
+        rec = index.by_mod_func.get(func_path)
+        if rec is None:
+            continue
+        if len(nodes) >= max_nodes:
+            unexpanded.append(func_path)
+            continue
+        path = index.paths[rec.path_id]
+        if rec.path_id not in parsed_files:
+            try:
+                parsed_files[rec.path_id] = _MODULE_CACHE.get(Path(path).resolve())
+            except (OSError, SyntaxError, ValueError):
+                parsed_files[rec.path_id] = None
+        parsed = parsed_files[rec.path_id]
+        node = parsed.defs.get(rec.qualname) if parsed else None
+        if node is None:
+            continue  # file unreadable, or the def is gone since it was indexed
+        body, start, end = _slice_with_decorators(parsed.src_lines, node)
+        code = f"# Extracted from {Path(path).name}:{start}-{end}\n" + body
+        if used_bytes + len(code) > max_bytes:
+            unexpanded.append(func_path)
+            continue
+        used_bytes += len(code)
+
+        helpers = _resolve_record_helpers(index, rec, aggressive_fallback)
+        nodes.append({
+            "function_path": func_path,
+            "code": code,
+            "start_line": start,
+            "end_line": end,
+            "function": rec.qualname,
+            "file": path,
+            "depth": depth,
+            "helpers": helpers,
+        })
+        for helper in helpers:
+            if helper in seen:
+                continue
+            seen.add(helper)
+            if depth < max_depth:
+                queue.append((helper, depth + 1))
+            else:
+                unexpanded.append(helper)
+
+    budget = {
+        "max_depth": max_depth,
+        "max_nodes": max_nodes,
+        "max_bytes": max_bytes,
+        "nodes": len(nodes),
+        "bytes": used_bytes,
+        "unexpanded": sorted(set(unexpanded)),
+    }
+    return nodes, budget
+
+# -----------------------------
+# Django URLconf parsing
+# -----------------------------
+
+_URL_FUNCS = {"path": False, "re_path": True, "url": True}  # call name -> pattern is a regex
+
+def _const_str(node: Optional[ast.AST]) -> Optional[str]:
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+def _dotted(node: ast.AST) -> Optional[str]:
+    root, chain = _get_attr_chain(node)
+    return ".".join([root] + chain) if root else None
+
+def _gather_urlpatterns(mod: ast.Module, this_module: str, local_names: Set[str],
+                        import_aliases: Dict[str, str], from_names: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Static summary of a Django URLconf / settings module, or None if it has neither:
+      {
+        "app_name": str | None,
+        "root_urlconf": str | None,   # ROOT_URLCONF = "..." (settings modules)
+        "patterns": [[is_regex, pattern, target, name, is_include, namespace], ...]
+      }
+    Patterns come from path()/re_path()/url() calls in module-level `urlpatterns`
+    assignments; target is the resolved dotted view (class for `.as_view()`) or,
+    for include(), the included module.
+    """
+    app_name = root_urlconf = None
+    elements: List[ast.AST] = []
+
+    def collect(value: Optional[ast.AST]) -> None:
+        if isinstance(value, (ast.List, ast.Tuple)):
+            elements.extend(value.elts)
+        elif isinstance(value, ast.BinOp):  # urlpatterns = [...] + [...]
+            collect(value.left)
+            collect(value.right)
+
+    for n in mod.body:
+        if isinstance(n, ast.Assign):
+            targets, value = n.targets, n.value
+        elif isinstance(n, (ast.AnnAssign, ast.AugAssign)):
+            targets, value = [n.target], n.value
+        else:
+            continue
+        for t in targets:
+            if not isinstance(t, ast.Name):
+                continue
+            if t.id == "urlpatterns":
+                collect(value)
+            elif t.id == "app_name":
+                app_name = _const_str(value)
+            elif t.id == "ROOT_URLCONF":
+                root_urlconf = _const_str(value)
+
+    def resolve(node: ast.AST) -> Optional[str]:
+        dotted = _dotted(node)
+        if not dotted:
+            return None
+        return _resolve_symbol(dotted, this_module, local_names, import_aliases, from_names) or dotted
+
+    patterns: List[List[Any]] = []
+    for el in elements:
+        if not isinstance(el, ast.Call):
+            continue
+        func = _dotted(el.func)
+        is_regex = _URL_FUNCS.get(func.rpartition(".")[2]) if func else None
+        if is_regex is None:
+            continue
+        kwargs = {k.arg: k.value for k in el.keywords if k.arg}
+        pattern = _const_str(el.args[0] if el.args else kwargs.get("route"))
+        view = el.args[1] if len(el.args) > 1 else kwargs.get("view")
+        if pattern is None or view is None:
+            continue
+        name = _const_str(kwargs.get("name"))
+
+        if isinstance(view, ast.Call) and _dotted(view.func) and _dotted(view.func).rpartition(".")[2] == "include":
+            inc_kwargs = {k.arg: k.value for k in view.keywords if k.arg}
+            arg = view.args[0] if view.args else inc_kwargs.get("arg")
+            namespace = _const_str(inc_kwargs.get("namespace"))
+            if isinstance(arg, ast.Tuple) and arg.elts:  # include(("app.urls", "app_name"))
+                namespace = namespace or (_const_str(arg.elts[1]) if len(arg.elts) > 1 else None)
+                arg = arg.elts[0]
+            target = _const_str(arg) or (resolve(arg) if arg is not None else None)
+            if target:
+                patterns.append([is_regex, pattern, target, name, True, namespace])
+        elif isinstance(view, ast.Call) and isinstance(view.func, ast.Attribute) and view.func.attr == "as_view":
+            target = resolve(view.func.value)
+            if target:
+                patterns.append([is_regex, pattern, target, name, False, None])
+        else:
+            target = resolve(view)
+            if target:
+                patterns.append([is_regex, pattern, target, name, False, None])
+
+    if not patterns and root_urlconf is None:
+        return None
+    return {"app_name": app_name, "root_urlconf": root_urlconf, "patterns": patterns}
+
+def _project_urlconfs(base_path_str: str, max_age: float = 0.0) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+    """
+    (index version, {module: URLconf summary}) for a project, refreshing the
+    index first unless it was refreshed less than `max_age` seconds ago.
+    """
+    index = _refreshed_index(base_path_str, max_age)
+    with index.lock:
+        return index.version, {e.module: e.urls for e in index.files.values() if e.urls}
+
 # -----------------------------
 # main API
 # -----------------------------
 
+_AST_NODE_BYTES = 250  # rough memory of one ast node with its attributes (CPython 3.11, 64-bit)
+
+class _ParsedModule:
+    """One parse of a source file: lines, tree and def tables, shared by every extraction from it."""
+    __slots__ = ("path", "mtime_ns", "size", "weight", "src_lines", "tree", "defs", "class_bases", "_imports")
+
+    def __init__(self, path: Path):
+        st = path.stat()
+        src = path.read_text(encoding="utf-8")
+        self.path = path
+        self.mtime_ns, self.size = st.st_mtime_ns, st.st_size
+        self.src_lines = src.splitlines()
+        self.tree = ast.parse(src)
+        self.defs, self.class_bases = _gather_defs(self.tree)
+        # estimated resident size: the tree dwarfs the source (10-50x), so count its nodes
+        self.weight = sum(1 for _ in ast.walk(self.tree)) * _AST_NODE_BYTES + 2 * len(src)
+        self._imports: Dict[str, Tuple[Dict[str, str], Dict[str, str]]] = {}
+
+    def import_maps(self, this_module: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+        if this_module not in self._imports:
+            self._imports[this_module] = _parse_import_maps(self.tree, this_module)
+        return self._imports[this_module]
+
+class _ModuleCache:
+    """
+    Process-wide LRU of `_ParsedModule`s keyed by path and validated by
+    (mtime_ns, size), so repeat extractions from the same files in a long-lived
+    `adk web` / `api_server` process skip reading and parsing. Bounded by entry
+    count and by the estimated memory of the parsed modules (`_ParsedModule.weight`).
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _ParsedModule]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def _fresh(self, path: Path) -> Optional[_ParsedModule]:
+        entry = self._entries.get(str(path))
+        if entry is None:
+            return None
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        if (entry.mtime_ns, entry.size) != (st.st_mtime_ns, st.st_size):
+            return None
+        self._entries.move_to_end(str(path))
+        return entry
+
+    def peek(self, path: Path) -> Optional[_ParsedModule]:
+        """The cached module if present and current; never parses."""
+        with self._lock:
+            return self._fresh(path)
+
+    def get(self, path: Path) -> _ParsedModule:
+        with self._lock:
+            entry = self._fresh(path)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = _ParsedModule(path)
+        with self._lock:
+            old = self._entries.pop(str(path), None)
+            if old is not None:
+                self._bytes -= old.weight
+            self._entries[str(path)] = entry
+            self._bytes += entry.weight
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.weight
+                self.evictions += 1
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+_MODULE_CACHE = _ModuleCache(
+    max_entries=int(os.getenv("DEVTOOLS_MODULE_CACHE_ENTRIES", "128")),
+    max_bytes=int(os.getenv("DEVTOOLS_MODULE_CACHE_BYTES", str(256 * 1024 * 1024))),
+)
+
+def module_cache_stats() -> Dict[str, int]:
+    """Hit/miss/eviction counters and current size of the parsed-module cache."""
+    return _MODULE_CACHE.stats()
+
+# -----------------------------
+# token budgets and skeletons
+# -----------------------------
+_CHARS_PER_TOKEN = 4  # rough average for source code; good enough to keep replies under a budget
+_SKELETON_MAX_RUN = 2  # runs of plain statements longer than this are elided
+_SKELETON_MAX_DOC = 12  # docstring lines kept in a skeleton
+_EXTRACT_MODES = ("full", "skeleton", "auto")
+
+def _estimate_tokens(obj: Any) -> int:
+    """Approximate token count of a tool reply (its JSON form)."""
+    text = obj if isinstance(obj, str) else json.dumps(obj, default=str)
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+def _block_segments(src_lines: List[str], st: ast.stmt) -> List[Tuple[int, List[ast.stmt]]]:
+    """(header line, body) for each clause of a compound statement, in source order."""
+    def clause(keyword: str, prev_end: int, body: List[ast.stmt]) -> Tuple[int, List[ast.stmt]]:
+        # `else:` / `finally:` have no node of their own; find their line between the clauses
+        for line in range(prev_end + 1, body[0].lineno + 1):
+            if src_lines[line - 1].lstrip().startswith(keyword):
+                return line, body
+        return body[0].lineno, body
+
+    segments = [(st.lineno, st.body)] if hasattr(st, "body") and isinstance(st.body, list) else []
+    if isinstance(st, ast.If) and st.orelse:
+        first = st.orelse[0]
+        if (len(st.orelse) == 1 and isinstance(first, ast.If)
+                and src_lines[first.lineno - 1].lstrip().startswith("elif")):
+            segments += _block_segments(src_lines, first)
+        else:
+            segments.append(clause("else", st.body[-1].end_lineno, st.orelse))
+    elif isinstance(st, (ast.For, ast.AsyncFor, ast.While)) and st.orelse:
+        segments.append(clause("else", st.body[-1].end_lineno, st.orelse))
+    elif isinstance(st, (ast.Try, getattr(ast, "TryStar", ast.Try))):
+        prev = st.body[-1].end_lineno
+        for handler in st.handlers:
+            segments.append((handler.lineno, handler.body))
+            prev = handler.body[-1].end_lineno
+        if st.orelse:
+            segments.append(clause("else", prev, st.orelse))
+            prev = st.orelse[-1].end_lineno
+        if st.finalbody:
+            segments.append(clause("finally", prev, st.finalbody))
+    elif isinstance(st, getattr(ast, "Match", ())):
+        segments = [(case.pattern.lineno, case.body) for case in st.cases]
+    return segments
+
+def _skeleton_source(src_lines: List[str], fn: FuncNode) -> str:
+    """
+    Outline of a function: decorators, signature, docstring and the control flow
+    (if/for/while/try/with/match headers, return/raise/yield), with runs of plain
+    statements replaced by `...  # lines a-b elided` markers (so the outline still
+    parses) that can be fetched with `read_source_lines_tool`. Nested defs/classes
+    keep only their signature.
+    """
+    out: List[str] = []
+
+    def marker(a: int, b: int) -> None:
+        line = src_lines[a - 1]
+        out.append(f"{line[:len(line) - len(line.lstrip())]}...  # lines {a}-{b} elided")
+
+    def header(start: int, body: List[ast.stmt]) -> bool:
+        """Emit a clause header; False when the body shares its line (`if x: y`)."""
+        if body[0].lineno <= start:
+            out.extend(src_lines[start - 1 : body[-1].end_lineno])
+            return False
+        out.extend(src_lines[start - 1 : body[0].lineno - 1])
+        return True
+
+    def block(stmts: List[ast.stmt]) -> None:
+        run: List[ast.stmt] = []
+
+        def flush() -> None:
+            if run:
+                a, b = run[0].lineno, run[-1].end_lineno
+                if b - a + 1 <= _SKELETON_MAX_RUN:
+                    out.extend(src_lines[a - 1 : b])
+                else:
+                    marker(a, b)
+                run.clear()
+
+        for st in stmts:
+            if isinstance(st, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                flush()
+                if header(_def_start_line(st), st.body):
+                    marker(st.body[0].lineno, st.end_lineno)
+            elif segments := _block_segments(src_lines, st):
+                flush()
+                for start, body in segments:
+                    if header(start, body):
+                        block(body)
+            elif isinstance(st, (ast.Return, ast.Raise)) or (
+                    isinstance(st, ast.Expr) and isinstance(st.value, (ast.Yield, ast.YieldFrom))):
+                flush()
+                out.extend(src_lines[st.lineno - 1 : st.end_lineno])
+            else:
+                run.append(st)
+        flush()
+
+    body = fn.body
+    if not header(_def_start_line(fn), body):
+        return "\n".join(out)
+    doc = body[0]
+    if isinstance(doc, ast.Expr) and isinstance(getattr(doc, "value", None), ast.Constant) \
+            and isinstance(doc.value.value, str):
+        last = min(doc.end_lineno, doc.lineno + _SKELETON_MAX_DOC - 1)
+        out.extend(src_lines[doc.lineno - 1 : last])
+        if last < doc.end_lineno:
+            marker(last + 1, doc.end_lineno)
+        body = body[1:]
+    block(body)
+    return "\n".join(out)
+
+def _truncate_code(lines: List[str], keep: int, first_line: int, last_line: int, contiguous: bool) -> str:
+    """The first `keep` of `lines`, followed by a fetch marker for the rest."""
+    kept = lines[:keep]
+    if contiguous:
+        # first kept line is the "# Extracted from" header, the rest map 1:1 onto the file
+        resume = first_line + max(0, len(kept) - 1)
+        note = f"# ... truncated; fetch lines {resume}-{last_line} with read_source_lines_tool"
+    else:
+        note = f"# ... truncated; fetch lines {first_line}-{last_line} with read_source_lines_tool"
+    return "\n".join(kept + [note])
+
+def _truncate_to_fit(result: Dict[str, Any], lines: List[str], max_tokens: int, contiguous: bool) -> bool:
+    """
+    Set result["code"] to the longest prefix of `lines` (plus fetch marker) that
+    keeps the serialized result within `max_tokens`; False if not even the marker fits.
+    """
+    def fits(keep: int) -> bool:
+        result["code"] = _truncate_code(lines, keep, result["start_line"], result["end_line"], contiguous)
+        return _estimate_tokens(result) <= max_tokens
+
+    if not fits(0):
+        return False
+    lo, hi = 0, len(lines) - 1  # all lines would not need a marker, so at most all but one
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    fits(lo)
+    return True
+
+_MIN_MAX_TOKENS = 32  # smallest accepted max_tokens; always room for an error reply
+# extraction result keys that may go when even the truncated code does not fit
+_OPTIONAL_RESULT_KEYS = ("helpers", "helper_budget", "function", "mode")
+
+def _fit_to_budget(result: Dict[str, Any], max_tokens: int, contiguous: bool) -> Dict[str, Any]:
+    """
+    Shrink an extraction result until its JSON form is within `max_tokens`:
+    drop the deepest helpers first, then truncate the code itself (keeping as
+    many lines as fit), then the optional metadata. Budgets below
+    `_MIN_MAX_TOKENS`, or too small for the fetch marker, file and line numbers,
+    get a short {"error": "max_tokens below minimum N"} instead.
+    """
+    if max_tokens < _MIN_MAX_TOKENS:
+        return {"error": f"max_tokens below minimum {_MIN_MAX_TOKENS}"}
+    if _estimate_tokens(result) <= max_tokens:
+        return result
+    helpers = result["helpers"]
+    budget = result.get("helper_budget")
+    while helpers and _estimate_tokens(result) > max_tokens:
+        dropped = helpers.pop()
+        if budget is not None and isinstance(dropped, dict):
+            budget["nodes"] -= 1
+            budget["bytes"] -= len(dropped.get("code", ""))
+            budget["unexpanded"].append(dropped["function_path"])
+    if _estimate_tokens(result) <= max_tokens:
+        return result
+    lines = result["code"].split("\n")
+    result["truncated"] = True
+    if _truncate_to_fit(result, lines, max_tokens, contiguous):
+        return result
+    # not even the fetch marker fits; shed what the caller can do without
+    for key in _OPTIONAL_RESULT_KEYS:
+        result.pop(key, None)
+    if _truncate_to_fit(result, lines, max_tokens, contiguous):
+        return result
+    return {"error": f"max_tokens below minimum {_estimate_tokens(result)}"}
+
 def extract_function_source_ast(
     file_path: str | Path,
     func_or_qualname: str,
@@ -237,6 +1670,11 @@ def extract_function_source_ast(
     detailed_functions: bool = False,
     recursive_helper: bool = False,
     aggressive_fallback: bool = False,  # set True to allow cross-project name fallback
+    max_depth: Optional[int] = None,
+    max_nodes: int = _DEFAULT_MAX_NODES,
+    max_bytes: int = _DEFAULT_MAX_BYTES,
+    mode: str = "full",
+    max_tokens: Optional[int] = None,
     # tool_context: ToolContext
 ): # -> Dict[str, Any]
     """
@@ -248,10 +1686,21 @@ def extract_function_source_ast(
       include_helpers: If True, also return helper function *paths* discovered
                        from calls inside the target, searching across the project.
       base_path: Project root directory. Only files under this root are considered.
-      detailed_functions: If True, include detailed information about function arguments and return types.
-      reursive_helper: If True, include helper functions found in the same file.
+      detailed_functions: If True, return the helpers' source as a deduplicated graph
+                          (see `_expand_helper_graph`) instead of bare paths.
+      reursive_helper: If True, keep expanding helpers of helpers up to `max_depth`;
+                       otherwise only the direct helpers are detailed.
       aggressive_fallback: If True, when we can't prove a binding, include all
                            same-named top-level functions found across the project.
+      max_depth: Helper levels to expand when recursive (default 3).
+      max_nodes: Max detailed helpers returned.
+      max_bytes: Max total bytes of helper source returned.
+      mode: "full" (whole source), "skeleton" (signature, docstring and control-flow
+            outline with elided line ranges) or "auto" (full unless it exceeds max_tokens).
+      max_tokens: Approximate upper bound for the whole reply; helpers are dropped
+                  and then the code truncated (with a fetch marker) to stay under it.
+                  Below 32, or below the size of that minimal reply, the reply is
+                  {"error": "max_tokens below minimum N"}.
       tool_context: Tool context (optional for session actions).
 
     Returns:
@@ -262,135 +1711,120 @@ def extract_function_source_ast(
         "function": str,
         "file": str,
         "helpers": List[str]  # dotted function paths across the project
+                   | List[Dict]  # with detailed_functions: one node per helper, each
+                                 # listing its own "helpers" paths (graph edges)
+        "helper_budget": Dict  # with detailed_functions: limits, usage, "unexpanded" frontier
+        "mode": str  # "full" or "skeleton", the form "code" was returned in
+        "truncated": bool  # only present when max_tokens forced the code to be cut
       }
+      With max_tokens cut down to the fetch marker, "helpers", "helper_budget",
+      "function" and "mode" are left out.
     """
+    return _extract_from_parsed(
+        _MODULE_CACHE.get(Path(file_path).resolve()),
+        func_or_qualname,
+        include_helpers,
+        base_path=base_path,
+        detailed_functions=detailed_functions,
+        recursive_helper=recursive_helper,
+        aggressive_fallback=aggressive_fallback,
+        max_depth=max_depth,
+        max_nodes=max_nodes,
+        max_bytes=max_bytes,
+        mode=mode,
+        max_tokens=max_tokens,
+    )
+
+def _extract_from_parsed(
+    parsed: _ParsedModule,
+    func_or_qualname: str,
+    include_helpers: bool = False,
+    *,
+    base_path: str | Path,
+    detailed_functions: bool = False,
+    recursive_helper: bool = False,
+    aggressive_fallback: bool = False,
+    max_depth: Optional[int] = None,
+    max_nodes: int = _DEFAULT_MAX_NODES,
+    max_bytes: int = _DEFAULT_MAX_BYTES,
+    mode: str = "full",
+    max_tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    """`extract_function_source_ast` on an already parsed file."""
+    if mode not in _EXTRACT_MODES:
+        raise ValueError(f"mode must be one of {_EXTRACT_MODES}, got {mode!r}")
     base = Path(base_path).resolve()
-    path = Path(file_path).resolve()
-    src = path.read_text(encoding="utf-8")
-    src_lines = src.splitlines()
-
-    mod = ast.parse(src)
-    top_funcs, class_methods = _gather_defs(mod)
-
-    class_name: Optional[str] = None
-    func_name = func_or_qualname
-    if "." in func_or_qualname:
-        class_name, func_name = func_or_qualname.split(".", 1)
-
-    target_node: Optional[FuncNode] = None
-    if class_name:
-        methods = class_methods.get(class_name, {})
-        target_node = methods.get(func_name)
-    else:
-        target_node = top_funcs.get(func_name)
-        if target_node is None:
-            for cls, methods in class_methods.items():
-                if func_name in methods:
-                    target_node = methods[func_name]
-                    class_name = cls
-                    break
+    path = parsed.path
+    src_lines, defs, class_bases = parsed.src_lines, parsed.defs, parsed.class_bases
+
+    qualname = func_or_qualname
+    target_node: Optional[FuncNode] = defs.get(qualname)
+    if target_node is None and "." not in qualname:
+        # bare name of a method: take the first class defining it
+        for q, node in defs.items():
+            if q.endswith(f".{qualname}") and q.rpartition(".")[0] in class_bases:
+                qualname, target_node = q, node
+                break
 
     if target_node is None:
-        available = sorted(list(top_funcs.keys()) + [f"{c}.{m}" for c, ms in class_methods.items() for m in ms])
+        available = sorted(defs)
         raise ValueError(f"Function '{func_or_qualname}' not found. Available: {available}")
+    func_name = qualname.rpartition(".")[2]
+    owner = qualname.rpartition(".")[0]
 
     main_code, start, end = _slice_with_decorators(src_lines, target_node)
+    if mode == "skeleton" or (mode == "auto" and max_tokens and _estimate_tokens(main_code) > max_tokens):
+        mode = "skeleton"
+        main_code = _skeleton_source(src_lines, target_node)
+    else:
+        mode = "full"
     pieces = [f"# Extracted from {path.name}:{start}-{end}\n{main_code}"]
+    if max_tokens:
+        # helpers only get what the target's own code leaves over
+        max_bytes = min(max_bytes, max(0, max_tokens * _CHARS_PER_TOKEN - len(pieces[0])))
 
     helper_function_paths: List[str] = []
     helper_function_paths_final = []
+    helper_budget: Optional[Dict[str, Any]] = None
     if include_helpers:
         by_name, by_mod_func = _index_project_functions(str(base))
 
         this_module = _to_module_qualname(base, path)
-        import_aliases, from_names = _parse_import_maps(mod, this_module)
-
-        # collect calls + bound locals in the function
-        bare_names, qual_calls, bound_locals = _collect_calls_and_locals(target_node)
-
-        resolved_funcs: set[str] = set()
-
-        # ---- Bare calls: helper() ----
-        for name in bare_names:
-            # If the name is locally bound (param/assignment/etc.), we can't safely resolve it.
-            if name in bound_locals:
-                continue
-
-            # Same-file top-level function wins
-            if name in top_funcs:
-                resolved_funcs.add(f"{this_module}.{name}")
-                continue
-
-            # from pkg.mod import name [as alias]
-            if name in from_names:
-                full = from_names[name]  # e.g., 'pkg.mod.helper'
-                if full in by_mod_func:
-                    resolved_funcs.add(full)
-                    continue
-
-            # No project-wide name scan unless explicitly allowed
-            if aggressive_fallback:
-                for _fp, module_name, _node in by_name.get(name, []):
-                    # skip the exact same target function identity
-                    if module_name == this_module and name == func_name:
-                        continue
-                    resolved_funcs.add(f"{module_name}.{name}")
-
-        # ---- Qualified calls: utils.helper(), pkg.sub.mod.helper() ----
-        for root, chain in qual_calls:
-            if not chain:
-                continue
+        import_aliases, from_names = parsed.import_maps(this_module)
 
-            # If root is locally bound, treat as object, not module
-            if root in bound_locals:
-                continue
-
-            func = chain[-1]
-            prefix = chain[:-1]
-
-            # Root can come from either 'import ... as root' OR 'from ... import root as root'
-            base_mod = import_aliases.get(root)
-            if not base_mod:
-                # If root was imported via 'from X import root', that map points to X.root
-                maybe = from_names.get(root)
-                if maybe:
-                    # If 'root' is actually a submodule imported via 'from X import root'
-                    base_mod = maybe
-
-            if not base_mod:
-                continue  # unknown root → skip
-
-            full_mod = ".".join([base_mod] + prefix) if prefix else base_mod
-            candidate = f"{full_mod}.{func}"
-
-            if candidate in by_mod_func:
-                resolved_funcs.add(candidate)
-            elif aggressive_fallback:
-                for _fp, module_name, _node in by_name.get(func, []):
-                    resolved_funcs.add(f"{module_name}.{func}")
+        index = _get_project_index(str(base))
+        with index.lock:  # a watcher may be updating the lookups in place
+            project_bases = dict(index.class_bases)
+        resolved_funcs = _resolve_calls(
+            _summarize_calls(target_node, _self_arg(target_node) if owner in class_bases else None),
+            this_module, import_aliases, from_names, by_name, by_mod_func, aggressive_fallback,
+            self_name=func_name, scope=qualname,
+            class_bases={**project_bases, **_resolve_class_bases(class_bases, this_module, import_aliases, from_names)},
+        )
         helper_function_paths = sorted(resolved_funcs)
         if detailed_functions:
-            for func_path in helper_function_paths:
-                p, f = create_file_path(base_path, func_path)
-                # print(f, p)
-                helper_function_paths_final.append(extract_function_source_ast(
-                    file_path=p,
-                    func_or_qualname=f,
-                    include_helpers=detailed_functions,
-                    base_path=base_path,
-                    detailed_functions=recursive_helper,
-                ))
+            depth = (max_depth or _DEFAULT_MAX_DEPTH) if recursive_helper else 1
+            helper_function_paths_final, helper_budget = _expand_helper_graph(
+                index, helper_function_paths, depth, max_nodes, max_bytes,
+                aggressive_fallback, exclude=[f"{this_module}.{qualname}"],
+            )
         else:
             helper_function_paths_final = helper_function_paths
 
-    return {
+    result = {
         "code": "\n".join(pieces),
         "start_line": start,
         "end_line": end,
         "function": func_or_qualname,
         "file": str(path),
         "helpers": helper_function_paths_final,
+        "mode": mode,
     }
+    if helper_budget is not None:
+        result["helper_budget"] = helper_budget
+    if max_tokens:
+        result = _fit_to_budget(result, max_tokens, contiguous=mode == "full")
+    return result
 
 class ParameterInputSchema(BaseModel):
     function_path: str = Field(..., alias="function_path")
@@ -399,6 +1833,11 @@ class ParameterInputSchema(BaseModel):
     detailed_functions: bool = Field(False, alias="detailed_functions")
     recursive_helper: bool = Field(False, alias="recursive_helper")
     aggressive_fallback: bool = Field(False, alias="aggressive_fallback")
+    max_depth: Optional[int] = Field(None, alias="max_depth")
+    max_nodes: int = Field(_DEFAULT_MAX_NODES, alias="max_nodes")
+    max_bytes: int = Field(_DEFAULT_MAX_BYTES, alias="max_bytes")
+    mode: str = Field("full", alias="mode")
+    max_tokens: Optional[int] = Field(None, alias="max_tokens")
 
     # allow using field names instead of aliases and vice-versa
     model_config = dict(populate_by_name=True)
@@ -442,6 +1881,11 @@ class ParameterInputSchema(BaseModel):
             "detailed_functions": self.detailed_functions,
             "recursive_helper": self.recursive_helper,   # keep original name expected by your function
             "aggressive_fallback": self.aggressive_fallback,
+            "max_depth": self.max_depth,
+            "max_nodes": self.max_nodes,
+            "max_bytes": self.max_bytes,
+            "mode": self.mode,
+            "max_tokens": self.max_tokens,
         }
 
 def extract_function_source_tool(
@@ -462,9 +1906,15 @@ def extract_function_source_tool(
           - base_path (str): Project root directory. Only files under this root are considered.
           - detailed_functions (bool): If True, include detailed information about function
             arguments and return types.
-          - recursive_helper (bool): If True, include helper functions found in the same file.
+          - recursive_helper (bool): If True, keep expanding helpers of helpers (up to max_depth).
           - aggressive_fallback (bool): If True, when binding can't be proven, include all
             same-named top-level functions found across the project.
+          - max_depth / max_nodes / max_bytes (int): Budgets for the detailed helper graph;
+            anything cut off is listed in "helper_budget"["unexpanded"].
+          - mode (str): "full", "skeleton" (outline with elided line ranges) or "auto".
+          - max_tokens (int): Approximate upper bound on the size of the reply, at
+            least 32. When even the truncated code, file and lines do not fit, the
+            reply is {"error": "max_tokens below minimum N"}.
     tool_context : ToolContext
         Tool context (e.g., session/runtime context) passed through to the extractor.
 
@@ -478,6 +1928,9 @@ def extract_function_source_tool(
           "function": str,
           "file": str,
           "helpers": List[str] | List[Dict[str, Any]]  # depends on detailed_helpers flags
+          "helper_budget": Dict[str, Any]  # only with detailed_functions
+          "mode": str,  # "full" or "skeleton"
+          "truncated": bool  # only when max_tokens forced a cut
         }
     """
     print("extract_function_source_tool", params)
@@ -491,4 +1944,285 @@ def extract_function_source_tool(
     return extract_function_source_ast(
         # tool_context=tool_context,
         **params,
-    )
\ No newline at end of file
+    )
+
+def query_call_graph_tool(
+    function_path: str,
+    base_path: str,
+    tool_context: ToolContext,
+    direction: str = "both",
+    depth: int = 1,
+    limit: int = 200,
+) -> Dict[str, Any]:
+    """
+    Find who calls a function (callers) and/or what it calls (callees) across the
+    project, up to `depth` hops, from the precomputed project call graph.
+
+    Args:
+        function_path: Dotted path of the function/method, e.g. 'Inventory.views.StockView.get'.
+        base_path: Project root directory (BASE_PATH).
+        tool_context: Tool context (optional for session actions).
+        direction: "callers", "callees" or "both".
+        depth: Number of hops to follow (1 = direct callers/callees).
+        limit: Max functions returned per direction.
+
+    Returns:
+        Dict with "function", and "callers"/"callees" lists of
+        {"function_path", "hops", "file", "start_line", "end_line"}.
+    """
+    if direction not in ("callers", "callees", "both"):
+        return {"error": f"direction must be 'callers', 'callees' or 'both', got {direction!r}"}
+    index = _get_project_index(base_path)
+    with index.lock:
+        index.refresh()
+        graph = index.call_graph()
+        if function_path not in index.by_mod_func:
+            return {"error": f"Function '{function_path}' is not in the project index."}
+
+        result: Dict[str, Any] = {"function": function_path}
+        for key, reverse in (("callers", True), ("callees", False)):
+            if direction not in (key, "both"):
+                continue
+            items = []
+            for fid, hops in graph.walk(function_path, reverse, max(1, depth), limit):
+                rec = index.by_mod_func.get(graph.names[fid])
+                if rec is None:
+                    continue
+                items.append({
+                    "function_path": rec.dotted,
+                    "hops": hops,
+                    "file": index.paths[rec.path_id],
+                    "start_line": rec.start,
+                    "end_line": rec.end,
+                })
+            result[key] = items
+    return result
+
+_SYMBOL_KINDS = ("module", "class", "function")
+
+def search_symbols_tool(
+    query: str,
+    base_path: str,
+    tool_context: ToolContext,
+    kind: Optional[str] = None,
+    limit: int = 20,
+) -> Dict[str, Any]:
+    """
+    Ranked search for the functions, classes and modules that mention the given
+    words: identifiers (e.g. a model field), string literals (e.g. an error
+    message, URL name or template name) and docstrings.
+
+    Args:
+        query: Free text, e.g. 'Invalid session id' or 'vessel_voyage'.
+        base_path: Project root directory (BASE_PATH).
+        tool_context: Tool context (optional for session actions).
+        kind: Only return "function", "class" or "module" symbols.
+        limit: Max results.
+
+    Returns:
+        Dict with "query" and "results", best first: [{"symbol" (dotted path, usable as
+        function_path), "kind", "file", "start_line", "end_line", "score", "matched"}].
+    """
+    if kind is not None and kind not in _SYMBOL_KINDS:
+        return {"error": f"kind must be one of {_SYMBOL_KINDS}, got {kind!r}"}
+    index = _get_project_index(base_path)
+    with index.lock:
+        index.refresh()
+        search = index.search_index()
+        results = []
+        for score, sid, matched in search.search(query, max(1, limit), kind):
+            pid, dotted, symbol_kind, start, end = search.symbols[sid]
+            results.append({
+                "symbol": dotted,
+                "kind": symbol_kind,
+                "file": index.paths[pid],
+                "start_line": start,
+                "end_line": end,
+                "score": round(score, 3),
+                "matched": matched,
+            })
+    return {"query": query, "results": results}
+
+_DEFAULT_READ_TOKENS = 8_000
+
+def read_source_lines(file_path: str | Path, start_line: int, end_line: int, *,
+                      base_path: str | Path, max_tokens: Optional[int] = _DEFAULT_READ_TOKENS) -> Dict[str, Any]:
+    """
+    Return lines `start_line`..`end_line` (1-based, inclusive) of a file under
+    `base_path`, e.g. a range elided from a skeleton. Stops early at `max_tokens`,
+    reporting the last line returned so the rest can be fetched in another call.
+    """
+    base = Path(base_path).resolve()
+    path = Path(file_path)
+    path = (path if path.is_absolute() else base / path).resolve()
+    try:
+        path.relative_to(base)
+    except ValueError:
+        raise ValueError(f"file_path must be under base_path\n  file: {path}\n  base: {base}")
+    if start_line < 1 or end_line < start_line:
+        raise ValueError(f"Invalid line range {start_line}-{end_line}")
+
+    parsed = _MODULE_CACHE.peek(path)
+    if parsed is not None:
+        lines = parsed.src_lines[start_line - 1 : end_line]
+    else:
+        with path.open("r", encoding="utf-8") as f:
+            lines = [line.rstrip("\r\n") for line in itertools.islice(f, start_line - 1, end_line)]
+
+    limit = max_tokens * _CHARS_PER_TOKEN if max_tokens else None
+    kept, size = [], 0
+    for line in lines:
+        if limit is not None and kept and size + len(line) + 1 > limit:
+            break
+        kept.append(line)
+        size += len(line) + 1
+    last = start_line + len(kept) - 1
+    return {
+        "file": str(path),
+        "start_line": start_line,
+        "end_line": last,
+        "code": "\n".join(kept),
+        "truncated": last < min(end_line, start_line + len(lines) - 1),
+    }
+
+def read_source_lines_tool(
+    file_path: str,
+    start_line: int,
+    end_line: int,
+    base_path: str,
+    tool_context: ToolContext,
+    max_tokens: int = _DEFAULT_READ_TOKENS,
+) -> Dict[str, Any]:
+    """
+    Fetch a line range of a source file, e.g. a body elided from a skeleton
+    ("...  # lines 120-180 elided") or the rest of a truncated extraction.
+
+    Args:
+        file_path: File path as returned in the "file" field of an extraction.
+        start_line: First line to return (1-based).
+        end_line: Last line to return (inclusive).
+        base_path: Project root directory (BASE_PATH).
+        tool_context: Tool context (optional for session actions).
+        max_tokens: Approximate upper bound on the returned code.
+
+    Returns:
+        Dict with "file", "start_line", "end_line" (last line actually returned),
+        "code" and "truncated", or {"error": str}.
+    """
+    try:
+        return read_source_lines(file_path, start_line, end_line, base_path=base_path, max_tokens=max_tokens)
+    except (OSError, ValueError) as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+def extract_functions_batch(function_paths: List[str], base_path: str | Path, **options: Any) -> Dict[str, Any]:
+    """
+    Extract many functions at once. Paths are grouped by file so each file is
+    read and parsed once; failures are reported per item instead of aborting.
+    `options` are the keyword arguments of `extract_function_source_ast`;
+    `max_tokens` caps the whole reply and is shared evenly between the items.
+
+    Returns:
+      {"results": [{"function_path": str, **extract_result} | {"function_path": str, "error": str}],
+       "files_parsed": int}
+      or {"error": "max_tokens below minimum N"} when `max_tokens` leaves an item
+      less than 32 tokens.
+    """
+    groups: Dict[str, List[Tuple[int, str, str]]] = {}
+    results: List[Optional[Dict[str, Any]]] = [None] * len(function_paths)
+    for i, function_path in enumerate(function_paths):
+        try:
+            file_path, qualname = create_file_path(str(base_path), function_path)
+        except ValueError as e:
+            results[i] = {"function_path": function_path, "error": f"{type(e).__name__}: {e}"}
+            continue
+        groups.setdefault(file_path, []).append((i, function_path, qualname))
+
+    if options.get("max_tokens") and function_paths:
+        envelope = _estimate_tokens({"results": [{"function_path": p} for p in function_paths], "files_parsed": 0})
+        per_item = (options["max_tokens"] - envelope) // len(function_paths)
+        if per_item < _MIN_MAX_TOKENS:
+            return {"error": f"max_tokens below minimum {envelope + _MIN_MAX_TOKENS * len(function_paths)}"}
+        options = {**options, "max_tokens": per_item}
+
+    files_parsed = 0
+    for file_path, items in groups.items():
+        try:
+            parsed = _MODULE_CACHE.get(Path(file_path).resolve())
+            files_parsed += 1
+        except (OSError, SyntaxError, ValueError) as e:
+            for i, function_path, _ in items:
+                results[i] = {"function_path": function_path, "error": f"{type(e).__name__}: {e}"}
+            continue
+        for i, function_path, qualname in items:
+            try:
+                extracted = _extract_from_parsed(parsed, qualname, base_path=base_path, **options)
+                results[i] = {"function_path": function_path, **extracted}
+            except (OSError, ValueError) as e:
+                results[i] = {"function_path": function_path, "error": f"{type(e).__name__}: {e}"}
+    return {"results": results, "files_parsed": files_parsed}
+
+class BatchParameterInputSchema(BaseModel):
+    function_paths: List[str] = Field(..., alias="function_paths")
+    base_path: str = Field(..., alias="base_path")
+    include_helpers: bool = Field(False, alias="include_helpers")
+    detailed_functions: bool = Field(False, alias="detailed_functions")
+    recursive_helper: bool = Field(False, alias="recursive_helper")
+    aggressive_fallback: bool = Field(False, alias="aggressive_fallback")
+    max_depth: Optional[int] = Field(None, alias="max_depth")
+    max_nodes: int = Field(_DEFAULT_MAX_NODES, alias="max_nodes")
+    max_bytes: int = Field(_DEFAULT_MAX_BYTES, alias="max_bytes")
+    mode: str = Field("full", alias="mode")
+    max_tokens: Optional[int] = Field(None, alias="max_tokens")
+
+    # allow using field names instead of aliases and vice-versa
+    model_config = dict(populate_by_name=True)
+
+    def to_kwargs(self) -> Dict[str, Any]:
+        """Map schema to extract_functions_batch kwargs."""
+        return {
+            "function_paths": list(self.function_paths),
+            "base_path": str(self.base_path),
+            "include_helpers": self.include_helpers,
+            "detailed_functions": self.detailed_functions,
+            "recursive_helper": self.recursive_helper,
+            "aggressive_fallback": self.aggressive_fallback,
+            "max_depth": self.max_depth,
+            "max_nodes": self.max_nodes,
+            "max_bytes": self.max_bytes,
+            "mode": self.mode,
+            "max_tokens": self.max_tokens,
+        }
+
+def extract_functions_batch_tool(
+        params: BatchParameterInputSchema,
+        tool_context: ToolContext
+    ) -> Dict[str, Any]:
+    """
+    Extract several functions/methods in one call (e.g. all views and helpers
+    you need from the same module), parsing each file only once.
+
+    Parameters
+    ----------
+    params : BatchParameterInputSchema
+        Contains:
+          - function_paths (List[str]): Dotted paths of the functions/methods to extract.
+          - base_path (str): Project root directory.
+          - include_helpers / detailed_functions / recursive_helper / aggressive_fallback /
+            max_depth / max_nodes / max_bytes / mode: as in `extract_function_source_tool`,
+            applied to every item.
+          - max_tokens (int): Approximate upper bound on the whole reply, split evenly
+            across the items; each item needs at least 32 tokens, otherwise the whole
+            reply is {"error": "max_tokens below minimum N"}.
+    tool_context : ToolContext
+        Tool context (e.g., session/runtime context).
+
+    Returns
+    -------
+    Dict[str, Any]
+        {
+          "results": [ {"function_path": str, "code": ..., "helpers": ...} | {"function_path": str, "error": str} ],
+          "files_parsed": int
+        }
+    """
+    params = params.to_kwargs() if isinstance(params, BatchParameterInputSchema) else dict(params)
+    return extract_functions_batch(**params)
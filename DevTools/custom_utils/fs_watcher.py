@@ -0,0 +1,241 @@
+# DevTools/custom_utils/fs_watcher.py
+"""
+Background filesystem watcher shared by the code index and the file tools.
+
+Uses watchdog (inotify on Linux, FSEvents / ReadDirectoryChangesW elsewhere)
+when it is installed, and otherwise falls back to polling (mtime_ns, size)
+snapshots every `interval` seconds, statting only the files some subscriber's
+suffix filter asks for. Changes are debounced and handed to
+subscribers as sets of absolute paths; a subscriber is told to rescan
+everything when a whole directory was moved or deleted.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional dependency, see requirements.txt
+    FileSystemEventHandler = object
+    Observer = None
+
+_DEBOUNCE = 0.2  # seconds of quiet before a burst of events (e.g. a `git pull`) is delivered
+
+
+class Subscription:
+    """Changes seen by one subscriber since it last called `drain`."""
+
+    def __init__(self, watcher: "FsWatcher", callback: Optional[Callable[[], None]],
+                 suffixes: Optional[Tuple[str, ...]]):
+        self.watcher = watcher
+        self.callback = callback
+        self.suffixes = suffixes
+        self._pending: Set[str] = set()
+        self._rescan = False
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.watcher.alive
+
+    def _add(self, paths: Iterable[str], rescan: bool) -> bool:
+        with self._lock:
+            before = (len(self._pending), self._rescan)
+            self._pending.update(p for p in paths if self.suffixes is None or p.endswith(self.suffixes))
+            self._rescan = self._rescan or rescan
+            return (len(self._pending), self._rescan) != before
+
+    def drain(self) -> Optional[Set[str]]:
+        """Changed paths since the last drain, or None when everything must be rescanned."""
+        self.watcher.flush()
+        with self._lock:
+            paths, rescan = self._pending, self._rescan
+            self._pending, self._rescan = set(), False
+        return None if rescan else paths
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "FsWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        if event.event_type in ("opened", "closed", "closed_no_write"):
+            return
+        paths = [os.fsdecode(p) for p in (event.src_path, getattr(event, "dest_path", "") or "") if p]
+        if event.is_directory and event.event_type in ("deleted", "moved"):
+            self.watcher._record(paths, rescan=True)
+            return
+        # directory created / modified events count too: they change what a listing shows
+        self.watcher._record(paths)
+
+
+class FsWatcher:
+    """Watches `root` recursively, skipping any directory named in `ignore_dirs`."""
+
+    def __init__(self, root: str, ignore_dirs: Iterable[str] = (), interval: float = 1.0):
+        self.root = os.path.realpath(root)
+        self.ignore_dirs: FrozenSet[str] = frozenset(ignore_dirs)
+        self.interval = interval
+        self.generation = 0  # bumped on every observed change
+        self.backend = "watchdog" if Observer is not None else "polling"
+        self._subs: List[Subscription] = []
+        self._raw: Set[str] = set()
+        self._raw_rescan = False
+        self._last_event = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._snapshot_suffixes: Optional[Tuple[str, ...]] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def subscribe(self, callback: Optional[Callable[[], None]] = None,
+                  suffixes: Optional[Iterable[str]] = None) -> Subscription:
+        """
+        Register a subscriber; `callback` is called (no args) from the watcher thread
+        after changes. With `suffixes`, only matching paths are delivered, and the
+        polling backend stats only files some subscriber asked for.
+        """
+        sub = Subscription(self, callback, tuple(suffixes) if suffixes else None)
+        with self._lock:
+            self._subs.append(sub)
+        return sub
+
+    def start(self) -> "FsWatcher":
+        if self.alive:
+            return self
+        self._stop.clear()
+        if self._observer is None and Observer is not None:
+            try:
+                observer = Observer()
+                observer.schedule(_EventHandler(self), self.root, recursive=True)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+            except OSError as e:  # e.g. inotify watch limit reached
+                print(f"fs_watcher: {e}; falling back to polling {self.root}")
+                self.backend = "polling"
+        if self.backend == "polling":
+            self._snapshot_suffixes = self._scan_suffixes()
+            self._snapshot = self._scan(self._snapshot_suffixes)
+        self._thread = threading.Thread(target=self._run, name=f"fs-watcher:{self.root}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _ignored(self, path: str) -> bool:
+        rel = os.path.relpath(path, self.root)
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return True
+        return any(part in self.ignore_dirs for part in rel.split(os.sep)[:-1])
+
+    def _record(self, paths: Iterable[str], rescan: bool = False) -> None:
+        paths = [p for p in paths if not self._ignored(p)]
+        if not paths and not rescan:
+            return
+        with self._lock:
+            self._raw.update(paths)
+            self._raw_rescan = self._raw_rescan or rescan
+            self._last_event = time.monotonic()
+            self.generation += 1
+
+    def flush(self) -> List[Subscription]:
+        """Hand buffered events to the subscribers now; returns those that got something new."""
+        with self._lock:
+            raw, rescan = self._raw, self._raw_rescan
+            self._raw, self._raw_rescan = set(), False
+            subs = list(self._subs)
+        if not raw and not rescan:
+            return []
+        return [sub for sub in subs if sub._add(raw, rescan)]
+
+    def _scan_suffixes(self) -> Optional[Tuple[str, ...]]:
+        """File suffixes the subscribers filter on; None when any of them (or nobody) wants every file."""
+        with self._lock:
+            subs = list(self._subs)
+        if not subs or any(sub.suffixes is None for sub in subs):
+            return None
+        return tuple(sorted({suffix for sub in subs for suffix in sub.suffixes}))
+
+    def _scan(self, suffixes: Optional[Tuple[str, ...]]) -> Dict[str, Tuple[int, int]]:
+        snapshot: Dict[str, Tuple[int, int]] = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in self.ignore_dirs]
+            for name in filenames:
+                if suffixes is not None and not name.endswith(suffixes):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def _poll(self) -> None:
+        suffixes = self._scan_suffixes()
+        snapshot = self._scan(suffixes)
+        old, new = self._snapshot, snapshot
+        if suffixes != self._snapshot_suffixes:
+            # the subscribers changed what is scanned; compare only files both scans covered
+            old = {p: sig for p, sig in old.items() if suffixes is None or p.endswith(suffixes)}
+            if self._snapshot_suffixes is not None:
+                new = {p: sig for p, sig in new.items() if p.endswith(self._snapshot_suffixes)}
+        changed = [p for p, sig in new.items() if old.get(p) != sig]
+        changed += [p for p in old if p not in new]
+        self._snapshot, self._snapshot_suffixes = snapshot, suffixes
+        self._record(changed)
+
+    def _run(self) -> None:
+        tick = min(self.interval, _DEBOUNCE) if self.backend == "watchdog" else self.interval
+        while not self._stop.wait(tick):
+            if self.backend == "polling":
+                self._poll()  # a poll already batches everything since the last one
+            else:
+                with self._lock:
+                    if time.monotonic() - self._last_event < _DEBOUNCE:
+                        continue
+            for sub in self.flush():
+                if sub.callback is None:
+                    continue
+                try:
+                    sub.callback()
+                except Exception as e:  # keep watching whatever one subscriber does
+                    print(f"fs_watcher: subscriber failed: {type(e).__name__}: {e}")
+
+
+_WATCHERS: Dict[Tuple[str, FrozenSet[str]], FsWatcher] = {}
+_WATCHERS_LOCK = threading.Lock()
+
+def watching_enabled() -> bool:
+    """Whether DEVTOOLS_WATCH asks for background watchers."""
+    return os.getenv("DEVTOOLS_WATCH", "0").strip().lower() in ("1", "true", "yes", "on")
+
+def native_events() -> bool:
+    """Whether watchers get OS change events (watchdog installed) rather than polling."""
+    return Observer is not None
+
+def get_watcher(root: str, ignore_dirs: Iterable[str] = ()) -> FsWatcher:
+    """The started, process-wide watcher for `root` (one per root and ignore set)."""
+    interval = float(os.getenv("DEVTOOLS_WATCH_INTERVAL", "1.0"))
+    key = (os.path.realpath(root), frozenset(ignore_dirs))
+    with _WATCHERS_LOCK:
+        watcher = _WATCHERS.get(key)
+        if watcher is None:
+            watcher = _WATCHERS[key] = FsWatcher(root, ignore_dirs, interval)
+        watcher.start()
+    return watcher
@@ -0,0 +1,33 @@
+from typing import Callable, List, Optional
+import asyncio
+
+from google.adk.tools.base_toolset import BaseToolset
+
+
+class LazyToolset(BaseToolset):
+    """
+    Stand-in for a toolset that is expensive to build (a Toolbox client, an MCP
+    server launched through Docker, ...). `factory` runs on the first `get_tools`
+    call, i.e. the first time the agent actually needs the tools, and the toolset
+    it returns is kept for the rest of the process.
+    """
+
+    def __init__(self, factory: Callable[[], BaseToolset]):
+        super().__init__()
+        self._factory = factory
+        self._toolset: Optional[BaseToolset] = None
+        self._lock = asyncio.Lock()
+
+    async def _get(self) -> BaseToolset:
+        if self._toolset is None:
+            async with self._lock:
+                if self._toolset is None:
+                    self._toolset = self._factory()
+        return self._toolset
+
+    async def get_tools(self, readonly_context=None) -> List:
+        return await (await self._get()).get_tools(readonly_context)
+
+    async def close(self) -> None:
+        if self._toolset is not None:
+            await self._toolset.close()
@@ -1,9 +1,15 @@
 # VISION/tools/fileEditor.py | Need to Integrate with DevTools App
 from google.adk.tools.tool_context import ToolContext
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterator, Optional, List
+import base64
+import codecs
+import mmap
 import os
 import json
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from .custom_utils.fs_watcher import get_watcher, native_events, watching_enabled
 
 """
 File Editor Tool for ADK Agent
@@ -13,6 +19,21 @@ Provides read/write access to local repository files.
 # Get the repository root (parent of VISION folder)
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Recursive listings are cached while a DEVTOOLS_WATCH watcher reports no change under REPO_ROOT.
+# The listing walk descends into every directory, so its watcher must not skip any of them.
+_LISTING_CACHE: Dict[tuple, tuple] = {}  # (abs_path, include_hidden) -> (watcher generation, contents)
+_LISTING_CACHE_LOCK = threading.Lock()
+
+def _listing_watcher():
+    """The REPO_ROOT watcher when DEVTOOLS_WATCH is on and watchdog is installed, else None."""
+    if not watching_enabled() or not native_events():
+        return None  # polling the whole repository would cost more than the listings it saves
+    try:
+        watcher = get_watcher(REPO_ROOT)
+    except OSError:
+        return None
+    return watcher if watcher.backend == "watchdog" else None
+
 def _is_safe_path(file_path: str) -> tuple[bool, str]:
     """
     Validate that the file path is within the repository bounds.
@@ -38,19 +59,109 @@ def _is_safe_path(file_path: str) -> tuple[bool, str]:
         return False, ""
 
 
+_SNIFF_BYTES = 8192           # binary detection looks at this much of the file, never more
+_SCAN_CHUNK = 1 << 20         # newline counting step when skipping to a line
+READ_MAX_BYTES = 256 * 1024   # default cap on the content returned by one read_file call
+
+
+@contextmanager
+def _mapped(abs_path: str) -> Iterator:
+    """Read-only mmap of the file (plain b"" when it is empty, which mmap refuses)."""
+    with open(abs_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def _is_binary(buf) -> bool:
+    """NUL bytes or invalid UTF-8 in the first _SNIFF_BYTES."""
+    head = buf[:_SNIFF_BYTES]
+    if b"\0" in head:
+        return True
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=len(buf) <= _SNIFF_BYTES)
+        return False
+    except UnicodeDecodeError:
+        return True
+
+
+def _line_offset(buf, line: int) -> int:
+    """Byte offset where 1-based `line` starts, or -1 past the end of the file."""
+    pos, skip = 0, line - 1
+    while skip > 0:
+        chunk = buf[pos:pos + _SCAN_CHUNK]
+        if not chunk:
+            return -1
+        count = chunk.count(b"\n")
+        if count < skip:
+            skip -= count
+            pos += len(chunk)
+            continue
+        idx = -1
+        for _ in range(skip):
+            idx = chunk.find(b"\n", idx + 1)
+        return pos + idx + 1 if pos + idx + 1 < len(buf) else -1
+    return 0
+
+
+def _take_lines(buf, begin: int, count: Optional[int], max_bytes: int) -> tuple:
+    """(end offset, lines taken, truncated) reading whole lines from `begin`."""
+    pos, taken, limit, size = begin, 0, begin + max_bytes, len(buf)
+    while pos < size and (count is None or taken < count):
+        nl = buf.find(b"\n", pos)
+        stop = size if nl < 0 else nl + 1
+        if stop > limit:
+            return (limit, taken + 1, True) if taken == 0 else (pos, taken, True)  # one giant line is cut
+        pos, taken = stop, taken + 1
+    return pos, taken, False
+
+
+def _tail_offset(buf, lines: int) -> int:
+    """Byte offset where the last `lines` lines start."""
+    end = len(buf)
+    if end and buf[end - 1:end] == b"\n":
+        end -= 1
+    pos = end
+    for _ in range(lines):
+        pos = buf.rfind(b"\n", 0, pos)
+        if pos < 0:
+            return 0
+    return pos + 1
+
+
 def read_file(
     file_path: str,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    tail_lines: Optional[int] = None,
+    byte_offset: Optional[int] = None,
+    byte_length: Optional[int] = None,
+    max_bytes: int = READ_MAX_BYTES,
     tool_context: ToolContext = None
 ) -> Dict[str, Any]:
     """
-    Read the contents of a file in the repository.
+    Read the contents of a file in the repository, or one slice of it.
+
+    Without a range the whole file is returned when it fits in `max_bytes`; otherwise the
+    first `max_bytes` (whole lines) come back with `truncated` and `next_line` /
+    `next_byte_offset` to continue from. Large files are memory-mapped, so only the
+    requested slice is ever read.
 
     Args:
         file_path: Relative path to the file from repository root
+        start_line: First line to return (1-based)
+        end_line: Last line to return (inclusive); defaults to as many as fit in max_bytes
+        tail_lines: Return the last N lines instead (e.g. for logs)
+        byte_offset: Start of a byte range; negative counts from the end of the file
+        byte_length: Length of the byte range (capped at max_bytes)
+        max_bytes: Upper bound on the content returned
         tool_context: Tool context (optional for session actions)
 
     Returns:
-        Dict with file contents, encoding info, and status
+        Dict with file contents, encoding info, and status; binary files are only
+        described unless a byte range is asked for (then returned base64-encoded)
     """
     try:
         is_safe, abs_path = _is_safe_path(file_path)
@@ -75,30 +186,87 @@ def read_file(
                 "error": f"Not a file: {file_path}",
                 "content": None
             }
-        
-        # Try to read as text first
-        try:
-            with open(abs_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            encoding = 'utf-8'
-        except UnicodeDecodeError:
-            # If not text, read as binary
-            with open(abs_path, 'rb') as f:
-                content = f.read()
-            encoding = 'binary'
-            content = f"<binary file, {len(content)} bytes>"
-        
-        file_size = os.path.getsize(abs_path)
-        
-        return {
-            "success": True,
-            "content": content,
-            "file_path": file_path,
-            "absolute_path": abs_path,
-            "encoding": encoding,
-            "size_bytes": file_size,
-            "message": f"Successfully read file: {file_path}"
-        }
+
+        line_mode = start_line is not None or end_line is not None
+        byte_mode = byte_offset is not None or byte_length is not None
+        if line_mode + byte_mode + (tail_lines is not None) > 1:
+            return {
+                "success": False,
+                "error": "Use only one of start_line/end_line, tail_lines or byte_offset/byte_length",
+                "content": None
+            }
+        max_bytes = max(1, max_bytes)
+
+        with _mapped(abs_path) as buf:
+            file_size = len(buf)
+            binary = _is_binary(buf)
+            result = {
+                "success": True,
+                "file_path": file_path,
+                "absolute_path": abs_path,
+                "encoding": "binary" if binary else "utf-8",
+                "size_bytes": file_size,
+                "truncated": False,
+            }
+
+            if byte_mode:
+                begin = byte_offset or 0
+                if begin < 0:
+                    begin = max(0, file_size + begin)
+                length = min(max_bytes, byte_length if byte_length is not None else max_bytes)
+                end = min(file_size, begin + max(0, length))
+                data = buf[begin:end]
+                if binary:
+                    result["content"] = base64.b64encode(data).decode("ascii")
+                    result["encoding"] = "base64"
+                else:
+                    result["content"] = data.decode("utf-8", errors="replace")
+                result["byte_range"] = [begin, end]
+                if end < file_size and (byte_length is None or byte_length > length):
+                    result["truncated"] = True
+                if end < file_size:
+                    result["next_byte_offset"] = end
+                result["message"] = f"Read bytes {begin}-{end} of {file_path}"
+                return result
+
+            if binary:
+                result["content"] = f"<binary file, {file_size} bytes>"
+                result["message"] = f"Successfully read file: {file_path}"
+                return result
+
+            if tail_lines is not None:
+                begin = _tail_offset(buf, max(1, tail_lines))
+                if file_size - begin > max_bytes:  # keep the newest lines that fit
+                    cut = buf.find(b"\n", file_size - max_bytes)
+                    begin = cut + 1 if 0 <= cut < file_size - 1 else file_size - max_bytes
+                    result["truncated"] = True
+                result["content"] = buf[begin:].decode("utf-8", errors="replace")
+                result["byte_range"] = [begin, file_size]
+                result["message"] = f"Read the end of file: {file_path}"
+                return result
+
+            first = max(1, start_line or 1)
+            begin = _line_offset(buf, first)
+            if begin < 0:
+                return {
+                    "success": False,
+                    "error": f"{file_path} has fewer than {first} lines",
+                    "content": None,
+                    "size_bytes": file_size
+                }
+            count = None if end_line is None else max(0, end_line - first + 1)
+            end, taken, truncated = _take_lines(buf, begin, count, max_bytes)
+            result["content"] = buf[begin:end].decode("utf-8", errors="replace")
+            result["truncated"] = truncated or (count is None and end < file_size)
+            if line_mode or end < file_size:
+                result["start_line"] = first
+                result["end_line"] = first + taken - 1
+            if end < file_size:
+                if buf[end - 1:end] == b"\n":  # not when a single long line was cut
+                    result["next_line"] = first + taken
+                result["next_byte_offset"] = end
+            result["message"] = f"Successfully read file: {file_path}"
+            return result
         
     except Exception as e:
         return {
@@ -108,6 +276,34 @@ def read_file(
         }
 
 
+def iter_file_chunks(
+    file_path: str,
+    chunk_size: int = 1 << 20,
+    byte_offset: int = 0,
+    byte_length: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Stream a repository file (or a byte range of it) in `chunk_size` pieces from a
+    memory map, for callers that process big logs or dumps without loading them.
+
+    Raises:
+        PermissionError: the path is outside the repository
+        FileNotFoundError: the file does not exist
+    """
+    is_safe, abs_path = _is_safe_path(file_path)
+    if not is_safe:
+        raise PermissionError(f"Access denied: Path '{file_path}' is outside repository bounds")
+    if not os.path.isfile(abs_path):
+        raise FileNotFoundError(f"File not found: {file_path}")
+    with _mapped(abs_path) as buf:
+        pos = max(0, byte_offset if byte_offset >= 0 else len(buf) + byte_offset)
+        end = len(buf) if byte_length is None else min(len(buf), pos + byte_length)
+        while pos < end:
+            stop = min(end, pos + max(1, chunk_size))
+            yield buf[pos:stop]
+            pos = stop
+
+
 def write_file(
     file_path: str,
     content: str,
@@ -267,6 +463,23 @@ def list_directory(
         
         contents = []
         
+        watcher = _listing_watcher() if recursive else None
+        cache_key = (abs_path, include_hidden)
+        if watcher is not None:
+            with _LISTING_CACHE_LOCK:
+                cached = _LISTING_CACHE.get(cache_key)
+            if cached is not None and cached[0] == watcher.generation:
+                contents = [dict(item) for item in cached[1]]
+                return {
+                    "success": True,
+                    "directory": dir_path,
+                    "absolute_path": abs_path,
+                    "contents": contents,
+                    "count": len(contents),
+                    "message": f"Successfully listed directory: {dir_path}"
+                }
+            generation = watcher.generation  # read before walking so changes during the walk invalidate it
+
         if recursive:
             # Recursive listing
             for root, dirs, files in os.walk(abs_path):
@@ -299,6 +512,9 @@ def list_directory(
                         "type": "file",
                         "size_bytes": size
                     })
+            if watcher is not None:
+                with _LISTING_CACHE_LOCK:
+                    _LISTING_CACHE[cache_key] = (generation, [dict(item) for item in contents])
         else:
             # Non-recursive listing
             items = os.listdir(abs_path)
@@ -0,0 +1,472 @@
+# DevTools/git_tools.py
+"""
+Function source, project index and function-level diffs at any git revision,
+read straight from the object store without a checkout. All objects go through
+one long-lived `git cat-file --batch` process per repository; revision indexes
+are cached by the tree hash of BASE_PATH and parsed blobs are shared between them.
+"""
+from __future__ import annotations
+import ast
+import atexit
+import difflib
+import hashlib
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from google.adk.tools.tool_context import ToolContext
+from .code_parser_tools import (
+    _EXCLUDE_DIRS, _FileEntry, _ProjectIndex, _CHARS_PER_TOKEN, _EXTRACT_MODES,
+    _fit_to_budget, _gather_defs, _index_source, _refreshed_index, _resolve_record_helpers,
+    _skeleton_source, _to_module_qualname,
+)
+
+_REVISION_CACHE_SIZE = int(os.getenv("DEVTOOLS_REVISION_INDEXES", "8"))  # revision indexes kept in memory
+_BLOB_CACHE_SIZE = 50_000  # parsed blobs shared across revisions
+_DEFAULT_MAX_DIFF_LINES = 200
+
+
+class _GitCatFile:
+    """A `git cat-file --batch` process, restarted if it dies; one request at a time."""
+
+    def __init__(self, repo: str):
+        self.repo = repo
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> subprocess.Popen:
+        self._proc = subprocess.Popen(
+            ["git", "-C", self.repo, "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        return self._proc
+
+    def read(self, spec: str) -> Optional[Tuple[str, str, bytes]]:
+        """(object id, type, content) for an object name like 'HEAD:app/views.py', or None if missing."""
+        if not spec or any(ch.isspace() for ch in spec):
+            raise ValueError(f"Invalid git object name: {spec!r}")
+        with self._lock:
+            for attempt in (0, 1):
+                proc = self._proc if self._proc is not None and self._proc.poll() is None else self._start()
+                try:
+                    proc.stdin.write(spec.encode("utf-8") + b"\n")
+                    proc.stdin.flush()
+                    header = proc.stdout.readline()
+                    if not header:
+                        raise BrokenPipeError("git cat-file exited")
+                    parts = header.split()
+                    if len(parts) != 3:  # '<name> missing' / '<name> ambiguous'
+                        return None
+                    data = proc.stdout.read(int(parts[2]))
+                    proc.stdout.read(1)  # trailing LF
+                    return parts[0].decode(), parts[1].decode(), data
+                except (OSError, ValueError):
+                    self.close()
+                    if attempt:
+                        raise
+        return None
+
+    def close(self) -> None:
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self._proc.kill()
+            self._proc = None
+
+
+_CAT_FILES: Dict[str, _GitCatFile] = {}
+_REPO_ROOTS: Dict[str, Tuple[str, str]] = {}  # base path -> (repo toplevel, base path relative to it)
+_GIT_LOCK = threading.Lock()
+
+@atexit.register
+def _close_cat_files() -> None:
+    for cat in _CAT_FILES.values():
+        cat.close()
+
+def _repo_for(base: Path) -> Tuple[_GitCatFile, str]:
+    """(cat-file process, BASE_PATH relative to the repository root as 'a/b/' or '')."""
+    with _GIT_LOCK:
+        root = _REPO_ROOTS.get(str(base))
+        if root is None:
+            out = subprocess.run(
+                ["git", "-C", str(base), "rev-parse", "--show-toplevel"],
+                capture_output=True, text=True,
+            )
+            if out.returncode != 0:
+                raise ValueError(f"{base} is not inside a git repository: {out.stderr.strip()}")
+            top = Path(out.stdout.strip()).resolve()
+            prefix = base.relative_to(top).as_posix()
+            root = _REPO_ROOTS[str(base)] = (str(top), f"{prefix}/" if prefix != "." else "")
+        cat = _CAT_FILES.get(root[0])
+        if cat is None:
+            cat = _CAT_FILES[root[0]] = _GitCatFile(root[0])
+    return cat, root[1]
+
+def _parse_tree(data: bytes) -> Iterator[Tuple[bytes, str, str]]:
+    """(mode, name, object id) of each entry of a raw tree object."""
+    i = 0
+    while i < len(data):
+        space = data.index(b" ", i)
+        nul = data.index(b"\0", space)
+        yield data[i:space], data[space + 1 : nul].decode("utf-8", "surrogateescape"), data[nul + 1 : nul + 21].hex()
+        i = nul + 21
+
+def _git_blob_id(raw: bytes) -> str:
+    """Object id git would give `raw`, so working-tree files compare against blobs."""
+    return hashlib.sha1(b"blob %d\0" % len(raw) + raw).hexdigest()
+
+
+class _RevisionIndex(_ProjectIndex):
+    """A `_ProjectIndex` over the .py blobs of BASE_PATH at one commit (never refreshed)."""
+
+    def __init__(self, base_path: Path, tree: str, files: Dict[str, _FileEntry],
+                 blob_ids: Dict[str, str], cat: _GitCatFile):
+        super().__init__(base_path, files=files)
+        self.tree = tree
+        self.blob_ids = blob_ids   # file path (as in the working tree) -> blob id
+        self._cat = cat
+        self._rebuild_lookups()
+
+    def source(self, path: str) -> str:
+        obj = self._cat.read(self.blob_ids[path])
+        if obj is None:
+            raise ValueError(f"Blob for {path} missing from tree {self.tree[:12]}")
+        return obj[2].decode("utf-8", "replace")
+
+
+_REVISIONS: "OrderedDict[Tuple[str, str], _RevisionIndex]" = OrderedDict()  # (base, tree id) -> index
+_BLOB_ENTRIES: "OrderedDict[Tuple[str, str, str], _FileEntry]" = OrderedDict()   # (base, file path, blob id) -> entry; module names depend on base
+_REVISIONS_LOCK = threading.Lock()
+
+def _list_py_blobs(cat: _GitCatFile, tree: str, base: Path) -> Dict[str, str]:
+    blobs: Dict[str, str] = {}
+    stack = [(tree, base)]
+    while stack:
+        oid, directory = stack.pop()
+        obj = cat.read(oid)
+        if obj is None or obj[1] != "tree":
+            continue
+        for mode, name, child in _parse_tree(obj[2]):
+            if mode == b"40000":
+                if name not in _EXCLUDE_DIRS:
+                    stack.append((child, directory / name))
+            elif mode in (b"100644", b"100755") and name.endswith(".py"):
+                blobs[str(directory / name)] = child
+    return blobs
+
+def _revision_index(base_path: str | Path, rev: str) -> Tuple[_RevisionIndex, str]:
+    """
+    (index of BASE_PATH at `rev`, commit id) for a branch, tag, sha, 'HEAD~3', ...
+    Indexes are cached by tree id, so commits that leave BASE_PATH unchanged share one.
+    """
+    base = Path(base_path).resolve()
+    cat, prefix = _repo_for(base)
+    commit = cat.read(f"{rev}^{{commit}}")
+    if commit is None:
+        raise ValueError(f"Unknown revision: {rev!r}")
+    tree = cat.read(f"{commit[0]}:{prefix}") if prefix else cat.read(f"{commit[0]}^{{tree}}")
+    if tree is None or tree[1] != "tree":
+        raise ValueError(f"{prefix or 'The project root'} does not exist at {rev}")
+
+    key = (str(base), tree[0])
+    with _REVISIONS_LOCK:
+        index = _REVISIONS.get(key)
+        if index is not None:
+            _REVISIONS.move_to_end(key)
+            return index, commit[0]
+
+    blob_ids = _list_py_blobs(cat, tree[0], base)
+    files: Dict[str, _FileEntry] = {}
+    for path, oid in blob_ids.items():
+        with _REVISIONS_LOCK:
+            entry = _BLOB_ENTRIES.get((str(base), path, oid))
+        if entry is None:
+            obj = cat.read(oid)
+            if obj is None:
+                continue
+            entry, _ = _index_source(path, 0, len(obj[2]), oid, _to_module_qualname(base, Path(path)), obj[2],
+                                     with_symbols=False)
+            with _REVISIONS_LOCK:
+                _BLOB_ENTRIES[(str(base), path, oid)] = entry
+                while len(_BLOB_ENTRIES) > _BLOB_CACHE_SIZE:
+                    _BLOB_ENTRIES.popitem(last=False)
+        files[path] = entry
+
+    index = _RevisionIndex(base, tree[0], files, blob_ids, cat)
+    with _REVISIONS_LOCK:
+        _REVISIONS[key] = index
+        while len(_REVISIONS) > _REVISION_CACHE_SIZE:
+            _REVISIONS.popitem(last=False)
+    return index, commit[0]
+
+
+def extract_function_at_revision(
+    function_path: str,
+    rev: str,
+    base_path: str | Path,
+    include_helpers: bool = False,
+    aggressive_fallback: bool = False,
+    mode: str = "full",
+    max_tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    `extract_function_source_ast` for the source as of `rev`: helpers are resolved
+    against the project as it was at that commit. `mode`/`max_tokens` as there.
+    """
+    if mode not in _EXTRACT_MODES:
+        raise ValueError(f"mode must be one of {_EXTRACT_MODES}, got {mode!r}")
+    index, commit = _revision_index(base_path, rev)
+    rec = index.by_mod_func.get(function_path)
+    if rec is None:
+        raise ValueError(f"Function '{function_path}' not found at {rev} ({commit[:12]})")
+    path = index.paths[rec.path_id]
+    src_lines = index.source(path).splitlines()
+    code = "\n".join(src_lines[rec.start - 1 : rec.end])
+    if mode == "skeleton" or (mode == "auto" and max_tokens and len(code) > max_tokens * _CHARS_PER_TOKEN):
+        mode = "skeleton"
+        defs, _ = _gather_defs(ast.parse("\n".join(src_lines)))
+        code = _skeleton_source(src_lines, defs[rec.qualname])
+    else:
+        mode = "full"
+
+    result = {
+        "code": f"# Extracted from {Path(path).name}@{commit[:12]}:{rec.start}-{rec.end}\n{code}",
+        "start_line": rec.start,
+        "end_line": rec.end,
+        "function": function_path,
+        "file": path,
+        "rev": rev,
+        "commit": commit,
+        "helpers": _resolve_record_helpers(index, rec, aggressive_fallback) if include_helpers else [],
+        "mode": mode,
+    }
+    if max_tokens:
+        result = _fit_to_budget(result, max_tokens, contiguous=mode == "full")
+    return result
+
+
+def _worktree_changes(base: Path, commit: str) -> Set[str]:
+    """Paths under BASE_PATH whose working-tree content differs from `commit`, untracked (not ignored) files included."""
+    paths: Set[str] = set()
+    for args in (["diff", "--name-only", "--relative", "-z", commit, "--", "."],
+                 ["ls-files", "--others", "--exclude-standard", "-z", "--", "."]):
+        out = subprocess.run(["git", "-C", str(base), *args], capture_output=True)
+        if out.returncode != 0:
+            raise ValueError(f"git {args[0]} failed: {out.stderr.decode('utf-8', 'replace').strip()}")
+        paths.update(str(base / name) for name in out.stdout.decode("utf-8", "surrogateescape").split("\0") if name)
+    return paths
+
+def _function_spans(entry: Optional[_FileEntry]) -> Dict[str, Tuple[int, int]]:
+    return {q: (start, end) for q, start, end, _ in (entry.funcs if entry else ())}
+
+def _enclosing(qualname: str, spans: Dict[str, Tuple[int, int]]) -> List[str]:
+    """The functions of `spans` that `qualname` is nested in, innermost first."""
+    parts = qualname.split(".")
+    return [q for q in (".".join(parts[:i]) for i in range(len(parts) - 1, 0, -1)) if q in spans]
+
+def _own_lines(lines: List[str], spans: Dict[str, Tuple[int, int]], qualname: str,
+               nested: Dict[str, List[str]]) -> List[str]:
+    """A function's lines without those of the defs nested in it."""
+    if qualname not in spans:
+        return []
+    start, end = spans[qualname]
+    covered = bytearray(end - start + 1)
+    for q in nested.get(qualname, ()):
+        s, e = spans[q]
+        covered[s - start : e - start + 1] = b"\1" * (e - s + 1)
+    return [line for i, line in enumerate(lines[start - 1 : end]) if not covered[i]]
+
+def _module_level(lines: List[str], spans: Dict[str, Tuple[int, int]]) -> List[str]:
+    """Lines outside every function (imports, constants, urlpatterns, class attributes)."""
+    covered = bytearray(len(lines) + 1)
+    for start, end in spans.values():
+        covered[start - 1 : end] = b"\1" * (end - start + 1)
+    return [line for i, line in enumerate(lines) if not covered[i]]
+
+def _normalized(lines: List[str]) -> List[str]:
+    return [line.rstrip() for line in lines if line.strip()]
+
+def diff_functions(
+    base_path: str | Path,
+    rev_a: str,
+    rev_b: Optional[str] = None,
+    path_prefix: Optional[str] = None,
+    context_lines: int = 3,
+    max_functions: int = 50,
+    max_diff_lines: int = _DEFAULT_MAX_DIFF_LINES,
+) -> Dict[str, Any]:
+    """
+    Function-level diff of the project between `rev_a` and `rev_b` (None: the
+    working tree, limited to the paths `git diff` and untracked files report).
+    Files whose blob is identical are skipped without parsing; for the others
+    each function is reported as added, removed or modified (with a unified
+    diff), and module-level code changes as the module itself. A function
+    counts as modified only when its own lines changed, not those of a def
+    nested in it, and defs inside an added or removed function are not listed
+    on their own.
+    """
+    base = Path(base_path).resolve()
+    a, commit_a = _revision_index(base, rev_a)
+    commit_b: Optional[str] = None
+    worktree_changes: Optional[Set[str]] = None
+    if rev_b is None:
+        worktree_changes = _worktree_changes(base, commit_a)
+        b: _ProjectIndex = _refreshed_index(str(base))
+        with b.lock:
+            b_files = dict(b.files)
+    else:
+        b, commit_b = _revision_index(base, rev_b)
+        b_files = b.files
+
+    def blob_id(path: str) -> Optional[str]:
+        if isinstance(b, _RevisionIndex):
+            return b.blob_ids.get(path)
+        try:
+            return _git_blob_id(Path(path).read_bytes())
+        except OSError:
+            return None
+
+    def source_b(path: str) -> str:
+        if isinstance(b, _RevisionIndex):
+            return b.source(path)
+        return Path(path).read_text(encoding="utf-8", errors="replace")
+
+    prefix = (base / path_prefix).parts if path_prefix else None
+    changed_files = []
+    candidate_paths = set(a.files) | set(b_files)
+    if worktree_changes is not None:
+        candidate_paths &= worktree_changes
+    for path in sorted(candidate_paths):
+        if prefix and Path(path).parts[: len(prefix)] != prefix:  # whole components: Inventory/ is not InventoryOld/
+            continue
+        if path in a.files and path in b_files and a.blob_ids.get(path) == blob_id(path):
+            continue
+        changed_files.append(path)
+
+    label_b = rev_b or "worktree"
+    functions: List[Dict[str, Any]] = []
+    truncated = False
+    for path in changed_files:
+        entry_a, entry_b = a.files.get(path), b_files.get(path)
+        lines_a = a.source(path).splitlines() if entry_a else []
+        lines_b = source_b(path).splitlines() if entry_b else []
+        spans_a, spans_b = _function_spans(entry_a), _function_spans(entry_b)
+        module = (entry_b or entry_a).module
+        nested_a: Dict[str, List[str]] = {}
+        nested_b: Dict[str, List[str]] = {}
+        for spans, nested in ((spans_a, nested_a), (spans_b, nested_b)):
+            for q in spans:
+                for outer in _enclosing(q, spans):
+                    nested.setdefault(outer, []).append(q)
+        added_or_removed, all_spans = set(spans_a) ^ set(spans_b), {**spans_a, **spans_b}
+
+        candidates = [("", _module_level(lines_a, spans_a), _module_level(lines_b, spans_b), True)]
+        for q in sorted(set(spans_a) | set(spans_b)):
+            if any(outer in added_or_removed for outer in _enclosing(q, all_spans)):
+                continue  # shown by the enclosing function's diff
+            old = lines_a[spans_a[q][0] - 1 : spans_a[q][1]] if q in spans_a else []
+            new = lines_b[spans_b[q][0] - 1 : spans_b[q][1]] if q in spans_b else []
+            own_changed = _normalized(_own_lines(lines_a, spans_a, q, nested_a)) != _normalized(
+                _own_lines(lines_b, spans_b, q, nested_b))
+            candidates.append((q, old, new, own_changed))
+
+        for q, old, new, own_changed in candidates:
+            if not own_changed or _normalized(old) == _normalized(new):  # only blank lines / trailing whitespace moved
+                continue
+            if len(functions) >= max_functions:
+                truncated = True
+                break
+            dotted = f"{module}.{q}" if q else module
+            status = "added" if not old and q else "removed" if not new and q else "modified"
+            diff = list(difflib.unified_diff(
+                old, new, f"{dotted}@{rev_a}", f"{dotted}@{label_b}", n=context_lines, lineterm="",
+            ))
+            item = {
+                "function_path": dotted,
+                "kind": "function" if q else "module",
+                "status": status,
+                "file": path,
+                "diff": "\n".join(diff[:max_diff_lines]),
+            }
+            if len(diff) > max_diff_lines:
+                item["diff_truncated"] = True
+            functions.append(item)
+        if truncated:
+            break
+
+    return {
+        "rev_a": rev_a,
+        "commit_a": commit_a,
+        "rev_b": label_b,
+        "commit_b": commit_b,
+        "files_changed": len(changed_files),
+        "functions": functions,
+        "truncated": truncated,
+    }
+
+
+def extract_function_at_revision_tool(
+    function_path: str,
+    rev: str,
+    base_path: str,
+    tool_context: ToolContext,
+    include_helpers: bool = False,
+    mode: str = "full",
+    max_tokens: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Extract a function/method as it was at a git revision (branch, tag, commit
+    sha, 'HEAD~5'), without checking it out.
+
+    Args:
+        function_path: Dotted path, e.g. 'Inventory.views_pack.terminal.process_exe_data'.
+        rev: Git revision to read.
+        base_path: Project root directory (BASE_PATH), inside a git repository.
+        tool_context: Tool context (optional for session actions).
+        include_helpers: Also return helper function paths, resolved at that revision.
+        mode: "full", "skeleton" or "auto", as in `extract_function_source_tool`.
+        max_tokens: Approximate upper bound on the size of the reply.
+
+    Returns:
+        Dict with "code", "start_line", "end_line", "function", "file", "rev",
+        "commit", "helpers" and "mode", or {"error": str}.
+    """
+    try:
+        return extract_function_at_revision(function_path, rev, base_path, include_helpers,
+                                            mode=mode, max_tokens=max_tokens)
+    except (OSError, ValueError) as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+def diff_functions_tool(
+    base_path: str,
+    rev_a: str,
+    tool_context: ToolContext,
+    rev_b: Optional[str] = None,
+    path_prefix: Optional[str] = None,
+    max_functions: int = 50,
+) -> Dict[str, Any]:
+    """
+    Which functions changed between two git revisions (e.g. the last good deploy
+    tag and HEAD), each with a unified diff of just that function.
+
+    Args:
+        base_path: Project root directory (BASE_PATH), inside a git repository.
+        rev_a: Older revision, e.g. 'v1.4.2' or 'HEAD~10'.
+        tool_context: Tool context (optional for session actions).
+        rev_b: Newer revision; omit to compare against the current working tree.
+        path_prefix: Only files under this path relative to base_path, e.g. 'Inventory/'.
+        max_functions: Max changed functions returned.
+
+    Returns:
+        Dict with "rev_a", "commit_a", "rev_b", "commit_b", "files_changed",
+        "functions": [{"function_path", "kind", "status", "file", "diff"}] and "truncated",
+        or {"error": str}.
+    """
+    try:
+        return diff_functions(base_path, rev_a, rev_b, path_prefix, max_functions=max_functions)
+    except (OSError, ValueError) as e:
+        return {"error": f"{type(e).__name__}: {e}"}
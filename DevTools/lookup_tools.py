@@ -1,8 +1,10 @@
 # DevTools/lookup_tools.py
 from google.adk.tools.tool_context import ToolContext
 from urllib.parse import urlparse
-import re, importlib, os, requests
-from typing import Dict, Any
+import re, importlib, os, requests, threading, time
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Optional, Tuple
+from .code_parser_tools import _project_urlconfs, _refreshed_index, _lookup_method
 
 CONVERTERS = { # Django-like converters
     "str":  r"[^/]+",
@@ -20,40 +22,356 @@ def import_from_dotted(dotted: str):
     return getattr(m, attr)
 
 def get_all_urls():
-    BASE_URL = os.getenv("DJANGO_SERVER_URL", "http://127.0.0.1:8000")
-    BASE_URL = BASE_URL[:-1] if BASE_URL.endswith("/") else BASE_URL
-    response = requests.get(f"{BASE_URL}/list_all_urls/") # Temporary URL for testing
-    path_dict = response.json()
-    data = path_dict["routes"]
-    return data
+    return _active_route_table().routes()
 
-def django_to_regex(pattern: str) -> re.Pattern:
-    """Convert a Django-style path pattern into a compiled regex with named groups."""
+def _path_to_regex(pattern: str, group_prefix: str = "") -> str:
+    """Regex for a Django-style path pattern; param groups are named `group_prefix + name`."""
     def repl(m: re.Match) -> str:
         conv = m.group("conv") or "str"
         name = m.group("name")
         rx = CONVERTERS.get(conv, CONVERTERS["str"])
-        return f"(?P<{name}>{rx})"
+        return f"(?P<{group_prefix}{name}>{rx})"
+    return _param_re.sub(repl, pattern)
+
+def _django_to_regex_body(pattern: str, group_prefix: str = "") -> str:
+    """Regex body (no anchors, no trailing slash) for a Django-style path pattern."""
+    return _path_to_regex(pattern.rstrip("/"), group_prefix)
+
+def _route_regex_body(route: Dict[str, Any], group_prefix: str = "") -> str:
+    """Regex body of a route: its "regex" (re_path routes) if present, else its converted "url"."""
+    if route.get("regex"):
+        return re.sub(r"\(\?P<([a-zA-Z_][a-zA-Z0-9_]*)>", rf"(?P<{group_prefix}\1>", route["regex"].rstrip("/"))
+    return _django_to_regex_body(route["url"], group_prefix)
+
+def django_to_regex(pattern: str) -> re.Pattern:
+    """Convert a Django-style path pattern into a compiled regex with named groups."""
     # Normalize and allow optional trailing slash
-    body = _param_re.sub(repl, pattern.rstrip("/"))
+    body = _django_to_regex_body(pattern)
     return re.compile("^" + body + "/?$")
 
+_REGEX_META = set(".^$*+?{}[]\\|()<")
+
+# (?P=name), \1 (after an even run of backslashes) and (?(1)...) / (?(name)...) conditionals
+_BACKREF_RE = re.compile(r"\(\?P=|(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(")
+
+def _first_segment(path: str) -> str:
+    return path.lstrip("/").split("/", 1)[0]
+
+class _RouteMatcher:
+    """
+    Route table compiled once for fast lookups.
+
+    Routes are bucketed by their first path segment when it is a plain literal
+    ('inventory' in '/inventory/<int:id>/'); routes starting with a parameter
+    or regex syntax share a wildcard bucket. Each bucket is a single alternation
+    regex whose alternatives keep route order, so a lookup costs at most two
+    regex matches (own bucket + wildcard) and still returns the first matching
+    route like a linear scan would. re_path regexes with backreferences or
+    group conditionals would point at the wrong groups once renamed and
+    renumbered inside an alternation, so those are compiled on their own and
+    scanned linearly.
+    """
+
+    def __init__(self, routes: List[Dict[str, Any]]):
+        self.routes = routes
+        grouped: Dict[Optional[str], List[int]] = {}
+        self._linear: List[Tuple[int, re.Pattern]] = []
+        for i, route in enumerate(routes):
+            if route.get("regex") and _BACKREF_RE.search(route["regex"]):
+                self._linear.append((i, re.compile("^" + _route_regex_body(route) + "/?$")))
+                continue
+            seg = _first_segment(route.get("regex") or route["url"])
+            key = None if _REGEX_META.intersection(seg) else seg
+            grouped.setdefault(key, []).append(i)
+        self._buckets: Dict[Optional[str], Tuple[re.Pattern, Dict[int, Tuple[int, List[Tuple[str, str]]]]]] = {
+            key: self._compile(indices) for key, indices in grouped.items()
+        }
+
+    def _compile(self, indices: List[int]):
+        alternatives = []
+        for i in indices:
+            body = _route_regex_body(self.routes[i], group_prefix=f"_r{i}_")
+            alternatives.append(f"(?P<_r{i}>{body}/?$)")
+        rx = re.compile("^(?:" + "|".join(alternatives) + ")")
+        # wrapper group number -> (route index, [(group name, param name)])
+        lookup = {}
+        for i in indices:
+            prefix = f"_r{i}_"
+            params = [(g, g[len(prefix):]) for g in rx.groupindex if g.startswith(prefix)]
+            lookup[rx.groupindex[f"_r{i}"]] = (i, params)
+        return rx, lookup
+
+    def _match_bucket(self, key: Optional[str], path: str) -> Optional[Tuple[int, Dict[str, str]]]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return None
+        rx, lookup = bucket
+        m = rx.match(path)
+        if not m:
+            return None
+        # the wrapper group closes last, so lastindex identifies the matched route
+        i, params = lookup[m.lastindex]
+        return i, {name: m.group(group) for group, name in params}
+
+    def _match_linear(self, path: str) -> Optional[Tuple[int, Dict[str, str]]]:
+        for i, rx in self._linear:
+            m = rx.match(path)
+            if m:
+                return i, m.groupdict()
+        return None
+
+    def match(self, path: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, str]]]:
+        hits = [h for h in (self._match_bucket(_first_segment(path), path), self._match_bucket(None, path),
+                            self._match_linear(path)) if h]
+        if not hits:
+            return None, None
+        i, params = min(hits, key=lambda h: h[0])
+        return self.routes[i], params
+
+ROUTES_TTL = float(os.getenv("DJANGO_ROUTES_TTL", "300"))          # seconds a fetched table is fresh
+ROUTES_RETRY = float(os.getenv("DJANGO_ROUTES_RETRY", "30"))       # seconds between retries while the server is down
+ROUTES_TIMEOUT = float(os.getenv("DJANGO_ROUTES_TIMEOUT", "10"))   # per-request timeout
+
+class _RouteTable:
+    """
+    Route list of one Django server, fetched from /list_all_urls/ over a pooled
+    session and cached with a TTL. Stale tables are served while a background
+    thread revalidates them (If-None-Match / ETag), and the last good table keeps
+    being served when the server is unreachable. Only the very first fetch blocks.
+    """
+
+    def __init__(self, base_url: str, ttl: float = ROUTES_TTL, timeout: float = ROUTES_TIMEOUT):
+        self.url = f"{base_url}/list_all_urls/" # Temporary URL for testing
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.etag: Optional[str] = None
+        self.fetched_at = 0.0
+        self.failed_at = float("-inf")
+        self.last_error: Optional[str] = None
+        self._state: Optional[Tuple[List[Dict[str, Any]], _RouteMatcher]] = None  # (routes, matcher)
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _fetch(self) -> None:
+        headers = {"If-None-Match": self.etag} if self.etag and self._state else {}
+        response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            self.fetched_at = time.monotonic()
+            return
+        response.raise_for_status()
+        routes = response.json()["routes"]
+        self._state = (routes, _RouteMatcher(routes))
+        self.etag = response.headers.get("ETag")
+        self.fetched_at = time.monotonic()
+        self.last_error = None
+
+    def _background_refresh(self) -> None:
+        try:
+            self._fetch()
+        except (requests.RequestException, ValueError, KeyError) as e:
+            # keep serving the last good table; retry after ROUTES_RETRY rather than a full TTL
+            self.last_error = str(e)
+            self.fetched_at = time.monotonic() - max(0.0, self.ttl - ROUTES_RETRY)
+        finally:
+            self._refreshing = False
+
+    def _current(self) -> Tuple[List[Dict[str, Any]], _RouteMatcher]:
+        if self._state is None:
+            with self._lock:
+                if self._state is None:
+                    # nothing to serve yet: errors propagate to the caller (remembered for ROUTES_RETRY)
+                    if time.monotonic() - self.failed_at < ROUTES_RETRY:
+                        raise requests.ConnectionError(f"Route server unavailable: {self.last_error}")
+                    try:
+                        self._fetch()
+                    except (requests.RequestException, ValueError, KeyError) as e:
+                        self.failed_at, self.last_error = time.monotonic(), str(e)
+                        raise
+        elif time.monotonic() - self.fetched_at > self.ttl and not self._refreshing:
+            with self._lock:
+                if not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._background_refresh, daemon=True).start()
+        return self._state
+
+    def routes(self) -> List[Dict[str, Any]]:
+        return self._current()[0]
+
+    def matcher(self) -> _RouteMatcher:
+        return self._current()[1]
+
+_route_tables: Dict[str, _RouteTable] = {}
+_route_tables_lock = threading.Lock()
+
+def _get_route_table() -> _RouteTable:
+    BASE_URL = os.getenv("DJANGO_SERVER_URL", "http://127.0.0.1:8000")
+    BASE_URL = BASE_URL[:-1] if BASE_URL.endswith("/") else BASE_URL
+    with _route_tables_lock:
+        table = _route_tables.get(BASE_URL)
+        if table is None:
+            table = _route_tables[BASE_URL] = _RouteTable(BASE_URL)
+    return table
+
+ROUTES_SOURCE = os.getenv("DJANGO_ROUTES_SOURCE", "auto").lower()   # server | offline | auto
+ROUTES_RECHECK = float(os.getenv("DJANGO_ROUTES_RECHECK", "2"))    # min seconds between urls.py change checks
+
+def _join_route(parts: List[Tuple[str, bool]]) -> Dict[str, str]:
+    """Concatenate (pattern, is_regex) pieces of nested URLconfs into route "url" (+ "regex" if any piece is one)."""
+    url = "/" + "".join(p.lstrip("^").rstrip("$") if is_regex else p for p, is_regex in parts)
+    route = {"url": url}
+    if any(is_regex for _, is_regex in parts):
+        route["regex"] = "/" + "".join(p.lstrip("^").rstrip("$") if is_regex else _path_to_regex(p) for p, is_regex in parts)
+    return route
+
+def _static_routes(urlconfs: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Flatten statically parsed URLconfs (see `code_parser_tools._gather_urlpatterns`) into
+    the /list_all_urls/ route format, starting from DJANGO_ROOT_URLCONF, the settings'
+    ROOT_URLCONF, or else every URLconf that no other URLconf includes.
+    """
+    roots = [os.getenv("DJANGO_ROOT_URLCONF")] if os.getenv("DJANGO_ROOT_URLCONF") else []
+    roots = roots or sorted({c["root_urlconf"] for c in urlconfs.values() if c["root_urlconf"] in urlconfs})
+    if not roots:
+        included = {p[2] for c in urlconfs.values() for p in c["patterns"] if p[4]}
+        roots = sorted(m for m, c in urlconfs.items() if c["patterns"] and m not in included)
+
+    routes: List[Dict[str, Any]] = []
+
+    def walk(module: str, prefix: List[Tuple[str, bool]], namespaces: List[str], stack: frozenset) -> None:
+        conf = urlconfs.get(module)
+        if conf is None or module in stack:
+            return
+        for is_regex, pattern, target, name, is_include, namespace in conf["patterns"]:
+            parts = prefix + [(pattern, is_regex)]
+            if is_include:
+                ns = namespace or (urlconfs.get(target) or {}).get("app_name")
+                walk(target, parts, namespaces + [ns] if ns else namespaces, stack | {module})
+            else:
+                route = _join_route(parts)
+                route["module"] = target
+                route["name"] = ":".join(namespaces + [name]) if name else None
+                routes.append(route)
+
+    for root in roots:
+        walk(root, [], [], frozenset())
+    return routes
+
+class _OfflineRouteTable:
+    """
+    Route table built by statically parsing the project's urls.py files under
+    BASE_PATH, no running server needed. Rides on the code_parser_tools index,
+    so it is rebuilt only when an indexed file changed (checked at most every
+    ROUTES_RECHECK seconds).
+    """
+
+    def __init__(self, base_path: str):
+        self.base_path = base_path
+        self._version: Optional[int] = None
+        self._state: Optional[Tuple[List[Dict[str, Any]], _RouteMatcher]] = None
+        self._lock = threading.Lock()
+
+    def _current(self) -> Tuple[List[Dict[str, Any]], _RouteMatcher]:
+        with self._lock:
+            version, urlconfs = _project_urlconfs(self.base_path, max_age=ROUTES_RECHECK)
+            if version != self._version or self._state is None:
+                routes = _static_routes(urlconfs)
+                self._state, self._version = (routes, _RouteMatcher(routes)), version
+            return self._state
+
+    def routes(self) -> List[Dict[str, Any]]:
+        return self._current()[0]
+
+    def matcher(self) -> _RouteMatcher:
+        return self._current()[1]
+
+_offline_tables: Dict[str, _OfflineRouteTable] = {}
+
+def _get_offline_route_table() -> _OfflineRouteTable:
+    base_path = os.getenv("BASE_PATH")
+    if not base_path or not os.path.isdir(base_path):
+        raise ValueError(f"Offline route lookup needs BASE_PATH to point at the Django project, got {base_path!r}")
+    with _route_tables_lock:
+        table = _offline_tables.get(base_path)
+        if table is None:
+            table = _offline_tables[base_path] = _OfflineRouteTable(base_path)
+    return table
+
+def _active_route_table():
+    """Route table for DJANGO_ROUTES_SOURCE: the server's, the offline one, or (auto) the server's with offline fallback."""
+    if ROUTES_SOURCE != "offline":
+        table = _get_route_table()
+        try:
+            table.routes()
+            return table
+        except (requests.RequestException, ValueError, KeyError):
+            if ROUTES_SOURCE == "server":
+                raise
+    return _get_offline_route_table()
+
+def _normalize_path(url: str) -> str:
+    path = urlparse(url).path if "://" in url else url # Extract path (works for both absolute and relative inputs)
+    return re.sub(r"/{2,}", "/", path).rstrip("/") + "/" # Normalize: collapse multiple slashes and ensure one trailing slash for matching
+
+_VIEW_METHODS = ("get", "post", "put", "patch", "delete", "dispatch")
+
+class _ViewIndex:
+    """
+    The BASE_PATH code index for class-based view lookups, fetched on first use
+    only: function views (and servers without BASE_PATH) never touch it, and one
+    lookup or batch refreshes it at most once (and not at all within ROUTES_RECHECK
+    of the last refresh, e.g. by the offline route table or the watcher).
+    """
+
+    def __init__(self):
+        self._index = None
+        self._loaded = False
+
+    def get(self):
+        if not self._loaded:
+            self._loaded = True
+            base_path = os.getenv("BASE_PATH")
+            if base_path and os.path.isdir(base_path):
+                self._index = _refreshed_index(base_path, max_age=ROUTES_RECHECK)
+        return self._index
+
+def _normalize_module(module: Optional[str], views: Optional[_ViewIndex] = None) -> Dict[str, Any]:
+    """
+    Turn a route's "module" into `extract_function_source_tool` function paths:
+    'pkg.views:func' -> 'pkg.views.func', drops '.as_view()'. Class-based views
+    ('.as_view()' or a CapWords name) map to their HTTP handler methods found in the
+    BASE_PATH index ('pkg.views.StockView.get').
+    Returns {"function_path": str | None, "view_methods": [str]}.
+    """
+    if not module:
+        return {"function_path": None, "view_methods": []}
+    path = module.strip().replace(":", ".")
+    path, as_view = re.subn(r"\.as_view(\(\))?$", "", path)
+    methods: List[str] = []
+    if as_view or path.rpartition(".")[2][:1].isupper():
+        index = (views or _ViewIndex()).get()
+        if index is not None:
+            with index.lock:
+                if path in index.class_bases:
+                    found = (_lookup_method(path, m, index.by_mod_func, index.class_bases) for m in _VIEW_METHODS)
+                    methods = [m for m in found if m]
+    return {"function_path": methods[0] if methods else path, "view_methods": methods}
+
+def _match_url(matcher: "_RouteMatcher", url: str):
+    route, params = matcher.match(_normalize_path(url))
+    if route is None:
+        return None, None
+    route = {k: v for k, v in route.items() if k not in ("decorators", "regex")}
+    return route, params
+
 def find_route(url: str):
     """
     Match a URL (absolute or relative) against routes.
     Returns (route_dict, params_dict) or (None, None) if not found.
     """
-    routes = get_all_urls()
-    path = urlparse(url).path if "://" in url else url # Extract path (works for both absolute and relative inputs)
-    path = re.sub(r"/{2,}", "/", path).rstrip("/") + "/" # Normalize: collapse multiple slashes and ensure one trailing slash for matching
-    for route in routes:
-        rx = django_to_regex(route["url"])
-        m = rx.match(path)
-        if m:
-            if 'decorators' in route.keys():
-                del route['decorators']
-            return route, m.groupdict()
-    return None, None
+    return _match_url(_active_route_table().matcher(), url)
 
 def get_lookup_url(
     url: str,
@@ -67,8 +385,44 @@ def get_lookup_url(
         tool_context: Tool context (optional for session actions).
 
     Returns:
-        Dict with "route" key (matched route) and "parameters" key (extracted parameters).
+        Dict with "route" key (matched route) and "parameters" key (extracted parameters),
+        plus "function_path" ready for `extract_function_source_tool`.
     """
     matched_route, parameters = find_route(url)
+    if matched_route is None:
+        return {"url": url, "error": "No route matched this URL."}
     matched_route['parameters'] = parameters
+    matched_route.update(_normalize_module(matched_route.get("module")))
     return matched_route
+
+def get_lookup_urls(
+    urls: List[str],
+    tool_context: ToolContext
+) -> Dict[str, Any]:
+    """
+    Resolve many URLs (e.g. everything visible in a screenshot or log) in one call.
+
+    Args:
+        urls: Full or relative URLs to look up.
+        tool_context: Tool context (optional for session actions).
+
+    Returns:
+        Dict with "results": one entry per input URL, in order, either the matched
+        route ("url", "module", "name", "parameters", "function_path", "view_methods")
+        or an "error"; and "matched" / "unmatched" counts.
+    """
+    matcher = _active_route_table().matcher()  # one route table for the whole batch
+    views = _ViewIndex()  # and at most one index refresh
+    results: List[Dict[str, Any]] = []
+    normalized: Dict[str, Dict[str, Any]] = {}
+    for url in urls:
+        route, parameters = _match_url(matcher, url)
+        if route is None:
+            results.append({"input": url, "error": "No route matched this URL."})
+            continue
+        module = route.get("module")
+        if module not in normalized:
+            normalized[module] = _normalize_module(module, views)
+        results.append({"input": url, **route, "parameters": parameters, **normalized[module]})
+    matched = sum(1 for r in results if "error" not in r)
+    return {"results": results, "matched": matched, "unmatched": len(results) - matched}
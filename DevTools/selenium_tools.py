@@ -1,98 +1,839 @@
+import asyncio
+import atexit
+import bisect
+import difflib
+import io
+import json
 import os
+import shutil
+import tempfile
+import threading
 import time
 import warnings
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import selenium
-from google.adk.agents.llm_agent import Agent
-from google.adk.tools.load_artifacts_tool import load_artifacts_tool
+# from google.adk.agents.llm_agent import Agent  # only for the root_agent sketch at the bottom
+# from google.adk.tools.load_artifacts_tool import load_artifacts_tool
 from google.adk.tools.tool_context import ToolContext
 from google.genai import types
-from PIL import Image
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
 DISABLE_WEB_DRIVER = int(os.getenv("DISABLE_WEB_DRIVER", "0"))
-if not DISABLE_WEB_DRIVER:
+POOL_SIZE = int(os.getenv("SELENIUM_POOL_SIZE", "2"))                # max browsers alive at once
+POOL_WARM = int(os.getenv("SELENIUM_POOL_WARM", "1"))                # spare browsers kept started after first use
+MAX_NAVIGATIONS = int(os.getenv("SELENIUM_MAX_NAVIGATIONS", "100"))  # restart a browser after this many page loads
+LEASE_TTL = float(os.getenv("SELENIUM_LEASE_TTL", "600"))            # idle seconds before a session's browser can be reclaimed
+ACQUIRE_TIMEOUT = float(os.getenv("SELENIUM_ACQUIRE_TIMEOUT", "60"))
+HEADLESS = int(os.getenv("SELENIUM_HEADLESS", "1"))
+SCREENSHOT_FORMAT = os.getenv("SCREENSHOT_FORMAT", "webp")               # webp | jpeg | png
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY", "80"))
+SCREENSHOT_MAX_WIDTH = int(os.getenv("SCREENSHOT_MAX_WIDTH", "1280"))  # 0 keeps the full resolution
+PAGE_OUTLINE_MAX_CHARS = int(os.getenv("PAGE_OUTLINE_MAX_CHARS", "20000"))  # size budget of get_page_source outlines
+WAIT_TIMEOUT = float(os.getenv("SELENIUM_WAIT_TIMEOUT", "15"))        # default seconds for wait conditions
+NETWORK_IDLE_MS = int(os.getenv("SELENIUM_NETWORK_IDLE_MS", "500"))   # quiet period that counts as network idle
+CAPTURE = int(os.getenv("SELENIUM_CAPTURE", "1"))                     # record network / console activity
+CAPTURE_REQUESTS = int(os.getenv("SELENIUM_CAPTURE_REQUESTS", "500"))  # requests kept per browser
+CAPTURE_CONSOLE = int(os.getenv("SELENIUM_CAPTURE_CONSOLE", "200"))    # console messages kept per browser
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+class _ActivityLog:
+    """
+    Bounded record of one browser's network requests (CDP Network.* events read from
+    Chrome's performance log) and console messages (its browser log). `pump` drains
+    both logs from the driver; it runs on the driver's thread after every tool call.
+    """
+
+    def __init__(self, max_requests: int = CAPTURE_REQUESTS, max_console: int = CAPTURE_CONSOLE):
+        self.enabled = bool(CAPTURE)
+        self.max_requests = max(1, max_requests)
+        self.requests: "OrderedDict[str, dict]" = OrderedDict()
+        self.console: deque = deque(maxlen=max(1, max_console))
+        self.navigation = 0
+        self.navigated_at: List[float] = []  # wall ms of each main-frame navigation, for console entries
+        self.dropped = 0
+
+    def pump(self, driver) -> None:
+        if not self.enabled:
+            return
+        try:
+            performance = driver.get_log("performance")
+            browser = driver.get_log("browser")
+        except WebDriverException as e:
+            if _browser_lost(e):
+                raise
+            self.enabled = False  # the driver was started without logging prefs
+            return
+        for entry in performance:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            self._network(message.get("method", ""), message.get("params") or {}, entry.get("timestamp", 0))
+        for entry in browser:
+            at = float(entry.get("timestamp", 0))
+            self.console.append({
+                "level": entry.get("level", ""),
+                "source": entry.get("source", ""),
+                "message": _clip(entry.get("message", ""), 500),
+                "navigation": bisect.bisect_right(self.navigated_at, at),
+            })
+
+    def _network(self, method: str, params: dict, at: float) -> None:
+        if method == "Page.frameNavigated":
+            frame = params.get("frame") or {}
+            if not frame.get("parentId"):  # main frame only
+                self.navigation += 1
+                self.navigated_at.append(float(at))
+                document = self.requests.get(frame.get("loaderId", ""))
+                if document is not None:  # the main document's requestId is its loaderId
+                    document["navigation"] = self.navigation
+            return
+        if not method.startswith("Network."):
+            return
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            request = params.get("request") or {}
+            self.requests[request_id] = {
+                "url": _clip(request.get("url", ""), 300),
+                "method": request.get("method", ""),
+                "type": params.get("type", ""),
+                "started": params.get("timestamp", 0.0),
+                "navigation": self.navigation,
+            }
+            self.requests.move_to_end(request_id)
+            while len(self.requests) > self.max_requests:
+                self.requests.popitem(last=False)
+                self.dropped += 1
+            return
+        record = self.requests.get(request_id)
+        if record is None:
+            return
+        if method == "Network.responseReceived":
+            response = params.get("response") or {}
+            record["status"] = response.get("status")
+            record["mime_type"] = response.get("mimeType", "")
+        elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+            record["ms"] = round((params.get("timestamp", 0.0) - record["started"]) * 1000)
+            if method == "Network.loadingFinished":
+                record["bytes"] = params.get("encodedDataLength")
+            else:
+                record["error"] = params.get("blockedReason") or params.get("errorText") or "failed"
+                if params.get("canceled"):
+                    record["error"] = "canceled"
+
+    def report(self, kind: str, min_ms: int, since_navigation: bool, url_contains: Optional[str], limit: int) -> dict:
+        nav = self.navigation if since_navigation else 0
+        requests = [r for r in self.requests.values() if r["navigation"] >= nav
+                    and (not url_contains or url_contains in r["url"])]
+        console = [c for c in self.console if c["navigation"] >= nav]
+        failed = [r for r in requests if r.get("error") or (r.get("status") or 0) >= 400]
+        slow = sorted((r for r in requests if "ms" in r and r["ms"] >= min_ms), key=lambda r: r["ms"], reverse=True)
+        js_errors = [c for c in console if c["level"] == "SEVERE" and c["source"] in ("javascript", "console-api")]
+        public = lambda r: {k: v for k, v in r.items() if k not in ("started", "navigation")}
+
+        if kind == "summary":
+            result = {
+                "requests": len(requests),
+                "failed": len(failed),
+                "pending": sum(1 for r in requests if "ms" not in r),
+                "slow": len(slow),
+                "js_errors": len(js_errors),
+                "console": len(console),
+                "slowest": [public(r) for r in slow[:5]],
+                "first_js_error": js_errors[0]["message"] if js_errors else None,
+            }
+        else:
+            items = {"failed": failed, "slow": slow, "requests": requests, "js_errors": js_errors, "console": console}[kind]
+            result = {"count": len(items), "items": [public(r) for r in items[:limit]]}
+        result.update(status="ok", kind=kind, navigation=self.navigation)
+        if since_navigation and self.navigation:
+            result["scope"] = "since the last navigation"
+        if self.dropped:
+            result["note"] = f"{self.dropped} older requests were dropped from the {self.max_requests}-entry buffer"
+        return result
+
+
+class _PooledDriver:
+    """
+    One Chrome with its own throwaway profile dir; `lock` serializes commands to it
+    and `executor` is the single thread the async tools run those commands on.
+    """
+    __slots__ = ("driver", "profile_dir", "navigations", "last_used", "healthy", "dead", "lock", "executor", "activity")
+
+    def __init__(self, driver, profile_dir: str):
+        self.driver = driver
+        self.profile_dir = profile_dir
+        self.navigations = 0
+        self.last_used = time.monotonic()
+        self.healthy = True
+        self.dead = False  # taken away from its session (reclaimed / released); set under the pool's lock
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="selenium-driver")
+        self.activity = _ActivityLog()
+
+
+def _start_chrome(profile_dir: str):
     options = Options()
-    options.add_argument("--window-size=1920x1080")
-    options.add_argument("--verbose")
-    options.add_argument("user-data-dir=/tmp/selenium")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    if HEADLESS:
+        options.add_argument("--headless=new")
+    if CAPTURE:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL", "browser": "ALL"})
+    return selenium.webdriver.Chrome(options=options)
 
-    driver = selenium.webdriver.Chrome(options=options)
 
+class _DriverPool:
+    """
+    Headless Chrome drivers leased per agent session: a session keeps its browser
+    (and its isolated profile) across tool calls until it releases it or stays
+    idle longer than `lease_ttl`. Browsers are created lazily up to `size`, checked
+    before being handed out, and restarted after `max_navigations` page loads.
+    """
 
-def go_to_url(url: str) -> str:
-    """Navigates the browser to the given URL."""
-    print(f"🌐 Navigating to URL: {url}")  # Added print statement
+    def __init__(self, size: int, warm: int, max_navigations: int, lease_ttl: float, acquire_timeout: float):
+        self.size, self.warm = max(1, size), max(0, warm)
+        self.max_navigations, self.lease_ttl, self.acquire_timeout = max_navigations, lease_ttl, acquire_timeout
+        self._idle: List[_PooledDriver] = []
+        self._leases: Dict[str, _PooledDriver] = {}
+        self._starting = 0
+        self._cond = threading.Condition()
+
+    def _total(self) -> int:
+        return len(self._idle) + len(self._leases) + self._starting
+
+    def _create(self) -> _PooledDriver:
+        profile_dir = tempfile.mkdtemp(prefix="devtools-chrome-")
+        try:
+            return _PooledDriver(_start_chrome(profile_dir), profile_dir)
+        except Exception:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+
+    @staticmethod
+    def _destroy(pd: _PooledDriver) -> None:
+        pd.executor.shutdown(wait=False)
+        try:
+            pd.driver.quit()
+        except Exception:
+            pass
+        shutil.rmtree(pd.profile_dir, ignore_errors=True)
+
+    def _destroy_async(self, pd: _PooledDriver) -> None:
+        threading.Thread(target=self._destroy, args=(pd,), daemon=True).start()
+
+    @staticmethod
+    def _is_healthy(pd: _PooledDriver) -> bool:
+        if not pd.healthy:
+            return False
+        try:
+            pd.driver.window_handles  # one cheap round trip to the browser
+            return True
+        except Exception:
+            return False
+
+    def _reclaim_expired(self) -> None:
+        """Drop leases idle longer than `lease_ttl`; caller holds `_cond`."""
+        now = time.monotonic()
+        for key, pd in list(self._leases.items()):
+            if now - pd.last_used <= self.lease_ttl or not pd.lock.acquire(blocking=False):
+                continue  # fresh, or a command is running on it right now
+            try:
+                # `_using` checks `dead` once it holds pd.lock, so nobody starts on it after this
+                pd.dead = True
+                del self._leases[key]
+            finally:
+                pd.lock.release()
+            self._destroy_async(pd)
+
+    def _prewarm(self) -> None:
+        with self._cond:
+            if len(self._idle) + self._starting >= self.warm or self._total() >= self.size:
+                return
+            self._starting += 1
+
+        def start() -> None:
+            pd = None
+            try:
+                pd = self._create()
+            except Exception as e:
+                print(f"⚠️ Could not pre-start a browser: {e}")
+            with self._cond:
+                self._starting -= 1
+                if pd is not None:
+                    self._idle.append(pd)
+                self._cond.notify_all()
+
+        threading.Thread(target=start, name="selenium-prewarm", daemon=True).start()
+
+    def leased(self, key: str) -> Optional[_PooledDriver]:
+        """The healthy browser `key` already holds, without waiting for anything."""
+        with self._cond:
+            pd = self._leases.get(key)
+        return pd if pd is not None and pd.healthy else None
+
+    def lease(self, key: str) -> _PooledDriver:
+        """The browser leased to `key`, leasing an idle or new one if it has none."""
+        if DISABLE_WEB_DRIVER:
+            raise RuntimeError("The web driver is disabled (DISABLE_WEB_DRIVER=1).")
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                pd = self._leases.get(key)
+                if pd is not None and pd.healthy:
+                    return pd
+                if pd is not None:  # marked unhealthy by a failed command
+                    pd.dead = True
+                    del self._leases[key]
+                    self._destroy_async(pd)
+                self._reclaim_expired()
+                if self._idle:
+                    pd = self._idle.pop()
+                    break
+                if self._total() < self.size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(
+                        f"All {self.size} browsers are in use; release one or raise SELENIUM_POOL_SIZE."
+                    )
+                self._cond.wait(remaining)
+            self._starting += 1  # the slot this lease will occupy
+
+        try:
+            if pd is not None and not self._is_healthy(pd):
+                self._destroy_async(pd)
+                pd = None
+            if pd is None:
+                pd = self._create()
+        finally:
+            with self._cond:
+                self._starting -= 1
+                if pd is not None:
+                    other = self._leases.get(key)
+                    if other is not None and other.healthy:  # a concurrent call for the same session won
+                        self._idle.append(pd)
+                        pd = other
+                    else:
+                        self._leases[key] = pd
+                        pd.last_used = time.monotonic()
+                self._cond.notify_all()
+        self._prewarm()
+        return pd
+
+    def release(self, key: str) -> bool:
+        """Return a session's browser; its profile is discarded so the next session starts clean."""
+        with self._cond:
+            pd = self._leases.pop(key, None)
+            if pd is not None:
+                pd.dead = True
+            self._cond.notify_all()
+        if pd is None:
+            return False
+        self._destroy_async(pd)
+        self._prewarm()
+        return True
+
+    def recycle(self, pd: _PooledDriver) -> None:
+        """Restart a leased browser on the same profile (cookies and storage survive); caller holds pd.lock."""
+        try:
+            pd.driver.quit()
+        except Exception:
+            pass
+        pd.driver = _start_chrome(pd.profile_dir)
+        pd.activity = _ActivityLog()
+        pd.navigations = 0
+        pd.healthy = True
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"size": self.size, "leased": len(self._leases), "idle": len(self._idle), "starting": self._starting}
+
+    def shutdown(self) -> None:
+        with self._cond:
+            drivers = self._idle + list(self._leases.values())
+            self._idle, self._leases = [], {}
+        for pd in drivers:
+            self._destroy(pd)
+
+
+_POOL = _DriverPool(POOL_SIZE, POOL_WARM, MAX_NAVIGATIONS, LEASE_TTL, ACQUIRE_TIMEOUT)
+atexit.register(_POOL.shutdown)
+
+
+def _session_key(tool_context: Optional[ToolContext]) -> str:
+    """Pool lease key: the ADK session id, so concurrent sessions get separate browsers."""
+    invocation = getattr(tool_context, "_invocation_context", None)
+    session = getattr(invocation, "session", None)
+    return getattr(session, "id", None) or "default"
+
+
+def _browser_lost(e: Exception) -> bool:
+    """Whether a WebDriver error means the browser itself is gone."""
+    return isinstance(e, InvalidSessionIdException) or "disconnected" in str(e) or "not reachable" in str(e)
+
+
+class _LeaseLost(Exception):
+    """The browser was reclaimed or released between leasing it and using it."""
+
+
+def _count_navigation(pd: _PooledDriver) -> None:
+    """Count a page load, restarting the browser first once it reached max_navigations; caller holds pd.lock."""
+    if pd.navigations >= _POOL.max_navigations:
+        _POOL.recycle(pd)
+    pd.navigations += 1
+
+
+@contextmanager
+def _using(pd: _PooledDriver, navigation: bool = False) -> Iterator:
+    """`pd`'s driver, used exclusively for the duration of the block."""
+    with pd.lock:
+        if pd.dead:
+            raise _LeaseLost()
+        if navigation:
+            _count_navigation(pd)
+        pd.last_used = time.monotonic()
+        try:
+            yield pd.driver
+        except WebDriverException as e:
+            if _browser_lost(e):
+                pd.healthy = False  # the next call gets a fresh browser
+            raise
+        finally:
+            pd.last_used = time.monotonic()
+
+
+# Leasing may start a Chrome or wait for a free slot, so it gets its own small pool
+# rather than the per-driver threads.
+_LEASE_EXECUTOR = ThreadPoolExecutor(max_workers=max(1, POOL_SIZE), thread_name_prefix="selenium-lease")
+
+
+async def _run(tool_context: Optional[ToolContext], fn: Callable, *args, navigation: bool = False, pooled: bool = False):
+    """
+    `fn(driver, *args)` on the session's browser, off the event loop: each driver runs
+    its commands on its own single thread, so a slow page load in one session never
+    stalls the others sharing the worker. With `pooled`, `fn` gets the _PooledDriver
+    (its lock held) instead, for callers that count their own navigations.
+    """
+    loop = asyncio.get_running_loop()
+    key = _session_key(tool_context)
+
+    def call(pd: _PooledDriver):
+        with _using(pd, navigation) as driver:
+            result = fn(pd if pooled else driver, *args)
+            pd.activity.pump(pd.driver)  # keeps chromedriver's log buffers short; `fn` may have recycled it
+            return result
+
+    while True:
+        pd = _POOL.leased(key) or await loop.run_in_executor(_LEASE_EXECUTOR, _POOL.lease, key)
+        try:
+            future = loop.run_in_executor(pd.executor, call, pd)
+        except RuntimeError:
+            if not pd.dead:
+                raise
+            continue  # its executor is already shut down; lease again
+        try:
+            return await future
+        except _LeaseLost:
+            continue
+
+
+# Polled by `_wait_until`. The first probe on a page wraps fetch / XHR to count
+# requests in flight; "network_idle" also treats new resource timing entries as activity.
+_WAIT_JS = r"""
+const cond = arguments[0], sel = arguments[1], idleMs = arguments[2];
+if (!window.__devtoolsNet) {
+  const net = window.__devtoolsNet = {inflight: 0, last: performance.now(), resources: -1};
+  const done = () => { net.inflight = Math.max(0, net.inflight - 1); net.last = performance.now(); };
+  const start = () => { net.inflight++; net.last = performance.now(); };
+  const fetch0 = window.fetch;
+  if (fetch0) window.fetch = function () { start(); return fetch0.apply(this, arguments).finally(done); };
+  const send0 = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () { start(); this.addEventListener("loadend", done); return send0.apply(this, arguments); };
+}
+const shown = el => !!el && (el.checkVisibility ? el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true}) : el.getClientRects().length > 0);
+switch (cond) {
+  case "load": return document.readyState === "complete";
+  case "network_idle": {
+    const net = window.__devtoolsNet, n = performance.getEntriesByType("resource").length;
+    if (net.resources !== n) { net.resources = n; net.last = performance.now(); }
+    return document.readyState === "complete" && net.inflight === 0 && performance.now() - net.last >= idleMs;
+  }
+  case "selector": return !!document.querySelector(sel);
+  case "visible": return shown(document.querySelector(sel));
+  case "gone": return !shown(document.querySelector(sel));
+}
+return false;
+"""
+_WAIT_CONDITIONS = ("load", "network_idle", "selector", "visible", "gone")
+_WAIT_POLL = 0.1
+
+
+def _check_wait(condition: str, selector: Optional[str]) -> None:
+    if condition not in _WAIT_CONDITIONS:
+        raise ValueError(f"condition must be one of {list(_WAIT_CONDITIONS)}, got {condition!r}")
+    if condition in ("selector", "visible", "gone") and not selector:
+        raise ValueError(f"condition {condition!r} needs a CSS selector")
+
+
+def _wait_until(driver, condition: str, selector: Optional[str] = None, timeout: float = WAIT_TIMEOUT) -> Tuple[bool, float]:
+    """Poll `condition` until it holds or `timeout` passes; returns (met, seconds waited)."""
+    _check_wait(condition, selector)
+    start = time.monotonic()
+    while True:
+        try:
+            met = driver.execute_script(_WAIT_JS, condition, selector, NETWORK_IDLE_MS)
+        except selenium.common.exceptions.JavascriptException as e:  # e.g. an invalid selector
+            raise ValueError(f"cannot evaluate {condition!r} for {selector!r}: {e.msg}") from e
+        waited = time.monotonic() - start
+        if met or waited >= timeout:
+            return bool(met), waited
+        time.sleep(min(_WAIT_POLL, max(0.0, timeout - waited)))
+
+
+def _describe_wait(condition: str, selector: Optional[str], met: bool, waited: float) -> str:
+    what = condition if not selector else f"{condition} {selector!r}"
+    return f"{what} after {waited:.1f}s" if met else f"timed out after {waited:.1f}s waiting for {what}"
+
+
+def release_browser(tool_context: ToolContext = None) -> str:
+    """Closes this session's browser and returns it to the pool. Call it when the browsing task is done."""
+    key = _session_key(tool_context)
+    released = _POOL.release(key)
+    _SNAPSHOTS.pop(key, None)
+    return "Browser released." if released else "This session had no browser."
+
+
+def _go_to_url(driver, url: str, wait_until: Optional[str], selector: Optional[str], timeout: float) -> str:
+    if wait_until:
+        _check_wait(wait_until, selector)
     driver.get(url.strip())
-    return f"Navigated to URL: {url}"
+    if not wait_until:
+        return f"Navigated to URL: {url}"
+    met, waited = _wait_until(driver, wait_until, selector, timeout)
+    return f"Navigated to URL: {url} ({_describe_wait(wait_until, selector, met, waited)})"
+
 
+async def go_to_url(
+    url: str,
+    tool_context: ToolContext = None,
+    wait_until: Optional[str] = "load",
+    selector: Optional[str] = None,
+    timeout: float = WAIT_TIMEOUT,
+) -> str:
+    """
+    Navigates the browser to the given URL.
+
+    Args:
+        wait_until: What to wait for after navigating: "load" (default), "network_idle",
+            "selector" / "visible" (need `selector`), or None to return at once.
+        selector: CSS selector for the "selector" / "visible" conditions.
+        timeout: Seconds to wait before giving up (the page stays loaded either way).
+    """
+    print(f"🌐 Navigating to URL: {url}")  # Added print statement
+    try:
+        return await _run(tool_context, _go_to_url, url, wait_until, selector, timeout, navigation=True)
+    except ValueError as e:
+        return str(e)
 
-async def take_screenshot(tool_context: ToolContext) -> dict:
-    """Takes a screenshot and saves it with the given filename. called 'load artifacts' after to load the image"""
+
+async def wait_for(
+    condition: str,
+    selector: Optional[str] = None,
+    timeout: float = WAIT_TIMEOUT,
+    tool_context: ToolContext = None,
+) -> str:
+    """
+    Waits until a condition holds on the current page, instead of sleeping a fixed time.
+
+    Args:
+        condition: "load", "network_idle" (no fetch/XHR or new resources for a moment),
+            "selector" (element exists), "visible" (element shown) or "gone" (element absent or hidden).
+        selector: CSS selector for "selector", "visible" and "gone".
+        timeout: Seconds before giving up.
+    """
+    try:
+        met, waited = await _run(tool_context, _wait_until, condition, selector, timeout)
+    except ValueError as e:
+        return str(e)
+    return ("Done: " if met else "") + _describe_wait(condition, selector, met, waited)
+
+
+_IMAGE_FORMATS = {"png": ("PNG", "image/png"), "jpeg": ("JPEG", "image/jpeg"), "webp": ("WEBP", "image/webp")}
+
+
+def _encode_screenshot(
+    png: bytes,
+    image_format: str = SCREENSHOT_FORMAT,
+    quality: int = SCREENSHOT_QUALITY,
+    max_width: Optional[int] = SCREENSHOT_MAX_WIDTH,
+    region: Optional[List[int]] = None,
+    pixel_ratio: float = 1.0,
+) -> Tuple[bytes, str, int, int]:
+    """
+    Crop / downscale / re-encode a PNG screenshot in memory.
+    `region` is [x, y, width, height] in CSS pixels of the viewport; `pixel_ratio`
+    converts it to screenshot pixels. Returns (data, mime type, width, height).
+    """
+    image_format = image_format.lower().replace("jpg", "jpeg")
+    if image_format not in _IMAGE_FORMATS:
+        raise ValueError(f"image_format must be one of {sorted(_IMAGE_FORMATS)}, got {image_format!r}")
+    pil_format, mime_type = _IMAGE_FORMATS[image_format]
+
+    from PIL import Image  # only needed here; keeps importing the browser tools cheap
+
+    image = Image.open(io.BytesIO(png))
+    width, height = image.size
+    changed = False
+    if region:
+        x, y, w, h = (round(v * pixel_ratio) for v in region)
+        box = (max(0, x), max(0, y), min(width, x + w), min(height, y + h))
+        if box[0] >= box[2] or box[1] >= box[3]:
+            raise ValueError(f"region {region} is outside the {width}x{height} screenshot")
+        image, changed = image.crop(box), True
+    if max_width and image.width > max_width:
+        image = image.resize((max_width, max(1, round(image.height * max_width / image.width))), Image.LANCZOS)
+        changed = True
+    if not changed and image_format == "png":
+        return png, mime_type, image.width, image.height  # already what was asked for
+
+    out = io.BytesIO()
+    if image_format == "png":
+        image.save(out, "PNG", optimize=True)
+    else:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(out, pil_format, quality=max(1, min(100, quality)))
+    return out.getvalue(), mime_type, image.width, image.height
+
+
+def _capture(driver, element_css: Optional[str], need_ratio: bool) -> Tuple[bytes, float]:
+    if element_css:
+        png = driver.find_element(By.CSS_SELECTOR, element_css).screenshot_as_png
+    else:
+        png = driver.get_screenshot_as_png()
+    pixel_ratio = float(driver.execute_script("return window.devicePixelRatio") or 1) if need_ratio else 1.0
+    return png, pixel_ratio
+
+
+async def take_screenshot(
+    tool_context: ToolContext,
+    image_format: str = SCREENSHOT_FORMAT,
+    quality: int = SCREENSHOT_QUALITY,
+    max_width: int = SCREENSHOT_MAX_WIDTH,
+    element_css: Optional[str] = None,
+    region: Optional[List[int]] = None,
+) -> dict:
+    """
+    Takes a screenshot of the page (or of one element / region) and saves it as an artifact.
+    called 'load artifacts' after to load the image
+
+    Args:
+        image_format: "webp" (default, smallest), "jpeg" or "png".
+        quality: 1-100 for webp/jpeg.
+        max_width: Downscale wider screenshots to this width (0 keeps full size).
+        element_css: CSS selector of a single element to capture instead of the viewport.
+        region: [x, y, width, height] of the viewport (CSS pixels) to capture.
+    """
     timestamp = time.strftime("%Y%m%d-%H%M%S")
-    filename = f"screenshot_{timestamp}.png"
+    ext = "jpg" if image_format.lower() in ("jpeg", "jpg") else image_format.lower()
+    filename = f"screenshot_{timestamp}.{ext}"
     print(f"📸 Taking screenshot and saving as: {filename}")
-    driver.save_screenshot(filename)
+    try:
+        png, pixel_ratio = await _run(tool_context, _capture, element_css, bool(region))
+    except selenium.common.exceptions.NoSuchElementException:
+        return {"status": "error", "error": f"No element matches {element_css!r}"}
 
-    image = Image.open(filename)
+    try:
+        data, mime_type, width, height = await asyncio.to_thread(
+            _encode_screenshot, png, image_format, quality, max_width, region, pixel_ratio
+        )
+    except ValueError as e:
+        return {"status": "error", "error": str(e)}
 
     await tool_context.save_artifact(
         filename,
-        types.Part.from_bytes(data=image.tobytes(), mime_type="image/png"),
+        types.Part.from_bytes(data=data, mime_type=mime_type),
     )
 
-    return {"status": "ok", "filename": filename}
+    return {"status": "ok", "filename": filename, "mime_type": mime_type,
+            "width": width, "height": height, "size_bytes": len(data)}
 
 
-def click_at_coordinates(x: int, y: int) -> str:
-    """Clicks at the specified coordinates on the screen."""
+def _click_at_coordinates(driver, x: int, y: int) -> None:
     driver.execute_script(f"window.scrollTo({x}, {y});")
     driver.find_element(By.TAG_NAME, "body").click()
 
 
-def find_element_with_text(text: str) -> str:
-    """Finds an element on the page with the given text."""
-    print(f"🔍 Finding element with text: '{text}'")  # Added print statement
+async def click_at_coordinates(x: int, y: int, tool_context: ToolContext = None) -> str:
+    """Clicks at the specified coordinates on the screen."""
+    await _run(tool_context, _click_at_coordinates, x, y)
 
-    try:
-        element = driver.find_element(By.XPATH, f"//*[text()='{text}']")
-        if element:
-            return "Element found."
-        else:
-            return "Element not found."
-    except selenium.common.exceptions.NoSuchElementException:
+
+# In-page locator index: the first lookup on a page state snapshots its interactive
+# elements (text, label, role, id, name, box) into window.__devtoolsIndex; a
+# MutationObserver marks it dirty when the DOM changes, so later lookups on the same
+# state cost one round trip and no DOM scan. When no indexed element matches, a
+# text-node walk finds any element with that text (and its clickable ancestor).
+_LOCATE_JS = r"""
+const query = arguments[0];
+const CLICKABLE = "a[href],button,input:not([type=hidden]),select,textarea,summary,option,label,[role],[onclick],[tabindex],[contenteditable]";
+const ROLES = new Set(["button", "link", "tab", "menuitem", "checkbox", "radio", "switch", "option", "combobox", "textbox", "searchbox", "slider"]);
+const norm = s => (s || "").replace(/\s+/g, " ").trim();
+const shown = el => el.checkVisibility ? el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true}) : el.getClientRects().length > 0;
+function roleOf(el) {
+  const role = el.getAttribute("role");
+  if (role) return role;
+  const tag = el.localName;
+  if (tag === "a") return "link";
+  if (tag === "input") return ["checkbox", "radio", "button", "submit", "reset"].includes(el.type) ? (el.type === "checkbox" || el.type === "radio" ? el.type : "button") : "textbox";
+  if (tag === "textarea") return "textbox";
+  if (tag === "select") return "combobox";
+  return tag;
+}
+function build() {
+  const rows = [];
+  for (const el of document.querySelectorAll(CLICKABLE)) {
+    const role = el.getAttribute("role");
+    if (role && !ROLES.has(role) && !el.matches("a[href],button,input,select,textarea,summary")) continue;
+    if (el.hasAttribute("tabindex") && el.tabIndex < 0 && !el.matches("a[href],button,input,select,textarea")) continue;
+    const img = el.querySelector("img[alt]");
+    const field = el.matches("input,textarea,select");
+    const r = el.getBoundingClientRect();
+    rows.push({
+      el: el, role: roleOf(el), id: el.id || "", name: el.getAttribute("name") || "",
+      text: field ? "" : norm(el.innerText || el.textContent).slice(0, 300),
+      label: norm(el.getAttribute("aria-label") || (el.labels && el.labels[0] && el.labels[0].innerText)
+        || el.getAttribute("placeholder") || el.getAttribute("title") || (img && img.alt) || (el.type === "submit" || el.type === "button" ? el.value : "")),
+      box: [Math.round(r.x), Math.round(r.y), Math.round(r.width), Math.round(r.height)],
+    });
+  }
+  const index = {rows: rows, dirty: false};
+  if (!window.__devtoolsObserver) {
+    window.__devtoolsObserver = new MutationObserver(() => { if (window.__devtoolsIndex) window.__devtoolsIndex.dirty = true; });
+    window.__devtoolsObserver.observe(document.documentElement, {subtree: true, childList: true, characterData: true,
+      attributes: true, attributeFilter: ["class", "style", "hidden", "disabled", "aria-hidden", "aria-label", "href", "id", "name", "role"]});
+  }
+  return (window.__devtoolsIndex = index);
+}
+let index = window.__devtoolsIndex;
+let rebuilt = false;
+if (!index || index.dirty) { index = build(); rebuilt = true; }
+
+const want = norm(query.text).toLowerCase();
+function score(row) {
+  if (query.role && row.role !== query.role) return 0;
+  let best = 0, how = "";
+  for (const [field, exact, partial] of [["text", 100, 60], ["label", 95, 55], ["id", 90, 0], ["name", 85, 0]]) {
+    const v = row[field].toLowerCase();
+    if (!v) continue;
+    let s = v === want ? exact : (!query.exact && partial && v.includes(want) ? partial * want.length / v.length + (v.startsWith(want) ? 10 : 0) : 0);
+    if (s > best) { best = s; how = field; }
+  }
+  return best ? [best, how] : 0;
+}
+let hit = null, matches = 0;
+for (const row of want ? index.rows : []) {
+  const s = score(row);
+  if (!s) continue;
+  if (!row.el.isConnected) { index.dirty = true; continue; }
+  matches++;
+  const rank = s[0] + (shown(row.el) ? 20 : 0);
+  if (!hit || rank > hit.rank) hit = {rank: rank, row: row, how: s[1]};
+}
+if (hit) {
+  const r = hit.row.el.getBoundingClientRect();
+  return {element: hit.row.el, role: hit.row.role, text: hit.row.text || hit.row.label, id: hit.row.id, name: hit.row.name,
+          box: [Math.round(r.x), Math.round(r.y), Math.round(r.width), Math.round(r.height)], visible: shown(hit.row.el),
+          match: hit.how, matches: matches, indexed: index.rows.length, rebuilt: rebuilt};
+}
+if (!want || query.role || !document.body) return null;
+const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+let partial = null;
+for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+  const text = norm(node.nodeValue).toLowerCase();
+  if (!text || !node.parentElement || ["script", "style", "noscript"].includes(node.parentElement.localName)) continue;
+  if (text === want || (!partial && !query.exact && text.includes(want))) {
+    const el = node.parentElement.closest(CLICKABLE) || node.parentElement;
+    if (text === want) { partial = el; break; }
+    partial = el;
+  }
+}
+if (!partial) return null;
+const r = partial.getBoundingClientRect();
+return {element: partial, role: roleOf(partial), text: norm(partial.innerText).slice(0, 300), id: partial.id || "", name: partial.getAttribute("name") || "",
+        box: [Math.round(r.x), Math.round(r.y), Math.round(r.width), Math.round(r.height)], visible: shown(partial),
+        match: "page text", matches: 1, indexed: index.rows.length, rebuilt: rebuilt};
+"""
+
+
+def _find_by_text(driver, text: str, role: Optional[str] = None, exact: bool = False) -> Optional[dict]:
+    """Best element for `text` (own text, label, id or name) from the page's locator index, or None."""
+    return driver.execute_script(_LOCATE_JS, {"text": text, "role": role, "exact": exact})
+
+
+def _describe_found(found: dict) -> str:
+    x, y, w, h = found["box"]
+    label = found["text"] or found["id"] or found["name"]
+    hidden = "" if found["visible"] else ", hidden"
+    return f"{found['role']} {label[:80]!r} at ({x}, {y}) {w}x{h}{hidden}"
+
+
+def _find_element_with_text(driver, text: str) -> str:
+    found = _find_by_text(driver, text)
+    if found is None:
         return "Element not found."
-    except selenium.common.exceptions.ElementNotInteractableException:
-        return "Element not interactable, cannot click."
+    return f"Element found: {_describe_found(found)}"
 
 
-def click_element_with_text(text: str) -> str:
-    """Clicks on an element on the page with the given text."""
-    print(f"🖱️ Clicking element with text: '{text}'")  # Added print statement
+async def find_element_with_text(text: str, tool_context: ToolContext = None) -> str:
+    """Finds an element on the page by its text, label, id or name (best match wins)."""
+    print(f"🔍 Finding element with text: '{text}'")  # Added print statement
+    return await _run(tool_context, _find_element_with_text, text)
 
-    try:
-        element = driver.find_element(By.XPATH, f"//*[text()='{text}']")
-        element.click()
-        return f"Clicked element with text: {text}"
-    except selenium.common.exceptions.NoSuchElementException:
+
+def _click_element_with_text(driver, text: str) -> str:
+    found = _find_by_text(driver, text)
+    if found is None:
         return "Element not found, cannot click."
+    try:
+        found["element"].click()
+        return f"Clicked {_describe_found(found)}"
+    except selenium.common.exceptions.StaleElementReferenceException:
+        return "Element changed before it could be clicked; try again."
     except selenium.common.exceptions.ElementNotInteractableException:
         return "Element not interactable, cannot click."
     except selenium.common.exceptions.ElementClickInterceptedException:
         return "Element click intercepted, cannot click."
 
 
-def enter_text_into_element(text_to_enter: str, element_id: str) -> str:
-    """Enters text into an element with the given ID."""
-    print(
-        f"📝 Entering text '{text_to_enter}' into element with ID: {element_id}"
-    )  # Added print statement
+async def click_element_with_text(text: str, tool_context: ToolContext = None) -> str:
+    """Clicks on the element on the page that best matches the given text, label, id or name."""
+    print(f"🖱️ Clicking element with text: '{text}'")  # Added print statement
+    return await _run(tool_context, _click_element_with_text, text)
+
 
+def _enter_text_into_element(driver, text_to_enter: str, element_id: str) -> str:
     try:
-        input_element = driver.find_element(By.ID, element_id)
+        try:
+            input_element = driver.find_element(By.ID, element_id)
+        except selenium.common.exceptions.NoSuchElementException:
+            found = _find_by_text(driver, element_id, role="textbox")  # a name, label or placeholder
+            if found is None:
+                raise
+            input_element = found["element"]
         input_element.send_keys(text_to_enter)
         return (
             f"Entered text '{text_to_enter}' into element with ID: {element_id}"
@@ -103,18 +844,454 @@ def enter_text_into_element(text_to_enter: str, element_id: str) -> str:
         return "Element not interactable, cannot click."
 
 
-def scroll_down_screen() -> str:
-    """Scrolls down the screen by a moderate amount."""
-    print("⬇️ scroll the screen")  # Added print statement
+async def enter_text_into_element(text_to_enter: str, element_id: str, tool_context: ToolContext = None) -> str:
+    """Enters text into an element with the given ID (or, failing that, the text field with that name, label or placeholder)."""
+    print(
+        f"📝 Entering text '{text_to_enter}' into element with ID: {element_id}"
+    )  # Added print statement
+    return await _run(tool_context, _enter_text_into_element, text_to_enter, element_id)
+
+
+def _scroll_down_screen(driver) -> str:
     driver.execute_script("window.scrollBy(0, 500)")
     return "Scrolled down the screen."
 
 
-def get_page_source() -> str:
-    LIMIT = 1000000
-    """Returns the current page source."""
+async def scroll_down_screen(tool_context: ToolContext = None) -> str:
+    """Scrolls down the screen by a moderate amount."""
+    print("⬇️ scroll the screen")  # Added print statement
+    return await _run(tool_context, _scroll_down_screen)
+
+
+# One DOM walk in the page: drops script/style/svg/hidden nodes and returns
+# [depth, kind, label, selector, attrs] rows for landmarks, headings, interactive
+# elements and leftover visible text. Selectors prefer a unique id, then a unique
+# test-id / name / aria-label, then an nth-of-type path from the nearest unique id.
+_DISTILL_JS = r"""
+const MAX_TEXT = arguments[0], MAX_NODES = arguments[1];
+const SKIP = new Set(["script", "style", "noscript", "template", "svg", "canvas", "head", "meta", "link", "iframe", "object", "embed"]);
+const LANDMARKS = new Set(["header", "nav", "main", "aside", "footer", "form", "dialog", "section", "article", "table", "ul", "ol", "fieldset"]);
+const ROLES = new Set(["button", "link", "tab", "menuitem", "checkbox", "radio", "switch", "option", "combobox", "textbox", "searchbox", "slider"]);
+const FIELDS = new Set(["a", "button", "input", "select", "textarea", "summary", "option"]);
+const TEST_ATTRS = ["data-testid", "data-test", "data-qa", "name", "aria-label"];
+const volatile = v => /\d{4,}|[0-9a-f]{8,}|^:r/i.test(v);
+const clip = (s, n) => { s = (s || "").replace(/\s+/g, " ").trim(); return s.length > n ? s.slice(0, n - 1) + "…" : s; };
+const q = v => '"' + String(v).replace(/\\/g, "\\\\").replace(/"/g, '\\"') + '"';
+
+const counts = new Map();
+for (const el of document.querySelectorAll("[id],[data-testid],[data-test],[data-qa],[name],[aria-label]")) {
+  if (el.id) counts.set("#" + el.id, (counts.get("#" + el.id) || 0) + 1);
+  for (const a of TEST_ATTRS) {
+    const v = el.getAttribute(a);
+    if (v) { const k = el.localName + "[" + a + "=" + q(v) + "]"; counts.set(k, (counts.get(k) || 0) + 1); }
+  }
+}
+const uniqueId = el => el.id && !volatile(el.id) && counts.get("#" + el.id) === 1;
+function selector(el) {
+  if (uniqueId(el)) return "#" + CSS.escape(el.id);
+  for (const a of TEST_ATTRS) {
+    const v = el.getAttribute(a);
+    if (v && !volatile(v)) { const k = el.localName + "[" + a + "=" + q(v) + "]"; if (counts.get(k) === 1) return k; }
+  }
+  const parts = [];
+  for (let cur = el; cur && cur.nodeType === 1 && cur !== document.documentElement; cur = cur.parentElement) {
+    if (cur !== el && uniqueId(cur)) { parts.unshift("#" + CSS.escape(cur.id)); break; }
+    if (cur === document.body) { parts.unshift("body"); break; }
+    let i = 1;
+    for (let sib = cur.previousElementSibling; sib; sib = sib.previousElementSibling) if (sib.localName === cur.localName) i++;
+    parts.unshift(cur.localName + ":nth-of-type(" + i + ")");
+  }
+  return parts.join(" > ");
+}
+function visible(el) {
+  if (el.checkVisibility) return el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true});
+  const s = getComputedStyle(el);
+  return s.display !== "none" && s.visibility !== "hidden" && s.opacity !== "0" && el.getClientRects().length > 0;
+}
+function interactive(el, tag, role) {
+  if (FIELDS.has(tag)) return tag !== "a" || el.hasAttribute("href");
+  return (role && ROLES.has(role)) || el.isContentEditable && !(el.parentElement && el.parentElement.isContentEditable)
+    || el.hasAttribute("onclick") || (el.tabIndex >= 0 && el.hasAttribute("tabindex"));
+}
+function label(el, tag) {
+  const img = el.querySelector && el.querySelector("img[alt]");
+  return clip(el.getAttribute("aria-label") || (tag === "input" || tag === "textarea" || tag === "select" ? "" : el.innerText)
+    || (img && img.alt) || el.getAttribute("title") || "", MAX_TEXT);
+}
+function attrs(el, tag) {
+  const out = {};
+  if (tag === "a") out.href = clip(el.getAttribute("href"), 200);
+  if (tag === "input" || tag === "textarea" || tag === "select") {
+    if (el.type && el.type !== "text" && tag === "input") out.type = el.type;
+    if (el.name) out.name = el.name;
+    if (el.placeholder) out.placeholder = clip(el.placeholder, 80);
+    if (el.labels && el.labels.length) out.label = clip(el.labels[0].innerText, 80);
+    if (el.type === "checkbox" || el.type === "radio") out.checked = el.checked;
+    else if (el.value && el.type !== "password") out.value = clip(el.value, 80);
+  }
+  if (tag === "select") out.options = Array.from(el.options).slice(0, 20).map(o => clip(o.text, 40));
+  if (el.disabled) out.disabled = true;
+  return out;
+}
+const rows = [];
+function ownText(el) {
+  let t = "";
+  for (const n of el.childNodes) if (n.nodeType === 3) t += n.nodeValue;
+  return clip(t, MAX_TEXT);
+}
+function walk(el, depth) {
+  for (const child of el.children) {
+    if (rows.length >= MAX_NODES) return;
+    const tag = child.localName;
+    if (SKIP.has(tag) || child.hidden || child.getAttribute("aria-hidden") === "true") continue;
+    if (tag === "input" && child.type === "hidden") continue;
+    if (!visible(child) && getComputedStyle(child).display !== "contents") continue;
+    const role = child.getAttribute("role");
+    if (/^h[1-6]$/.test(tag)) { rows.push([depth, tag, clip(child.innerText, MAX_TEXT), selector(child), {}]); continue; }
+    if (interactive(child, tag, role)) {
+      rows.push([depth, role && ROLES.has(role) ? role : tag, label(child, tag), selector(child), attrs(child, tag)]);
+      if (tag !== "select" && child.querySelector("a[href],button,input,select,textarea")) walk(child, depth + 1);
+      continue;
+    }
+    if (tag === "img") { if (child.alt) rows.push([depth, "img", clip(child.alt, MAX_TEXT), "", {}]); continue; }
+    const text = ownText(child);
+    if (LANDMARKS.has(tag) || (role && ["dialog", "navigation", "main", "form", "search", "banner", "tablist", "menu"].includes(role))) {
+      const name = child.getAttribute("aria-label") || (child.id && !volatile(child.id) ? "#" + child.id : "");
+      rows.push([depth, role || tag, clip(name, MAX_TEXT), selector(child), {}]);
+      if (text) rows.push([depth + 1, "text", text, "", {}]);
+      walk(child, depth + 1);
+      continue;
+    }
+    if (text) rows.push([depth, "text", text, "", {}]);
+    walk(child, depth);
+  }
+}
+if (document.body) walk(document.body, 0);
+return {url: location.href, title: document.title, rows: rows, truncated: rows.length >= MAX_NODES};
+"""
+
+_OUTLINE_TEXT_CHARS = 160   # longest label / text run kept per node
+_OUTLINE_MAX_NODES = 5000
+_SNAPSHOT_PAGES = 8         # previous outlines remembered per session, for diffs
+_SNAPSHOTS: Dict[str, "OrderedDict[str, List[str]]"] = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+
+
+def _outline_lines(rows: List[list]) -> List[str]:
+    lines = []
+    for depth, kind, label, sel, attrs in rows:
+        parts = ["  " * depth + kind]
+        if label:
+            parts.append(json.dumps(label, ensure_ascii=False))
+        parts.extend(f"{k}={json.dumps(v, ensure_ascii=False)}" for k, v in attrs.items())
+        if sel:
+            parts.append(f"-> {sel}")
+        lines.append(" ".join(parts))
+    return lines
+
+
+def _fit_outline(lines: List[str], max_chars: int) -> List[str]:
+    """
+    Keep `lines` under `max_chars` (>= 0), dropping plain text before interactive
+    nodes, last ones first. With no room left only the omission note remains.
+    """
+    total = sum(len(line) + 1 for line in lines)
+    if total <= max_chars:
+        return lines
+    keep = [True] * len(lines)
+    for want_text in (True, False):
+        for i in range(len(lines) - 1, -1, -1):
+            if total <= max_chars - 80:  # room for the note below
+                break
+            if keep[i] and (lines[i].lstrip("+- ").startswith("text ") or not want_text):
+                keep[i] = False
+                total -= len(lines[i]) + 1
+    dropped = keep.count(False)
+    kept = [line for line, k in zip(lines, keep) if k]
+    kept.append(f"... {dropped} of {len(lines)} nodes omitted (raise max_chars, or mode='html' for the raw page)")
+    return kept
+
+
+def _remember_outline(key: str, url: str, lines: List[str]) -> Optional[List[str]]:
+    """Store this session's outline of `url`; returns the previous one, if any."""
+    with _SNAPSHOTS_LOCK:
+        pages = _SNAPSHOTS.setdefault(key, OrderedDict())
+        previous = pages.pop(url, None)
+        pages[url] = lines
+        while len(pages) > _SNAPSHOT_PAGES:
+            pages.popitem(last=False)
+    return previous
+
+
+def _page_source(driver, key: str, mode: str, max_chars: int, diff: bool) -> str:
+    if mode == "html":
+        return driver.page_source[0:max_chars or None]
+    if mode != "outline":
+        return f"Unknown mode {mode!r}; use 'outline' or 'html'."
+
+    snapshot = driver.execute_script(_DISTILL_JS, _OUTLINE_TEXT_CHARS, _OUTLINE_MAX_NODES)
+    lines = _outline_lines(snapshot["rows"])
+    if snapshot.get("truncated"):
+        lines.append(f"... page has more than {_OUTLINE_MAX_NODES} nodes; scroll or narrow the task")
+    previous = _remember_outline(key, snapshot["url"], lines)
+    header = f"# {snapshot['title']}\n@ {snapshot['url']}"
+
+    if diff and previous is not None:
+        changes = [
+            line for line in difflib.unified_diff(previous, lines, lineterm="", n=0)
+            if not line.startswith(("---", "+++", "@@"))
+        ]
+        added = sum(1 for line in changes if line.startswith("+"))
+        header += f"\n(changes since the previous outline: {added} added, {len(changes) - added} removed)"
+        if not changes:
+            return header + "\n(no changes)"
+        lines = changes
+    if not max_chars:  # 0 = unlimited
+        return "\n".join([header] + lines)
+    return "\n".join([header] + _fit_outline(lines, max(0, max_chars - len(header) - 1)))
+
+
+async def get_page_source(
+    tool_context: ToolContext = None,
+    mode: str = "outline",
+    max_chars: int = PAGE_OUTLINE_MAX_CHARS,
+    diff: bool = False,
+) -> str:
+    """
+    Returns the current page as a compact outline: landmarks, headings, visible text and
+    every interactive element with its label, attributes and a stable CSS selector
+    ("-> selector"). Scripts, styles, SVG and hidden nodes are left out.
+
+    Args:
+        mode: "outline" (default) or "html" for the raw page source.
+        max_chars: Size budget of the result; plain text is dropped first when over it
+            (0 = unlimited).
+        diff: Return only the lines added (+) / removed (-) since this session's previous
+            outline of the same URL; falls back to the full outline on a first visit.
+    """
     print("📄 Getting page source...")  # Added print statement
-    return driver.page_source[0:LIMIT]
+    return await _run(tool_context, _page_source, _session_key(tool_context), mode, max_chars, diff)
+
+
+class _StepFailed(Exception):
+    pass
+
+
+def _locate(driver, step: Dict[str, Any]):
+    if step.get("selector"):
+        return driver.find_element(By.CSS_SELECTOR, step["selector"])
+    if step.get("element_id"):
+        return driver.find_element(By.ID, step["element_id"])
+    if step.get("text"):
+        found = _find_by_text(driver, step["text"], step.get("role"), bool(step.get("exact")))
+        if found is None:
+            raise _StepFailed(f"no element matches text {step['text']!r}")
+        return found["element"]
+    raise ValueError("needs one of 'selector', 'element_id' or 'text'")
+
+
+def _step_navigate(driver, step, key, captures) -> str:
+    if not step.get("url"):
+        raise ValueError("needs 'url'")
+    return _go_to_url(driver, step["url"], step.get("wait_until", "load"), step.get("selector"),
+                      float(step.get("timeout", WAIT_TIMEOUT)))
+
+
+def _step_type(driver, step, key, captures) -> str:
+    if "value" not in step:
+        raise ValueError("needs 'value'")
+    element = _locate(driver, step)
+    if step.get("clear"):
+        element.clear()
+    element.send_keys(str(step["value"]) + ("\n" if step.get("submit") else ""))
+    return f"typed {len(str(step['value']))} chars" + (" and submitted" if step.get("submit") else "")
+
+
+def _step_click(driver, step, key, captures) -> str:
+    _locate(driver, step).click()
+    return "clicked"
+
+
+def _step_wait(driver, step, key, captures) -> str:
+    condition = step.get("condition") or ("visible" if step.get("selector") else "network_idle")
+    met, waited = _wait_until(driver, condition, step.get("selector"), float(step.get("timeout", WAIT_TIMEOUT)))
+    if not met:
+        raise _StepFailed(_describe_wait(condition, step.get("selector"), met, waited))
+    return _describe_wait(condition, step.get("selector"), met, waited)
+
+
+def _step_assert(driver, step, key, captures) -> str:
+    checks = []
+    if "url_contains" in step:
+        if step["url_contains"] not in driver.current_url:
+            raise _StepFailed(f"url {driver.current_url!r} does not contain {step['url_contains']!r}")
+        checks.append("url")
+    if "title_contains" in step:
+        if step["title_contains"] not in driver.title:
+            raise _StepFailed(f"title {driver.title!r} does not contain {step['title_contains']!r}")
+        checks.append("title")
+    if step.get("selector"):
+        try:
+            element = driver.find_element(By.CSS_SELECTOR, step["selector"])
+        except selenium.common.exceptions.NoSuchElementException:
+            raise _StepFailed(f"no element matches {step['selector']!r}")
+        if step.get("visible") and not element.is_displayed():
+            raise _StepFailed(f"{step['selector']!r} is not visible")
+        if "text_contains" in step and step["text_contains"] not in element.text:
+            raise _StepFailed(f"{step['selector']!r} text {element.text[:200]!r} does not contain {step['text_contains']!r}")
+        checks.append(step["selector"])
+    elif "text_contains" in step:
+        if step["text_contains"] not in (driver.execute_script("return document.body ? document.body.innerText : ''") or ""):
+            raise _StepFailed(f"page text does not contain {step['text_contains']!r}")
+        checks.append("page text")
+    if not checks:
+        raise ValueError("needs 'url_contains', 'title_contains', 'selector' or 'text_contains'")
+    return "ok: " + ", ".join(checks)
+
+
+def _step_capture(driver, step, key, captures) -> str:
+    what = step.get("what", "screenshot")
+    if what == "screenshot":
+        captures.append(_capture(driver, step.get("selector"), False)[0])
+        return f"screenshot #{len(captures)}"
+    if what in ("outline", "html"):
+        return _page_source(driver, key, what, int(step.get("max_chars", 4000)), bool(step.get("diff")))
+    raise ValueError(f"'what' must be screenshot, outline or html, got {what!r}")
+
+
+_BATCH_STEPS = {
+    "navigate": _step_navigate,
+    "type": _step_type,
+    "click": _step_click,
+    "wait": _step_wait,
+    "assert": _step_assert,
+    "capture": _step_capture,
+}
+_BATCH_MAX_STEPS = 50
+
+
+def _run_actions(pd: _PooledDriver, actions: List[Dict[str, Any]], key: str, screenshot_on_failure: bool):
+    trace, captures, failed = [], [], None
+    for i, step in enumerate(actions, 1):
+        action = step.get("action") if isinstance(step, dict) else None
+        start = time.monotonic()
+        try:
+            if action not in _BATCH_STEPS:
+                raise ValueError(f"unknown action {action!r}; use one of {list(_BATCH_STEPS)}")
+            if action == "navigate":
+                _count_navigation(pd)  # each page load counts towards recycling, which may swap pd.driver
+            status, detail = "ok", _BATCH_STEPS[action](pd.driver, step, key, captures)
+        except WebDriverException as e:
+            if _browser_lost(e):
+                raise
+            first_line = (e.msg or type(e).__name__).strip().splitlines()[0]
+            status, detail = "failed", f"{type(e).__name__}: {first_line}"
+        except (_StepFailed, ValueError) as e:
+            status, detail = "failed", str(e)
+        trace.append({"step": i, "action": action, "status": status, "ms": round((time.monotonic() - start) * 1000), "detail": detail})
+        if status == "failed":
+            failed = i
+            break
+    url = None
+    try:
+        url = pd.driver.current_url
+        if failed and screenshot_on_failure:
+            captures.append(pd.driver.get_screenshot_as_png())
+    except WebDriverException as e:
+        if _browser_lost(e):
+            raise
+    return trace, captures, failed, url
+
+
+async def run_browser_actions(
+    actions: List[Dict[str, Any]],
+    tool_context: ToolContext = None,
+    screenshot_on_failure: bool = True,
+) -> dict:
+    """
+    Runs an ordered list of browser actions in one call, stopping at the first failure,
+    and returns a short trace of every step that ran. Use it to reproduce a UI flow in one go.
+
+    Each action is a dict with an "action" key:
+        {"action": "navigate", "url": ..., "wait_until": "load" | "network_idle" | "selector" | None, "selector": ..., "timeout": s}
+        {"action": "type", "selector" | "element_id" | "text": ..., "value": ..., "clear": bool, "submit": bool}
+        {"action": "click", "selector" | "element_id" | "text": ...}
+        {"action": "wait", "condition": "load" | "network_idle" | "selector" | "visible" | "gone", "selector": ..., "timeout": s}
+        {"action": "assert", "url_contains" / "title_contains" / "selector" (+ "visible": true) / "text_contains": ...}
+        {"action": "capture", "what": "screenshot" | "outline" | "html", "selector": ..., "max_chars": 4000, "diff": bool}
+    "text" finds the best element by text, label, id or name (add "role": "button" / "link" /
+    "textbox" ... to narrow it, "exact": true to forbid partial matches). Screenshots are saved as
+    artifacts (call 'load artifacts' to view them).
+
+    Args:
+        actions: The steps, in order (at most 50).
+        screenshot_on_failure: Also save a screenshot of the page when a step fails.
+
+    Returns:
+        {"status": "ok" | "failed", "failed_step": n, "url": ..., "steps": [{"step", "action", "status", "ms", "detail"}],
+         "skipped": steps not run, "artifacts": [filenames]}
+    """
+    if not actions or len(actions) > _BATCH_MAX_STEPS:
+        return {"status": "error", "error": f"give between 1 and {_BATCH_MAX_STEPS} actions"}
+    print(f"🎬 Running {len(actions)} browser actions")
+    trace, captures, failed, url = await _run(
+        tool_context, _run_actions, actions, _session_key(tool_context), screenshot_on_failure, pooled=True
+    )
+
+    artifacts = []
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    for n, png in enumerate(captures, 1):
+        data, mime_type, _, _ = await asyncio.to_thread(_encode_screenshot, png)
+        ext = "jpg" if mime_type == "image/jpeg" else mime_type.split("/")[1]
+        filename = f"actions_{timestamp}_{n}.{ext}"
+        await tool_context.save_artifact(filename, types.Part.from_bytes(data=data, mime_type=mime_type))
+        artifacts.append(filename)
+
+    result = {"status": "failed" if failed else "ok", "url": url, "steps": trace}
+    if failed:
+        result["failed_step"] = failed
+        result["skipped"] = len(actions) - failed
+    if artifacts:
+        result["artifacts"] = artifacts
+    return result
+
+
+_ACTIVITY_KINDS = ("summary", "failed", "slow", "js_errors", "console", "requests")
+
+
+async def get_browser_activity(
+    kind: str = "summary",
+    min_ms: int = 1000,
+    since_navigation: bool = True,
+    url_contains: Optional[str] = None,
+    limit: int = 50,
+    tool_context: ToolContext = None,
+) -> dict:
+    """
+    Reports what the browser did on the network and console, instead of re-reading the page.
+
+    Args:
+        kind: "summary" (counts, slowest requests, first JS error), "failed" (network errors and
+            HTTP >= 400), "slow" (requests that took at least `min_ms`), "js_errors" (uncaught
+            exceptions and console.error), "console" (all console messages) or "requests" (everything).
+        min_ms: Threshold for "slow".
+        since_navigation: Only activity since the last page load (False: everything still buffered).
+        url_contains: Only requests whose URL contains this.
+        limit: Max items returned.
+    """
+    if kind not in _ACTIVITY_KINDS:
+        return {"status": "error", "error": f"kind must be one of {list(_ACTIVITY_KINDS)}, got {kind!r}"}
+    pd = _POOL.leased(_session_key(tool_context))
+    if pd is None:
+        return {"status": "error", "error": "This session has no browser yet; navigate somewhere first."}
+    if not pd.activity.enabled:
+        return {"status": "error", "error": "Activity capture is off (SELENIUM_CAPTURE=0) or unsupported by this driver."}
+
+    def report(driver):
+        pd.activity.pump(driver)
+        return pd.activity.report(kind, min_ms, since_navigation, url_contains, max(1, limit))
+
+    return await _run(tool_context, report)
 
 
 def analyze_webpage_and_determine_action(
@@ -129,8 +1306,8 @@ def analyze_webpage_and_determine_action(
     You are an expert web page analyzer.
     You have been tasked with controlling a web browser to achieve a user's goal.
     The user's task is: {user_task}
-    Here is the current HTML source code of the webpage:
-    ```html
+    Here is the current webpage, as an outline from get_page_source (visible text and interactive elements, each with "-> css selector") or as raw HTML:
+    ```
     {page_source}
     ```
 
@@ -175,12 +1352,16 @@ def analyze_webpage_and_determine_action(
 #     instruction=SEARCH_RESULT_AGENT_PROMPT,
 #     tools=[
 #         go_to_url,
+#         wait_for,
+#         release_browser,
 #         take_screenshot,
 #         find_element_with_text,
 #         click_element_with_text,
 #         enter_text_into_element,
 #         scroll_down_screen,
 #         get_page_source,
+#         run_browser_actions,
+#         get_browser_activity,
 #         load_artifacts_tool,
 #         analyze_webpage_and_determine_action,
 #     ],
@@ -6,11 +6,8 @@ import tempfile
 import base64
 from pathlib import Path
 
-# Google Cloud imports
-from google.cloud import speech_v1p1beta1 as speech
-from google.cloud import storage
-import vertexai
-from vertexai.generative_models import GenerativeModel, Part
+# Google Cloud / Vertex AI are imported where they are used: they take seconds to
+# import and every agent worker would pay for it at startup.
 import mimetypes
 
 # Import existing YouTube downloader
@@ -59,6 +56,9 @@ def _analyze_video_with_gemini(
         tuple: (success: bool, analysis_result: dict, error: str)
     """
     try:
+        import vertexai
+        from vertexai.generative_models import GenerativeModel, Part
+
         # Initialize Vertex AI
         project_id = os.getenv('GOOGLE_CLOUD_PROJECT')
         location = os.getenv('GOOGLE_CLOUD_LOCATION', 'us-central1')
@@ -0,0 +1,67 @@
+# benchmarks/bench_import.py
+"""
+Cold-start guard for `adk web` / `api_server` workers: imports a module in a
+fresh interpreter under `python -X importtime`, reports the wall time and the
+slowest imports by cumulative time, and exits non-zero when the median over
+`--runs` exceeds `--max-ms`.
+
+Usage:
+    python benchmarks/bench_import.py [--module DevTools.agent] [--runs 5] [--top 15] [--max-ms 3000]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+def import_once(module: str):
+    """(wall ms, {module: cumulative us}) for one cold import of `module`."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")])))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            cumulative[m.group(4)] = int(m.group(2))
+    return wall_ms, cumulative
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--module", default="DevTools.agent")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--max-ms", type=float, default=None, help="fail when the median wall time is above this")
+    args = ap.parse_args()
+
+    walls, last = [], {}
+    for _ in range(max(1, args.runs)):
+        wall_ms, last = import_once(args.module)
+        walls.append(wall_ms)
+    median = statistics.median(walls)
+    own = last.get(args.module, 0) / 1000
+
+    print(f"import {args.module}: median {median:.0f} ms wall over {len(walls)} runs "
+          f"(min {min(walls):.0f}, max {max(walls):.0f}); importtime cumulative {own:.0f} ms")
+    print(f"\nslowest imports (cumulative, last run):")
+    for name, us in sorted(last.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+        print(f"  {us / 1000:9.1f} ms  {name}")
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"\nFAIL: median {median:.0f} ms > --max-ms {args.max_ms:.0f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_index.py
+"""
+Cold-index scaling benchmark for `code_parser_tools._index_project_functions`.
+
+Generates a synthetic project and times a cold (empty cache) index build for
+1, 2, 4, ... worker processes up to the machine's core count.
+
+Usage:
+    python benchmarks/bench_index.py [--files 20000] [--funcs 12]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from DevTools import code_parser_tools  # noqa: E402
+
+FUNC_TEMPLATE = '''
+def func_{i}(request, value={i}):
+    """Synthetic helper {i}."""
+    data = [x * value for x in range(10)]
+    if request:
+        return helper_{j}(data)
+    return sum(data)
+'''
+
+def make_project(root: Path, files: int, funcs: int) -> None:
+    for n in range(files):
+        pkg = root / f"app{n // 500}"
+        pkg.mkdir(exist_ok=True)
+        body = "import os\nfrom . import utils\n" + "".join(
+            FUNC_TEMPLATE.format(i=i, j=(i + 1) % funcs) for i in range(funcs)
+        )
+        (pkg / f"module_{n}.py").write_text(body, encoding="utf-8")
+
+def cold_index(project: Path, workers: int) -> float:
+    cache = tempfile.mkdtemp(prefix="devtools-bench-cache-")
+    os.environ["DEVTOOLS_CACHE_DIR"] = cache
+    code_parser_tools._PROJECT_INDEXES.clear()
+    try:
+        start = time.perf_counter()
+        code_parser_tools._index_project_functions(str(project), workers=workers)
+        return time.perf_counter() - start
+    finally:
+        code_parser_tools._PROJECT_INDEXES.clear()
+        shutil.rmtree(cache, ignore_errors=True)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--funcs", type=int, default=12)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    counts = sorted({1 << k for k in range(cores.bit_length()) if 1 << k <= cores} | {cores})
+
+    project = Path(tempfile.mkdtemp(prefix="devtools-bench-project-"))
+    try:
+        make_project(project, args.files, args.funcs)
+        print(f"{args.files} files x {args.funcs} functions, {cores} cores")
+        baseline = None
+        for workers in counts:
+            elapsed = cold_index(project, workers)
+            baseline = baseline or elapsed
+            print(f"workers={workers:<3} cold index {elapsed:7.2f}s  speedup x{baseline / elapsed:4.2f}")
+    finally:
+        shutil.rmtree(project, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
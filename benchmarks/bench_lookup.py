@@ -0,0 +1,72 @@
+# benchmarks/bench_lookup.py
+"""
+URL lookup benchmark for `lookup_tools`: the old per-lookup linear scan
+(compile every route's regex, try them in order) vs the precompiled
+`_RouteMatcher`, over a synthetic Django route table.
+
+Usage:
+    python benchmarks/bench_lookup.py [--routes 5000] [--lookups 2000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from DevTools import lookup_tools  # noqa: E402
+
+CONVERTERS = ["int", "str", "slug", "uuid"]
+SAMPLES = {"int": "42", "str": "abc", "slug": "some-slug_1", "uuid": "f0c30214-7bd6-4e0c-971a-47eb35477dc8"}
+
+def make_routes(n: int):
+    routes, urls = [], []
+    for i in range(n):
+        app = f"app{i % 40}"
+        conv = CONVERTERS[i % len(CONVERTERS)]
+        if i % 10 == 0:  # some routes start with a parameter
+            pattern, url = f"/<{conv}:tenant>/view{i}/", f"/{SAMPLES[conv]}/view{i}/"
+        else:
+            pattern, url = f"/{app}/view{i}/<{conv}:pk>/edit/", f"/{app}/view{i}/{SAMPLES[conv]}/edit/"
+        routes.append({"url": pattern, "module": f"{app}.views.view_{i}", "name": f"{app}:view_{i}"})
+        urls.append(url)
+    return routes, urls
+
+def linear_find(routes, url):
+    path = lookup_tools._normalize_path(url)
+    for route in routes:
+        m = lookup_tools.django_to_regex(route["url"]).match(path)
+        if m:
+            return route, m.groupdict()
+    return None, None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", type=int, default=5000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    routes, urls = make_routes(args.routes)
+    sample = random.Random(0).choices(urls, k=args.lookups)
+
+    start = time.perf_counter()
+    matcher = lookup_tools._RouteMatcher(routes)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [matcher.match(lookup_tools._normalize_path(u)) for u in sample]
+    fast = time.perf_counter() - start
+
+    n_linear = max(1, args.lookups // 20)  # the linear scan is slow; time a subset
+    start = time.perf_counter()
+    linear = [linear_find(routes, u) for u in sample[:n_linear]]
+    slow = (time.perf_counter() - start) / n_linear * args.lookups
+
+    assert [r[0]["name"] for r in compiled[:n_linear]] == [r[0]["name"] for r in linear]
+    print(f"{args.routes} routes, {args.lookups} lookups")
+    print(f"compile once      {build * 1000:9.1f} ms")
+    print(f"precompiled       {fast * 1000:9.1f} ms  ({fast / args.lookups * 1e6:8.1f} us/lookup)")
+    print(f"linear (estimate) {slow * 1000:9.1f} ms  ({slow / args.lookups * 1e6:8.1f} us/lookup)")
+
+if __name__ == "__main__":
+    main()
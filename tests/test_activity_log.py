@@ -0,0 +1,119 @@
+import json
+
+from DevTools import selenium_tools as st
+
+
+def _cdp(method, timestamp_ms=0, **params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}}), "timestamp": timestamp_ms}
+
+
+def _sent(request_id, url, ts, kind="XHR"):
+    return _cdp("Network.requestWillBeSent", requestId=request_id, request={"url": url, "method": "GET"},
+                type=kind, timestamp=ts)
+
+
+def _response(request_id, status):
+    return _cdp("Network.responseReceived", requestId=request_id, response={"status": status, "mimeType": "text/html"})
+
+
+def _finished(request_id, ts, size=100):
+    return _cdp("Network.loadingFinished", requestId=request_id, timestamp=ts, encodedDataLength=size)
+
+
+def _navigated(loader_id, wall_ms):
+    return _cdp("Page.frameNavigated", wall_ms, frame={"id": "main", "loaderId": loader_id})
+
+
+class FakeDriver:
+    def __init__(self):
+        self.performance, self.browser = [], []
+
+    def get_log(self, kind):
+        entries = self.performance if kind == "performance" else self.browser
+        drained, entries[:] = list(entries), []
+        return drained
+
+
+def _pumped(performance, browser=(), **limits):
+    log, driver = st._ActivityLog(**limits), FakeDriver()
+    driver.performance.extend(performance)
+    driver.browser.extend(browser)
+    log.pump(driver)
+    return log
+
+
+FIRST_PAGE = [
+    _sent("L1", "http://app/orders/", 1.0, kind="Document"),
+    _navigated("L1", 1000),
+    _response("L1", 200), _finished("L1", 1.2),
+    _sent("r1", "http://app/api/old", 1.3), _response("r1", 500), _finished("r1", 1.4),
+]
+SECOND_PAGE = [
+    _sent("L2", "http://app/orders/7/", 2.0, kind="Document"),
+    _navigated("L2", 2000),
+    _response("L2", 200), _finished("L2", 2.1),
+    _sent("r2", "http://app/api/items", 2.2), _response("r2", 404), _finished("r2", 2.25),
+    _sent("r3", "http://cdn/lib.js", 2.2, kind="Script"),
+    _cdp("Network.loadingFailed", requestId="r3", timestamp=2.3, errorText="net::ERR_NAME_NOT_RESOLVED"),
+    _sent("r4", "http://app/api/report", 2.3), _response("r4", 200), _finished("r4", 4.8),
+    _sent("r5", "http://app/api/pending", 2.4),
+    _cdp("Log.entryAdded", 2500, entry={"level": "error", "text": "ignored: console comes from the browser log"}),
+]
+CONSOLE = [
+    {"level": "SEVERE", "source": "javascript", "message": "old page error", "timestamp": 1500},
+    {"level": "SEVERE", "source": "javascript", "message": "Uncaught TypeError: x is undefined", "timestamp": 2600},
+    {"level": "INFO", "source": "console-api", "message": "loaded", "timestamp": 2700},
+]
+
+
+def test_summary_since_last_navigation():
+    report = _pumped(FIRST_PAGE + SECOND_PAGE, CONSOLE).report("summary", 1000, True, None, 50)
+    assert report["navigation"] == 2 and report["scope"] == "since the last navigation"
+    assert (report["requests"], report["failed"], report["pending"], report["slow"]) == (5, 2, 1, 1)
+    assert report["slowest"][0]["url"] == "http://app/api/report" and report["slowest"][0]["ms"] == 2500
+    assert (report["js_errors"], report["console"]) == (1, 2)
+    assert report["first_js_error"] == "Uncaught TypeError: x is undefined"
+
+
+def test_failed_filters_by_status_error_and_url():
+    log = _pumped(FIRST_PAGE + SECOND_PAGE, CONSOLE)
+    failed = log.report("failed", 1000, True, None, 50)
+    assert [(r["url"], r.get("status"), r.get("error")) for r in failed["items"]] == [
+        ("http://app/api/items", 404, None),
+        ("http://cdn/lib.js", None, "net::ERR_NAME_NOT_RESOLVED"),
+    ]
+    everything = log.report("failed", 1000, False, "/api/", 50)
+    assert [r["url"] for r in everything["items"]] == ["http://app/api/old", "http://app/api/items"]
+    assert "started" not in everything["items"][0] and "navigation" not in everything["items"][0]
+
+
+def test_console_entries_are_scoped_by_navigation_time():
+    log = _pumped(FIRST_PAGE + SECOND_PAGE, CONSOLE)
+    assert [c["message"] for c in log.report("js_errors", 0, False, None, 50)["items"]] == [
+        "old page error", "Uncaught TypeError: x is undefined",
+    ]
+    assert log.report("console", 0, True, None, 1)["count"] == 2
+
+
+def test_buffers_are_bounded():
+    requests = [_sent(f"q{i}", f"http://app/{i}", float(i)) for i in range(5)]
+    console = [{"level": "INFO", "source": "console-api", "message": str(i), "timestamp": i} for i in range(5)]
+    log = _pumped(requests, console, max_requests=3, max_console=2)
+    assert list(log.requests) == ["q2", "q3", "q4"] and log.dropped == 2
+    assert [c["message"] for c in log.console] == ["3", "4"]
+    assert log.report("requests", 0, False, None, 50)["note"].startswith("2 older requests were dropped")
+
+
+def test_driver_without_logging_disables_capture():
+    class NoLogs:
+        def get_log(self, kind):
+            raise st.WebDriverException("log type 'performance' not found")
+
+    log = st._ActivityLog()
+    log.pump(NoLogs())
+    assert log.enabled is False
+
+
+def test_pending_requests_are_never_slow():
+    log = _pumped(FIRST_PAGE + SECOND_PAGE)
+    assert "http://app/api/pending" not in [r["url"] for r in log.report("slow", 0, True, None, 50)["items"]]
@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+from DevTools import selenium_tools as st
+
+
+class FakeElement:
+    def __init__(self, text=""):
+        self.text, self.typed, self.clicks = text, [], 0
+
+    def click(self):
+        self.clicks += 1
+
+    def clear(self):
+        self.typed = []
+
+    def send_keys(self, value):
+        self.typed.append(value)
+
+    def is_displayed(self):
+        return True
+
+
+class FakeDriver:
+    """Pages are {url: (title, {selector: FakeElement})}; `get` just switches between them."""
+
+    pages = {}
+    started = []
+
+    def __init__(self, profile_dir):
+        self.profile_dir, self.current_url, self.visited = profile_dir, "about:blank", []
+        FakeDriver.started.append(self)
+
+    @property
+    def title(self):
+        return self.pages.get(self.current_url, ("", {}))[0]
+
+    def get(self, url):
+        self.current_url = url
+        self.visited.append(url)
+
+    def find_element(self, by, selector):
+        try:
+            return self.pages.get(self.current_url, ("", {}))[1][selector]
+        except KeyError:
+            raise NoSuchElementException(f"no such element: {selector}")
+
+    def get_screenshot_as_png(self):
+        return b"png"
+
+    def get_log(self, kind):
+        return []
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeDriver.started = []
+    FakeDriver.pages = {
+        "http://app/login": ("Sign in", {"#user": FakeElement(), "#go": FakeElement()}),
+        "http://app/home": ("Home", {"h1": FakeElement("Welcome back")}),
+    }
+    monkeypatch.setattr(st, "_start_chrome", FakeDriver)
+    pool = st._DriverPool(1, 0, 2, 600.0, 5.0)
+    monkeypatch.setattr(st, "_POOL", pool)
+    yield pool
+    pool.shutdown()
+
+
+def navigate(url):
+    return {"action": "navigate", "url": url, "wait_until": None}
+
+
+def run(actions, screenshot_on_failure=False):
+    return asyncio.run(st._run(None, st._run_actions, actions, "default", screenshot_on_failure, pooled=True))
+
+
+def test_every_step_is_reported_in_order(pool):
+    trace, captures, failed, url = run([
+        navigate("http://app/login"),
+        {"action": "type", "selector": "#user", "value": "ann"},
+        {"action": "click", "selector": "#go"},
+        navigate("http://app/home"),
+        {"action": "assert", "title_contains": "Home", "selector": "h1", "text_contains": "Welcome"},
+    ])
+    assert failed is None and captures == [] and url == "http://app/home"
+    assert [(s["step"], s["action"], s["status"]) for s in trace] == [
+        (1, "navigate", "ok"), (2, "type", "ok"), (3, "click", "ok"), (4, "navigate", "ok"), (5, "assert", "ok"),
+    ]
+    assert trace[1]["detail"] == "typed 3 chars" and trace[4]["detail"] == "ok: title, h1"
+    assert FakeDriver.pages["http://app/login"][1]["#go"].clicks == 1
+
+
+def test_stops_at_the_first_failure(pool):
+    trace, captures, failed, url = run([
+        navigate("http://app/login"),
+        {"action": "click", "selector": "#missing"},
+        {"action": "click", "selector": "#go"},
+    ], screenshot_on_failure=True)
+    assert failed == 2 and len(trace) == 2 and captures == [b"png"]
+    assert trace[1]["status"] == "failed" and "#missing" in trace[1]["detail"]
+    assert FakeDriver.pages["http://app/login"][1]["#go"].clicks == 0
+
+
+def test_invalid_steps_fail_without_running_later_ones(pool):
+    trace, _, failed, _ = run([{"action": "scroll"}, navigate("http://app/home")])
+    assert failed == 1 and "unknown action 'scroll'" in trace[0]["detail"]
+    trace, _, failed, _ = run([{"action": "assert"}])
+    assert failed == 1 and trace[0]["detail"].startswith("needs ")
+    assert FakeDriver.started[0].visited == []
+
+
+def test_each_navigate_step_counts_and_recycles_mid_batch(pool):
+    trace, _, failed, url = run([
+        navigate("http://app/login"),
+        {"action": "assert", "title_contains": "Sign in"},
+        navigate("http://app/home"),
+        navigate("http://app/login"),  # third page load: past max_navigations=2
+        {"action": "assert", "title_contains": "Sign in"},
+    ])
+    assert failed is None and url == "http://app/login"
+    first, second = FakeDriver.started
+    assert first.visited == ["http://app/login", "http://app/home"] and second.visited == ["http://app/login"]
+    pd = pool.leased("default")
+    assert pd.driver is second and pd.navigations == 1
+
+
+def test_run_browser_actions_result(pool):
+    result = asyncio.run(st.run_browser_actions(
+        [navigate("http://app/home"), {"action": "assert", "url_contains": "/login"}, navigate("http://app/login")],
+        screenshot_on_failure=False,
+    ))
+    assert result["status"] == "failed" and result["failed_step"] == 2 and result["skipped"] == 1
+    assert [s["status"] for s in result["steps"]] == ["ok", "failed"] and "artifacts" not in result
+    assert pool.leased("default").navigations == 1
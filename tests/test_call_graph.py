@@ -0,0 +1,153 @@
+import os
+
+import pytest
+
+from DevTools import code_parser_tools as cp
+from conftest import write_files
+
+
+@pytest.fixture
+def project(tmp_path):
+    return write_files(tmp_path / "proj", {
+        "app/__init__.py": "",
+        "app/db.py": """
+            def query(sql):
+                return sql
+        """,
+        "app/services.py": """
+            from app.db import query
+
+            def load(pk):
+                return query(pk)
+
+            def load_many(pks):
+                return [load(pk) for pk in pks]
+        """,
+        "app/views.py": """
+            from app import services
+
+            def detail(request, pk):
+                return services.load(pk)
+
+            def listing(request):
+                return services.load_many([])
+        """,
+    })
+
+
+def _graph(project, function_path, **kwargs):
+    return cp.query_call_graph_tool(function_path, str(project), None, **kwargs)
+
+
+def _paths(items):
+    return [(item["function_path"], item["hops"]) for item in items]
+
+
+def test_direct_callers_and_callees(project):
+    result = _graph(project, "app.services.load")
+    assert sorted(_paths(result["callers"])) == [("app.services.load_many", 1), ("app.views.detail", 1)]
+    assert _paths(result["callees"]) == [("app.db.query", 1)]
+    assert result["callees"][0]["file"].endswith(os.path.join("app", "db.py"))
+
+
+def test_multi_hop_callers(project):
+    result = _graph(project, "app.db.query", direction="callers", depth=3)
+    assert sorted(_paths(result["callers"])) == [
+        ("app.services.load", 1), ("app.services.load_many", 2),
+        ("app.views.detail", 2), ("app.views.listing", 3),
+    ]
+    assert "callees" not in result
+
+
+def test_graph_follows_edits(project):
+    assert _paths(_graph(project, "app.views.listing", direction="callees")["callees"]) == [
+        ("app.services.load_many", 1),
+    ]
+    path = project / "app" / "views.py"
+    path.write_text(path.read_text().replace("services.load_many([])", "services.load(1)"))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert _paths(_graph(project, "app.views.listing", direction="callees")["callees"]) == [
+        ("app.services.load", 1),
+    ]
+    callers = _graph(project, "app.services.load_many", direction="callers")["callers"]
+    assert callers == []
+
+
+def test_unknown_function_and_direction(project):
+    assert "error" in _graph(project, "app.views.missing")
+    assert "error" in _graph(project, "app.views.detail", direction="up")
+
+
+def _edit(path, old, new):
+    path.write_text(path.read_text().replace(old, new))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def classes(tmp_path):
+    return write_files(tmp_path / "classes", {
+        "base.py": """
+            class Base:
+                def other(self):
+                    return 1
+        """,
+        "middle.py": """
+            from base import Base
+
+            class Middle(Base):
+                pass
+        """,
+        "leaf.py": """
+            from middle import Middle
+
+            class Leaf(Middle):
+                def run(self):
+                    return self.step()
+        """,
+    })
+
+
+def test_base_class_edits_reach_every_subclass_file(classes):
+    assert _paths(_graph(classes, "leaf.Leaf.run", direction="callees")["callees"]) == []
+    _edit(classes / "base.py", "def other(self):", "def step(self):")  # leaf.py never imports base
+    assert _paths(_graph(classes, "leaf.Leaf.run", direction="callees")["callees"]) == [("base.Base.step", 1)]
+    _edit(classes / "middle.py", "    pass", "    def step(self):\n        return 2")
+    assert _paths(_graph(classes, "leaf.Leaf.run", direction="callees")["callees"]) == [("middle.Middle.step", 1)]
+
+
+def _lookups(index):
+    return (
+        {k: (r.path_id, r.start, r.end, r.calls) for k, r in index.by_mod_func.items()},
+        {k: sorted(r.dotted for r in v) for k, v in index.by_name.items()},
+        {k: [r.dotted for r in v] for k, v in index.file_records.items()},
+        dict(index.file_imports), dict(index.class_bases), dict(index.subclasses), dict(index.class_files),
+    )
+
+
+def test_incremental_lookups_match_a_full_rebuild(classes):
+    _graph(classes, "leaf.Leaf.run")
+    _edit(classes / "middle.py", "class Middle(Base):\n    pass", "class Middle:\n    def run(self):\n        return 3")
+    (classes / "base.py").unlink()
+    write_files(classes, {"extra.py": "from leaf import Leaf\n\nclass Extra(Leaf):\n    def run(self):\n        return 4\n"})
+    index = cp._refreshed_index(str(classes))
+    version = index.version
+    incremental = _lookups(index)
+    index._rebuild_lookups()
+    assert incremental == _lookups(index) and version > 1
+
+
+def test_ids_of_deleted_functions_are_reused(project):
+    index = cp._refreshed_index(str(project))
+    graph = index.call_graph()
+    sizes = []
+    names = ["load_many", "load_many1", "load_many2", "load_many3"]
+    for old, new in zip(names, names[1:]):
+        _edit(project / "app" / "services.py", f"def {old}(", f"def {new}(")
+        _edit(project / "app" / "views.py", f"services.{old}(", f"services.{new}(")
+        cp._refreshed_index(str(project))
+        sizes.append(len(graph.names))
+    assert sizes == [sizes[0]] * 3  # the renamed function's new id is allocated before its old one is freed
+    assert "app.services.load_many" not in graph.ids and "app.services.load_many3" in graph.ids
+    assert sum(name is not None for name in graph.names) == len(graph.ids)
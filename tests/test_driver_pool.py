@@ -0,0 +1,139 @@
+import asyncio
+import itertools
+import threading
+import time
+
+import pytest
+
+from DevTools import selenium_tools as st
+
+
+class FakeDriver:
+    ids = itertools.count(1)
+
+    def __init__(self, profile_dir):
+        self.id = next(FakeDriver.ids)
+        self.profile_dir = profile_dir
+        self.alive = True
+        self.quit_called = threading.Event()
+
+    @property
+    def window_handles(self):
+        if not self.alive:
+            raise st.WebDriverException("chrome not reachable")
+        return ["main"]
+
+    def quit(self):
+        self.alive = False
+        self.quit_called.set()
+
+    def get_log(self, kind):
+        return []
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    monkeypatch.setattr(st, "_start_chrome", FakeDriver)
+    pools = []
+
+    def make(size=2, max_navigations=100, lease_ttl=600.0, acquire_timeout=5.0):
+        pool = st._DriverPool(size, 0, max_navigations, lease_ttl, acquire_timeout)
+        monkeypatch.setattr(st, "_POOL", pool)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.shutdown()
+
+
+def test_lease_is_sticky_per_session_and_release_destroys(make_pool):
+    pool = make_pool()
+    a = pool.lease("a")
+    assert pool.lease("a") is a and pool.leased("a") is a
+    b = pool.lease("b")
+    assert b is not a and pool.stats()["leased"] == 2
+    assert pool.release("a") is True and a.dead
+    assert a.driver.quit_called.wait(2)
+    assert pool.leased("a") is None and pool.release("a") is False
+
+
+def test_exhausted_pool_waits_for_a_release(make_pool):
+    pool = make_pool(size=1)
+    a = pool.lease("a")
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.lease("b")))
+    waiter.start()
+    time.sleep(0.1)
+    assert got == []  # blocked: the only browser is leased
+    pool.release("a")
+    waiter.join(2)
+    assert got and got[0] is not a
+
+
+def test_exhausted_pool_times_out(make_pool):
+    pool = make_pool(size=1, acquire_timeout=0.1)
+    pool.lease("a")
+    with pytest.raises(RuntimeError, match="All 1 browsers are in use"):
+        pool.lease("b")
+
+
+def test_idle_lease_is_reclaimed_after_ttl_but_not_while_in_use(make_pool):
+    pool = make_pool(size=1, lease_ttl=0.05, acquire_timeout=0.2)
+    a = pool.lease("a")
+    time.sleep(0.1)
+    with st._using(a):  # busy: not reclaimable even though idle time passed before
+        a.last_used -= 1
+        with pytest.raises(RuntimeError):
+            pool.lease("b")
+    time.sleep(0.1)
+    b = pool.lease("b")
+    assert b is not a and a.dead and a.driver.quit_called.wait(2)
+    with pytest.raises(st._LeaseLost):
+        with st._using(a):
+            pass
+
+
+def test_run_leases_again_when_its_browser_was_reclaimed(make_pool):
+    pool = make_pool(size=1)
+    first = pool.lease("default")
+    with pool._cond:
+        first.last_used -= 10_000
+        pool.lease_ttl = 0.0
+        pool._reclaim_expired()
+    pool.lease_ttl = 600.0
+    driver_id = asyncio.run(st._run(None, lambda driver: driver.id))
+    assert driver_id != first.driver.id and pool.leased("default") is not first
+
+
+def test_browser_is_recycled_after_max_navigations(make_pool):
+    pool = make_pool(max_navigations=2)
+    pd = pool.lease("a")
+    original = pd.driver
+    for _ in range(2):
+        with st._using(pd, navigation=True):
+            pass
+    assert pd.driver is original and pd.navigations == 2
+    with st._using(pd, navigation=True) as driver:
+        assert driver is not original and driver.profile_dir == original.profile_dir
+    assert original.quit_called.is_set() and pd.navigations == 1
+
+
+def test_unhealthy_browsers_are_replaced(make_pool, tmp_path):
+    pool = make_pool()
+    a = pool.lease("a")
+    with pytest.raises(st.WebDriverException):
+        with st._using(a):
+            raise st.WebDriverException("chrome not reachable")
+    assert not a.healthy and pool.leased("a") is None
+    replacement = pool.lease("a")
+    assert replacement is not a and a.dead
+
+    pool.release("a")
+    idle = pool.lease("b")
+    pool.release("b")
+    spare = st._PooledDriver(FakeDriver(str(tmp_path)), str(tmp_path))
+    spare.driver.alive = False  # died while idle
+    pool._idle.append(spare)
+    fresh = pool.lease("c")
+    assert fresh is not spare and fresh is not idle and spare.driver.quit_called.wait(2)
@@ -0,0 +1,57 @@
+import pytest
+
+from DevTools import code_parser_tools as cp
+from conftest import write_files
+
+
+def test_batch_parses_each_file_once_and_reports_items(tmp_path, capsys):
+    root = write_files(tmp_path / "proj", {
+        "pkg/__init__.py": "",
+        "pkg/a.py": """
+            class Cart:
+                def total(self):
+                    return 1
+
+            def checkout():
+                return Cart().total()
+        """,
+        "pkg/b.py": "def broken(:\n",
+    })
+    result = cp.extract_functions_batch_tool({
+        "function_paths": ["pkg.a.checkout", "pkg.a.Cart.total", "pkg.a.missing", "pkg.b.broken"],
+        "base_path": str(root),
+    }, None)
+    ok, method, missing, broken = result["results"]
+    assert result["files_parsed"] == 1
+    assert ok["code"].splitlines()[1] == "def checkout():"
+    assert method["function"] == "Cart.total" and method["start_line"] == 2
+    assert missing["error"].startswith("ValueError: Function 'missing' not found")
+    assert broken["error"].startswith("SyntaxError")
+    assert capsys.readouterr().out == ""
+
+
+def test_function_paths_resolve_to_the_module_that_defines_them(tmp_path):
+    root = write_files(tmp_path / "proj", {
+        "app/__init__.py": """
+            class Registry:
+                def add(self):
+                    return 1
+
+            def setup():
+                return 2
+        """,
+        "app/views.py": "class View:\n    def get(self):\n        return 3\n",
+        "app/api/__init__.py": "",
+    })
+    base = str(root)
+    assert cp.create_file_path(base, "app.views.View.get") == (str(root / "app" / "views.py"), "View.get")
+    assert cp.create_file_path(base, "app.Registry.add") == (str(root / "app" / "__init__.py"), "Registry.add")
+    assert cp.create_file_path(base, "app.setup") == (str(root / "app" / "__init__.py"), "setup")
+    for missing, module in [("app.gone.func", "app.gone"), ("app.api.routes.list", "app.api.routes"), ("lib.func", "lib")]:
+        with pytest.raises(ValueError, match=f"Module '{module}' not found"):
+            cp.create_file_path(base, missing)
+
+    result = cp.extract_functions_batch_tool({"function_paths": ["app.gone.func", "app.setup"], "base_path": base}, None)
+    gone, setup = result["results"]
+    assert gone == {"function_path": "app.gone.func", "error": f"ValueError: Module 'app.gone' not found under {base}"}
+    assert setup["code"].splitlines()[1] == "def setup():"
@@ -0,0 +1,53 @@
+import pytest
+
+from DevTools import code_parser_tools as cp
+from conftest import write_files
+
+
+@pytest.fixture
+def project(tmp_path):
+    body = "\n".join(f"    total += {i}  # step \"{i}\"\\t" for i in range(3000))
+    return write_files(tmp_path / "proj", {
+        "pkg/__init__.py": "",
+        "pkg/calc.py": "def helper(x):\n    return x * 2\n\n\n"
+                       f"def long_sum(x):\n    total = helper(x)\n{body}\n    return total\n",
+    })
+
+
+def _extract(project, max_tokens, **kwargs):
+    return cp.extract_function_source_ast(
+        project / "pkg" / "calc.py", "long_sum", base_path=project, max_tokens=max_tokens, **kwargs,
+    )
+
+
+@pytest.mark.parametrize("max_tokens", [5000, 1000, 300, 150, 90, 50, 32])
+def test_reply_stays_under_and_fills_the_budget(project, max_tokens):
+    result = _extract(project, max_tokens, include_helpers=True, detailed_functions=True)
+    used = cp._estimate_tokens(result)
+    assert used <= max_tokens
+    if "error" not in result:
+        # at most one more code line (~12 tokens escaped) would have fitted
+        assert used >= max_tokens - 12
+
+
+def test_truncated_code_keeps_fetch_marker_and_resume_line(project):
+    result = _extract(project, 1000)
+    lines = result["code"].splitlines()
+    assert result["truncated"] is True
+    assert lines[-1] == f"# ... truncated; fetch lines {5 + len(lines) - 2}-3007 with read_source_lines_tool"
+    assert lines[1] == "def long_sum(x):"
+
+
+def test_budgets_below_the_minimum_are_rejected(project):
+    assert _extract(project, 5) == {"error": f"max_tokens below minimum {cp._MIN_MAX_TOKENS}"}
+
+
+def test_batch_caps_the_whole_reply(project):
+    paths = ["pkg.calc.long_sum", "pkg.calc.helper", "pkg.calc.missing"]
+    result = cp.extract_functions_batch(paths, project, max_tokens=600)
+    assert cp._estimate_tokens(result) <= 600
+    assert result["results"][0]["truncated"] is True
+
+    refused = cp.extract_functions_batch(paths, project, max_tokens=60)
+    assert refused["error"].startswith("max_tokens below minimum ")
+    assert cp._estimate_tokens(refused) <= 60
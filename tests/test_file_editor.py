@@ -0,0 +1,61 @@
+import base64
+
+import pytest
+
+from DevTools import fileEditor as fe
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setattr(fe, "REPO_ROOT", str(tmp_path))
+    monkeypatch.setattr(fe, "_SCAN_CHUNK", 16)  # make line skipping cross chunk boundaries
+    (tmp_path / "log.txt").write_text("".join(f"line {i}\n" for i in range(1, 101)))
+    (tmp_path / "blob.bin").write_bytes(bytes(range(256)) * 4)
+    return tmp_path
+
+
+def test_line_range(repo):
+    result = fe.read_file("log.txt", start_line=10, end_line=12)
+    assert result["content"] == "line 10\nline 11\nline 12\n"
+    assert (result["start_line"], result["end_line"], result["next_line"]) == (10, 12, 13)
+    assert result["truncated"] is False
+
+
+def test_max_bytes_cuts_at_whole_lines_and_says_where_to_resume(repo):
+    result = fe.read_file("log.txt", max_bytes=20)
+    assert result["content"] == "line 1\nline 2\n"
+    assert result["truncated"] is True and result["next_line"] == 3
+    resumed = fe.read_file("log.txt", start_line=result["next_line"], end_line=3)
+    assert resumed["content"] == "line 3\n"
+    assert result["next_byte_offset"] == len("line 1\nline 2\n")
+
+
+def test_past_the_end_is_an_error(repo):
+    result = fe.read_file("log.txt", start_line=101)
+    assert result["success"] is False and "fewer than 101 lines" in result["error"]
+
+
+def test_tail_lines(repo):
+    result = fe.read_file("log.txt", tail_lines=2)
+    assert result["content"] == "line 99\nline 100\n"
+    assert fe.read_file("log.txt", tail_lines=50, max_bytes=20)["content"] == "line 99\nline 100\n"
+
+
+def test_byte_ranges_text_and_binary(repo):
+    text = fe.read_file("log.txt", byte_offset=-9)
+    assert text["content"] == "line 100\n" and "next_byte_offset" not in text
+    binary = fe.read_file("blob.bin", byte_offset=256, byte_length=4)
+    assert base64.b64decode(binary["content"]) == bytes([0, 1, 2, 3])
+    assert binary["encoding"] == "base64" and binary["byte_range"] == [256, 260]
+    assert fe.read_file("blob.bin")["content"] == "<binary file, 1024 bytes>"
+
+
+def test_conflicting_ranges_and_escapes_are_rejected(repo):
+    assert fe.read_file("log.txt", start_line=1, tail_lines=1)["success"] is False
+    assert fe.read_file("../outside.txt")["success"] is False
+
+
+def test_iter_file_chunks(repo):
+    chunks = list(fe.iter_file_chunks("blob.bin", chunk_size=300, byte_offset=-700))
+    assert [len(c) for c in chunks] == [300, 300, 100]
+    assert b"".join(chunks) == (bytes(range(256)) * 4)[-700:]
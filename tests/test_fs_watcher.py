@@ -0,0 +1,116 @@
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from DevTools.custom_utils import fs_watcher
+from conftest import write_files
+
+
+@pytest.fixture
+def polling(monkeypatch):
+    monkeypatch.setattr(fs_watcher, "Observer", None)
+
+
+def _wait_for(sub, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        changed = sub.drain()
+        if changed:
+            return changed
+        time.sleep(0.02)
+    return set()
+
+
+def test_polling_scan_covers_only_subscribed_suffixes(tmp_path, polling):
+    root = write_files(tmp_path, {"app/views.py": "x = 1\n", "app/notes.txt": "a\n", "venv/lib.py": "y = 1\n"})
+    watcher = fs_watcher.FsWatcher(str(root), ignore_dirs={"venv"}, interval=0.05)
+    sub = watcher.subscribe(suffixes=(".py",))
+    watcher.start()
+    try:
+        assert set(watcher._snapshot) == {os.path.join(watcher.root, "app", "views.py")}
+        (root / "app" / "notes.txt").write_text("changed\n")
+        (root / "app" / "views.py").write_text("x = 22\n")
+        assert _wait_for(sub) == {os.path.join(watcher.root, "app", "views.py")}
+    finally:
+        watcher.stop()
+
+
+def test_new_subscriber_filter_does_not_report_spurious_changes(tmp_path, polling):
+    root = write_files(tmp_path, {"a.py": "x = 1\n", "b.txt": "b\n"})
+    watcher = fs_watcher.FsWatcher(str(root), interval=0.05).start()
+    try:
+        sub = watcher.subscribe(suffixes=(".py",))
+        time.sleep(0.2)  # a few polls narrow the scan to .py files
+        assert sub.drain() == set()
+        assert set(watcher._snapshot) == {os.path.join(watcher.root, "a.py")}
+    finally:
+        watcher.stop()
+
+
+class _FakeObserver:
+    """Stands in for watchdog's Observer; the test delivers events to the scheduled handler."""
+
+    instances = []
+
+    def __init__(self):
+        self.handler = None
+        self.daemon = False
+        _FakeObserver.instances.append(self)
+
+    def schedule(self, handler, root, recursive=False):
+        self.handler = handler
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def _event(event_type, path, is_directory=False):
+    return SimpleNamespace(event_type=event_type, src_path=str(path), dest_path="", is_directory=is_directory)
+
+
+@pytest.fixture
+def listing_repo(tmp_path, monkeypatch):
+    from DevTools import fileEditor as fe
+
+    write_files(tmp_path, {"src/app.py": "x = 1\n", "build/out.txt": "o\n"})
+    monkeypatch.setattr(fs_watcher, "Observer", _FakeObserver)
+    monkeypatch.setattr(fs_watcher, "_WATCHERS", {})
+    monkeypatch.setattr(fe, "REPO_ROOT", str(tmp_path))
+    monkeypatch.setattr(fe, "_LISTING_CACHE", {})
+    monkeypatch.setenv("DEVTOOLS_WATCH", "1")
+    _FakeObserver.instances.clear()
+    yield fe, tmp_path
+    for watcher in fs_watcher._WATCHERS.values():
+        watcher.stop()
+
+
+def _listed(fe):
+    return sorted(item["path"] for item in fe.list_directory(".", recursive=True)["contents"])
+
+
+def _deliver(tmp_path, event):
+    watcher = fs_watcher._WATCHERS[(os.path.realpath(tmp_path), frozenset())]
+    _FakeObserver.instances[-1].handler.on_any_event(event)
+    return watcher
+
+
+def test_listing_cache_sees_new_directories(listing_repo):
+    fe, root = listing_repo
+    before = _listed(fe)
+    (root / "src" / "newdir").mkdir()
+    _deliver(root, _event("created", root / "src" / "newdir", is_directory=True))
+    assert _listed(fe) == sorted(before + [os.path.join("src", "newdir")])
+
+
+def test_listing_cache_sees_files_under_index_excluded_dirs(listing_repo):
+    fe, root = listing_repo
+    before = _listed(fe)
+    (root / "build" / "late.txt").write_text("l\n")
+    watcher = _deliver(root, _event("created", root / "build" / "late.txt"))
+    assert watcher.generation == 1
+    assert _listed(fe) == sorted(before + [os.path.join("build", "late.txt")])
@@ -0,0 +1,128 @@
+from pathlib import Path
+
+import pytest
+
+from DevTools import git_tools
+from conftest import commit_all, git, write_files
+
+
+VIEWS_V1 = """
+    import json
+
+
+    class StockView:
+        def get(self, request):
+            return json.dumps({"stock": 1})
+
+
+    def helper():
+        return 1
+"""
+
+VIEWS_V2 = """
+    import json
+
+
+    class StockView:
+        def get(self, request):
+            return json.dumps({"stock": 2})
+
+
+    def added():
+        return 2
+"""
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "proj"
+    write_files(root, {"app/__init__.py": "", "app/views.py": VIEWS_V1, "appold/__init__.py": "", "appold/views.py": VIEWS_V1})
+    git(root, "init", "-q")
+    first = commit_all(root, "first")
+    write_files(root, {"app/views.py": VIEWS_V2, "appold/views.py": VIEWS_V2})
+    second = commit_all(root, "second")
+    return root, first, second
+
+
+def test_extract_at_revision_reads_old_source(repo):
+    root, first, _ = repo
+    result = git_tools.extract_function_at_revision("app.views.StockView.get", first, root)
+    assert '"stock": 1' in result["code"]
+    assert result["commit"] == first
+
+
+def test_blob_cache_does_not_leak_module_names_between_bases(repo):
+    root, first, _ = repo
+    # same blobs seen from two bases: module names must follow the base of each call
+    inner = git_tools.extract_function_at_revision("views.StockView.get", first, root / "app")
+    outer = git_tools.extract_function_at_revision("app.views.StockView.get", first, root)
+    assert inner["start_line"] == outer["start_line"]
+    again = git_tools.extract_function_at_revision("views.StockView.get", first, root / "app")
+    assert again["code"] == inner["code"]
+
+
+def test_diff_functions_between_commits(repo):
+    root, first, second = repo
+    diff = git_tools.diff_functions(root, first, second, path_prefix="app")
+    by_path = {(f["function_path"], f["status"]) for f in diff["functions"]}
+    assert by_path == {
+        ("app.views.StockView.get", "modified"),
+        ("app.views.helper", "removed"),
+        ("app.views.added", "added"),
+    }
+    assert diff["files_changed"] == 1  # appold/ is not under the app/ prefix
+
+
+def test_diff_functions_against_worktree_ignores_blank_lines(repo):
+    root, _, second = repo
+    views = root / "app" / "views.py"
+    views.write_text(views.read_text().replace("import json\n", "import json\n\n\n"))
+    assert git_tools.diff_functions(root, second, path_prefix="app")["functions"] == []
+
+    views.write_text(views.read_text().replace('"stock": 2', '"stock": 3'))
+    changed = git_tools.diff_functions(root, second, path_prefix="app")["functions"]
+    assert [(f["function_path"], f["status"]) for f in changed] == [("app.views.StockView.get", "modified")]
+    assert '+        return json.dumps({"stock": 3})' in changed[0]["diff"]
+
+
+def test_unknown_revision_is_reported(repo):
+    root, _, _ = repo
+    with pytest.raises(ValueError):
+        git_tools.extract_function_at_revision("app.views.helper", "no-such-branch", root)
+
+
+def test_worktree_diff_covers_changed_and_untracked_files_only(repo):
+    root, _, second = repo
+    write_files(root, {
+        ".gitignore": "local_settings.py\n",
+        "app/local_settings.py": "def secret():\n    return 1\n",
+        "app/new.py": "def fresh():\n    return 1\n",
+    })
+    diff = git_tools.diff_functions(root, second, path_prefix="app")
+    assert [(f["function_path"], f["status"]) for f in diff["functions"]] == [("app.new.fresh", "added")]
+    assert diff["files_changed"] == 1
+
+
+NESTED_V1 = """
+    def outer():
+        def inner():
+            return 1
+        return inner()
+"""
+
+
+def test_nested_changes_are_reported_once(repo):
+    root, _, _ = repo
+    write_files(root, {"app/nested.py": NESTED_V1})
+    base = commit_all(root, "nested")
+    write_files(root, {"app/nested.py": NESTED_V1.replace("return 1", "return 2") + """
+    def wrapper():
+        def step():
+            return 3
+        return step()
+"""})
+    changed = git_tools.diff_functions(root, base, path_prefix="app")["functions"]
+    assert [(f["function_path"], f["status"]) for f in changed] == [
+        ("app.nested.outer.inner", "modified"), ("app.nested.wrapper", "added"),
+    ]
+    assert "+        return 3" in changed[1]["diff"]
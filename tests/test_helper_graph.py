@@ -0,0 +1,84 @@
+import pytest
+
+from DevTools import code_parser_tools as cp
+from conftest import write_files
+
+
+@pytest.fixture
+def project(tmp_path):
+    return write_files(tmp_path / "proj", {
+        "app/__init__.py": "",
+        "app/util.py": """
+            def clean(x):
+                return shared(x).strip()
+
+            def shared(x):
+                return ping(str(x))
+
+            def ping(x):
+                return pong(x)
+
+            def pong(x):
+                return ping(x)
+        """,
+        "app/views.py": """
+            from app.util import clean, shared
+
+            def handler(request):
+                return clean(request) + shared(request)
+        """,
+    })
+
+
+def _extract(project, **kwargs):
+    return cp.extract_function_source_ast(
+        project / "app" / "views.py", "handler", include_helpers=True,
+        detailed_functions=True, base_path=project, **kwargs,
+    )
+
+
+def test_graph_visits_each_helper_once_through_cycles(project):
+    result = _extract(project, recursive_helper=True, max_depth=10)
+    paths = [node["function_path"] for node in result["helpers"]]
+    assert paths == ["app.util.clean", "app.util.shared", "app.util.ping", "app.util.pong"]
+    assert [node["depth"] for node in result["helpers"]] == [1, 1, 2, 3]
+    assert result["helpers"][3]["helpers"] == ["app.util.ping"]  # cycle edge kept, node not repeated
+    assert result["helper_budget"]["unexpanded"] == []
+
+
+def test_depth_and_node_limits_report_the_frontier(project):
+    shallow = _extract(project)
+    assert [node["function_path"] for node in shallow["helpers"]] == ["app.util.clean", "app.util.shared"]
+    assert shallow["helper_budget"]["unexpanded"] == ["app.util.ping"]
+
+    capped = _extract(project, recursive_helper=True, max_nodes=1)
+    assert capped["helper_budget"]["nodes"] == 1
+    assert capped["helper_budget"]["unexpanded"] == ["app.util.shared"]
+
+
+def test_node_code_is_the_function_slice(project):
+    node = _extract(project)["helpers"][0]
+    assert node["code"].splitlines() == [
+        "# Extracted from util.py:1-2", "def clean(x):", "    return shared(x).strip()",
+    ]
+    assert (node["start_line"], node["end_line"]) == (1, 2)
+
+
+def test_byte_budget_skips_helpers_that_do_not_fit(project):
+    full = _extract(project, recursive_helper=True)
+    first = len(full["helpers"][0]["code"])
+    capped = _extract(project, recursive_helper=True, max_bytes=first)
+    assert [node["function_path"] for node in capped["helpers"]] == ["app.util.clean"]
+    assert capped["helper_budget"]["bytes"] == first
+    assert capped["helper_budget"]["unexpanded"] == ["app.util.shared"]
+
+
+def test_node_code_comes_from_the_current_file_not_the_index(project):
+    index = cp._refreshed_index(str(project))
+    util = project / "app" / "util.py"
+    util.write_text("import os\n\n\n" + util.read_text())  # index not refreshed: its line numbers are now stale
+    nodes, budget = cp._expand_helper_graph(index, ["app.util.clean"], max_depth=1)
+    node = nodes[0]
+    assert node["code"].splitlines()[1:] == ["def clean(x):", "    return shared(x).strip()"]
+    assert (node["start_line"], node["end_line"]) == (4, 5)
+    assert node["code"].startswith("# Extracted from util.py:4-5\n")
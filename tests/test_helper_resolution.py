@@ -0,0 +1,95 @@
+import pytest
+
+from DevTools import code_parser_tools as cp
+from conftest import write_files
+
+
+@pytest.fixture
+def project(tmp_path):
+    return write_files(tmp_path / "proj", {
+        "core/__init__.py": "",
+        "core/base.py": """
+            class Base:
+                def __init__(self):
+                    self.items = []
+
+                def validate(self):
+                    return True
+
+                @classmethod
+                def build(cls):
+                    return cls.defaults()
+
+                @classmethod
+                def defaults(cls):
+                    return {}
+        """,
+        "core/orders.py": """
+            from core.base import Base
+            from core import base as b
+
+
+            def audit(order):
+                return order
+
+
+            class Order(Base):
+                def save(this):
+                    this.validate()
+                    Order.log()
+                    audit(this)
+                    return b.Base.build()
+
+                @staticmethod
+                def log():
+                    def fmt():
+                        return "x"
+                    return fmt()
+
+                def clean(self):
+                    def save():  # local def shadows nothing outside
+                        return None
+                    return save()
+
+
+            def place():
+                order = Order()
+                order.save()
+                return Base.build()
+        """,
+    })
+
+
+def _helpers(project, qualname):
+    result = cp.extract_function_source_ast(
+        project / "core" / "orders.py", qualname, include_helpers=True, base_path=project,
+    )
+    return result["helpers"]
+
+
+def test_self_calls_resolve_through_base_classes_under_any_name(project):
+    assert _helpers(project, "Order.save") == [
+        "core.base.Base.build", "core.base.Base.validate", "core.orders.Order.log", "core.orders.audit",
+    ]
+
+
+def test_cls_calls_resolve_on_the_owner_class(project):
+    result = cp.extract_function_source_ast(
+        project / "core" / "base.py", "Base.build", include_helpers=True, base_path=project,
+    )
+    assert result["helpers"] == ["core.base.Base.defaults"]
+
+
+def test_constructor_and_class_method_calls(project):
+    # Order() -> inherited __init__; order.save() on a local stays unresolved
+    assert _helpers(project, "place") == ["core.base.Base.__init__", "core.base.Base.build"]
+
+
+def test_nested_defs_resolve_before_module_names(project):
+    assert _helpers(project, "Order.log") == ["core.orders.Order.log.fmt"]
+    assert _helpers(project, "Order.clean") == ["core.orders.Order.clean.save"]
+
+
+def test_bare_method_name_picks_the_class_method(project):
+    result = cp.extract_function_source_ast(project / "core" / "orders.py", "clean", base_path=project)
+    assert result["code"].splitlines()[1].strip() == "def clean(self):"
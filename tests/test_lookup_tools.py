@@ -0,0 +1,285 @@
+import os
+import re
+
+import pytest
+
+from DevTools import lookup_tools as lt
+from conftest import write_files
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    root = write_files(tmp_path / "site", {
+        "shop/__init__.py": "",
+        "shop/views.py": """
+            class BaseView:
+                def dispatch(self, request):
+                    return None
+
+            class StockView(BaseView):
+                def get(self, request, pk):
+                    return pk
+
+            def index(request):
+                return None
+        """,
+        "shop/urls.py": """
+            from django.urls import path
+            from shop import views
+
+            urlpatterns = [
+                path("", views.index, name="index"),
+                path("stock/<int:pk>/", views.StockView.as_view(), name="stock"),
+            ]
+        """,
+    })
+    monkeypatch.setenv("BASE_PATH", str(root))
+    monkeypatch.setattr(lt, "ROUTES_SOURCE", "offline")
+    monkeypatch.setattr(lt, "_offline_tables", {})
+    return root
+
+
+def test_class_based_view_maps_to_its_handler_methods(project):
+    result = lt.get_lookup_url("http://localhost/stock/7/", None)
+    assert result["parameters"] == {"pk": "7"}
+    assert result["function_path"] == "shop.views.StockView.get"
+    assert result["view_methods"] == ["shop.views.StockView.get", "shop.views.BaseView.dispatch"]
+
+
+def test_function_views_never_touch_the_index(project, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("index refreshed for a function view")
+
+    monkeypatch.setattr(lt, "_refreshed_index", fail)
+    assert lt._normalize_module("shop.views:index") == {"function_path": "shop.views.index", "view_methods": []}
+
+
+def test_batch_refreshes_the_index_at_most_once(project, monkeypatch):
+    calls = []
+    refreshed = lt._refreshed_index
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return refreshed(*args, **kwargs)
+
+    monkeypatch.setattr(lt, "_refreshed_index", counting)
+    views = lt._ViewIndex()
+    for module in ("shop.views.StockView", "shop.views.BaseView.as_view()", "shop.views.index"):
+        lt._normalize_module(module, views)
+    assert len(calls) == 1
+
+
+def _naive_match(routes, path):
+    """Reference linear scan: first route whose full regex matches."""
+    for route in routes:
+        m = re.match("^" + lt._route_regex_body(route) + "/?$", path)
+        if m:
+            return route, m.groupdict()
+    return None, None
+
+
+ROUTES = [
+    {"url": "/inventory/", "module": "inv.views.index"},
+    {"url": "/inventory/<int:pk>/", "module": "inv.views.detail"},
+    {"url": "/<slug:page>/", "module": "cms.views.page"},
+    {"url": "/inventory/<slug:sku>/", "module": "inv.views.by_sku"},
+    {"url": "/files/<path:rest>", "module": "files.views.serve"},
+    {"url": "/legacy/", "regex": "/^legacy/(?P<year>[0-9]{4})/$", "module": "legacy.views.year"},
+    {"url": "/(?P<lang>[a-z]{2})/about/", "regex": "/(?P<lang>[a-z]{2})/about/", "module": "pages.about"},
+]
+
+
+@pytest.mark.parametrize("path", [
+    "/inventory/", "/inventory/12/", "/inventory/abc-1/", "/about/", "/en/about/",
+    "/files/a/b/c.txt", "/legacy/2019/", "/nothing/here/", "/",
+])
+def test_bucketed_matcher_agrees_with_a_linear_scan(path):
+    route, params = lt._RouteMatcher(ROUTES).match(lt._normalize_path(path))
+    assert (route, params) == _naive_match(ROUTES, lt._normalize_path(path))
+
+
+def test_earlier_wildcard_route_wins_over_later_literal_bucket():
+    route, params = lt._RouteMatcher(ROUTES).match("/inventory/")
+    assert route["module"] == "inv.views.index"
+    route, params = lt._RouteMatcher(ROUTES[2:4]).match("/inventory/")
+    assert route["module"] == "cms.views.page" and params == {"page": "inventory"}
+
+
+BACKREF_ROUTES = [
+    {"url": "/mirror/", "regex": "/mirror/(?P<a>[a-z]+)/(?P=a)/", "module": "mirror.views.named"},
+    {"url": "/twice/", "regex": "/twice/([0-9]+)-\\1/", "module": "mirror.views.numbered"},
+    {"url": "/mirror/<slug:x>/<slug:y>/", "module": "mirror.views.pair"},
+    {"url": "/<slug:page>/", "module": "cms.views.page"},
+]
+
+
+@pytest.mark.parametrize("path", ["/mirror/ab/ab/", "/mirror/ab/cd/", "/twice/12-12/", "/twice/12-13/", "/twice/"])
+def test_routes_with_backreferences_fall_back_to_a_linear_scan(path):
+    matcher = lt._RouteMatcher(BACKREF_ROUTES)
+    assert [i for i, _ in matcher._linear] == [0, 1]
+    assert matcher.match(path) == _naive_match(BACKREF_ROUTES, path)
+
+
+def test_backreference_route_keeps_its_place_in_route_order():
+    route, params = lt._RouteMatcher(BACKREF_ROUTES).match("/mirror/ab/ab/")
+    assert route["module"] == "mirror.views.named" and params == {"a": "ab"}
+    route, params = lt._RouteMatcher(BACKREF_ROUTES).match("/twice/12-12/")
+    assert route["module"] == "mirror.views.numbered" and params == {}
+    route, params = lt._RouteMatcher(BACKREF_ROUTES[2:] + BACKREF_ROUTES[:1]).match("/mirror/ab/ab/")
+    assert route["module"] == "mirror.views.pair" and params == {"x": "ab", "y": "ab"}
+
+
+class _FakeResponse:
+    def __init__(self, status_code, routes=None, etag=None):
+        self.status_code = status_code
+        self._routes = routes
+        self.headers = {"ETag": etag} if etag else {}
+
+    def json(self):
+        return {"routes": self._routes}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise lt.requests.HTTPError(f"{self.status_code}")
+
+
+class _FakeSession:
+    """Replays queued responses (or raises queued exceptions), repeating the last; records request headers."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(headers or {})
+        reply = self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def _table(session, ttl=60.0):
+    table = lt._RouteTable("http://testserver", ttl=ttl)
+    table.session = session
+    return table
+
+
+def _wait_refreshed(table):
+    for _ in range(200):
+        if not table._refreshing:
+            return
+        lt.time.sleep(0.01)
+
+
+def test_route_table_is_fetched_once_within_ttl():
+    session = _FakeSession(_FakeResponse(200, ROUTES[:1], etag='"v1"'))
+    table = _table(session)
+    assert table.routes() == ROUTES[:1]
+    assert table.matcher().match("/inventory/")[0] is ROUTES[0]
+    assert len(session.requests) == 1
+
+
+def test_stale_table_revalidates_in_the_background_with_etag():
+    session = _FakeSession(_FakeResponse(200, ROUTES[:1], etag='"v1"'), _FakeResponse(304))
+    table = _table(session, ttl=0.0)
+    first = table.routes()
+    assert table.routes() is first  # served stale while revalidating
+    _wait_refreshed(table)
+    assert session.requests[1] == {"If-None-Match": '"v1"'}
+    assert table.routes() is first
+
+
+def test_last_good_table_survives_an_outage():
+    session = _FakeSession(_FakeResponse(200, ROUTES[:1]), lt.requests.ConnectionError("down"))
+    table = _table(session, ttl=0.0)
+    table.routes()
+    table.routes()
+    _wait_refreshed(table)
+    assert table.routes() == ROUTES[:1] and table.last_error == "down"
+
+
+def test_first_fetch_failure_is_remembered():
+    session = _FakeSession(lt.requests.ConnectionError("refused"))
+    table = _table(session)
+    for _ in range(3):
+        with pytest.raises(lt.requests.RequestException):
+            table.routes()
+    assert len(session.requests) == 1  # retried only after DJANGO_ROUTES_RETRY
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    root = write_files(tmp_path / "mysite", {
+        "mysite/__init__.py": "",
+        "mysite/settings.py": 'ROOT_URLCONF = "mysite.urls"\n',
+        "mysite/urls.py": """
+            from django.urls import include, path, re_path
+            from blog import views as blog_views
+
+            urlpatterns = [
+                path("blog/", include("blog.urls", namespace="blog")),
+                path("api/", include(("api.urls", "api"))),
+            ] + [
+                re_path(r"^archive/(?P<year>[0-9]{4})/$", blog_views.archive, name="archive"),
+            ]
+        """,
+        "blog/__init__.py": "",
+        "blog/views.py": """
+            def archive(request, year):
+                return year
+
+            def post(request, slug):
+                return slug
+        """,
+        "blog/urls.py": """
+            from django.urls import path
+            from .views import post
+
+            app_name = "posts"
+            urlpatterns = [
+                path("<slug:slug>/", post, name="post"),
+            ]
+        """,
+        "api/__init__.py": "",
+        "api/urls.py": """
+            from django.urls import path
+            from api.views import Health
+
+            urlpatterns = [path("health/", Health.as_view(), name="health")]
+        """,
+        "unused/urls.py": """
+            from django.urls import path
+            urlpatterns = [path("orphan/", print)]
+        """,
+    })
+    monkeypatch.setenv("BASE_PATH", str(root))
+    monkeypatch.delenv("DJANGO_ROOT_URLCONF", raising=False)
+    monkeypatch.setattr(lt, "ROUTES_SOURCE", "offline")
+    monkeypatch.setattr(lt, "ROUTES_RECHECK", 0.0)
+    monkeypatch.setattr(lt, "_offline_tables", {})
+    return root
+
+
+def test_offline_routes_follow_includes_from_root_urlconf(site):
+    routes = {r["url"]: (r["module"], r["name"]) for r in lt.get_all_urls()}
+    assert routes == {
+        "/blog/<slug:slug>/": ("blog.views.post", "blog:post"),
+        "/api/health/": ("api.views.Health", "api:health"),
+        "/archive/(?P<year>[0-9]{4})/": ("blog.views.archive", "archive"),
+    }
+
+
+def test_offline_lookup_of_regex_and_path_routes(site):
+    result = lt.get_lookup_urls(["/archive/2021/", "/blog/hello-world/", "/orphan/"], None)
+    archive, post, orphan = result["results"]
+    assert (archive["function_path"], archive["parameters"]) == ("blog.views.archive", {"year": "2021"})
+    assert (post["function_path"], post["parameters"]) == ("blog.views.post", {"slug": "hello-world"})
+    assert "error" in orphan and (result["matched"], result["unmatched"]) == (2, 1)
+
+
+def test_offline_routes_pick_up_urls_py_edits(site):
+    path = site / "blog" / "urls.py"
+    path.write_text(path.read_text().replace('"<slug:slug>/"', '"p/<slug:slug>/"'))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert lt.find_route("/blog/p/x/")[0]["module"] == "blog.views.post"
@@ -0,0 +1,40 @@
+import os
+
+from DevTools import code_parser_tools as cp
+from conftest import write_files
+
+
+def _files(tmp_path):
+    src = "".join(f"def f{i}(a, b):\n    return [a + b * {i} for _ in range(a)]\n" for i in range(30))
+    return write_files(tmp_path, {"a.py": src, "b.py": src, "c.py": src})
+
+
+def test_weight_estimates_the_tree_not_the_source(tmp_path):
+    root = _files(tmp_path)
+    parsed = cp._ModuleCache(8, 1 << 30).get(root / "a.py")
+    assert parsed.weight > 5 * parsed.size
+
+
+def test_evicts_least_recently_used_by_weight(tmp_path):
+    root = _files(tmp_path)
+    weight = cp._ParsedModule(root / "a.py").weight
+    cache = cp._ModuleCache(max_entries=8, max_bytes=2 * weight)
+    a = cache.get(root / "a.py")
+    cache.get(root / "b.py")
+    assert cache.get(root / "a.py") is a  # hit, and now the most recent
+    cache.get(root / "c.py")
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 2 * weight, 1)
+    assert cache.peek(root / "b.py") is None and cache.peek(root / "a.py") is a
+
+
+def test_edited_file_is_reparsed(tmp_path):
+    root = _files(tmp_path)
+    cache = cp._ModuleCache(8, 1 << 30)
+    first = cache.get(root / "a.py")
+    path = root / "a.py"
+    path.write_text(path.read_text() + "def extra():\n    pass\n")
+    os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    second = cache.get(path)
+    assert second is not first and "extra" in second.defs
+    assert cache.stats()["bytes"] == second.weight
@@ -0,0 +1,42 @@
+import pytest
+
+from DevTools import selenium_tools as st
+
+
+class _FakeDriver:
+    """Answers the outline script with a fixed page."""
+
+    def __init__(self, title="Orders", rows=None):
+        self.snapshot = {
+            "title": title,
+            "url": "http://testserver/orders/",
+            "rows": rows if rows is not None else [
+                [0, "text", f"paragraph {i} " * 4, "", {}] for i in range(20)
+            ] + [[0, "button", "Save", "#save", {}]],
+        }
+
+    def execute_script(self, script, *args):
+        return self.snapshot
+
+
+@pytest.fixture(autouse=True)
+def _no_snapshots(monkeypatch):
+    monkeypatch.setattr(st, "_SNAPSHOTS", {})
+
+
+def test_zero_max_chars_is_unlimited():
+    out = st._page_source(_FakeDriver(), "k", "outline", 0, False)
+    assert "omitted" not in out and out.count("\n") == 22
+
+
+def test_budget_keeps_interactive_nodes_over_text():
+    out = st._page_source(_FakeDriver(), "k", "outline", 300, False)
+    assert len(out) <= 300
+    assert "-> #save" in out and "nodes omitted" in out
+
+
+def test_budget_smaller_than_header_leaves_header_and_note():
+    out = st._page_source(_FakeDriver(title="x" * 50), "k", "outline", 10, False)
+    title, url, note = out.splitlines()
+    assert title == "# " + "x" * 50 and url.startswith("@ ")
+    assert note.startswith("... 21 of 21 nodes omitted")
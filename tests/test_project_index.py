@@ -0,0 +1,119 @@
+import json
+import os
+
+import pytest
+
+from DevTools import code_parser_tools as cp
+from conftest import write_files
+
+
+@pytest.fixture
+def project(tmp_path):
+    return write_files(tmp_path / "proj", {
+        "app/__init__.py": "",
+        "app/models.py": """
+            def load(pk):
+                return pk
+        """,
+        "app/views.py": """
+            from app.models import load
+
+            def show(request, pk):
+                return load(pk)
+        """,
+        "venv/lib/site.py": "def vendored():\n    pass\n",
+    })
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Paths actually hashed+parsed (not skipped by the stat or hash check)."""
+    seen = []
+    index_source = cp._index_source
+
+    def recording(path_str, *args, **kwargs):
+        seen.append(os.path.relpath(path_str))
+        return index_source(path_str, *args, **kwargs)
+
+    monkeypatch.setattr(cp, "_index_source", recording)
+    return seen
+
+
+def _bump_mtime(path, seconds=5):
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + seconds * 10**9))
+
+
+def _as_json(files):
+    return {path: json.dumps(entry) for path, entry in files.items()}
+
+
+def _refreshed(root):
+    index = cp._ProjectIndex(root.resolve())
+    index.refresh(workers=1)
+    return index
+
+
+def test_cold_build_skips_excluded_dirs(project):
+    index = _refreshed(project)
+    assert set(index.by_mod_func) == {"app.models.load", "app.views.show"}
+    assert index.by_mod_func["app.views.show"].calls == ("load",)
+
+
+def test_warm_start_reads_the_store_without_parsing(project, parsed):
+    _refreshed(project)
+    parsed.clear()
+    index = _refreshed(project)
+    assert parsed == [] and "app.views.show" in index.by_mod_func
+
+
+def test_touched_but_unchanged_file_is_not_reparsed(project, parsed):
+    index = _refreshed(project)
+    parsed.clear()
+    version = index.version
+    _bump_mtime(project / "app" / "models.py")
+    index.refresh(workers=1)
+    assert parsed == []
+    stored = cp._ProjectIndex(project.resolve()).files[str((project / "app" / "models.py").resolve())]
+    assert stored.mtime_ns == (project / "app" / "models.py").stat().st_mtime_ns  # new stat saved
+    assert index.version == version + 1 and "app.models.load" in index.by_mod_func
+
+
+def test_same_size_edit_is_reparsed(project, parsed):
+    index = _refreshed(project)
+    path = project / "app" / "models.py"
+    path.write_text(path.read_text().replace("load", "read"))  # same size
+    _bump_mtime(path)
+    parsed.clear()
+    index.refresh(workers=1)
+    assert len(parsed) == 1 and parsed[0].endswith("models.py")
+    assert "app.models.read" in index.by_mod_func and "app.models.load" not in index.by_mod_func
+
+
+def test_deleted_and_added_files(project):
+    index = _refreshed(project)
+    (project / "app" / "models.py").unlink()
+    write_files(project, {"app/forms.py": "def clean():\n    pass\n"})
+    index.refresh(workers=1)
+    assert set(index.by_mod_func) == {"app.views.show", "app.forms.clean"}
+    assert set(cp._ProjectIndex(project.resolve()).files) == {
+        str((project / p).resolve()) for p in ("app/__init__.py", "app/views.py", "app/forms.py")
+    }
+
+
+def test_syntax_error_file_is_indexed_empty(project):
+    write_files(project, {"app/broken.py": "def broken(:\n"})
+    index = _refreshed(project)
+    assert not any(k.startswith("app.broken.") for k in index.by_mod_func)
+
+
+def test_parallel_build_matches_serial(project, monkeypatch):
+    write_files(project, {f"app/m{i}.py": f"def f{i}():\n    return f{i + 1}()\n" for i in range(12)})
+    serial = _refreshed(project)
+    monkeypatch.setenv("DEVTOOLS_CACHE_DIR", str(project.parent / "cache-parallel"))
+    monkeypatch.setattr(cp, "_PARALLEL_MIN_FILES", 2)
+    monkeypatch.setattr(cp, "_PARALLEL_CHUNK_SIZE", 3)
+    parallel = cp._ProjectIndex(project.resolve())
+    parallel.refresh(workers=2)
+    assert _as_json(parallel.files) == _as_json(serial.files)
+    assert _as_json(cp._ProjectIndex(project.resolve()).files) == _as_json(serial.files)  # and persisted
@@ -0,0 +1,54 @@
+import io
+
+import pytest
+from PIL import Image
+
+from DevTools import selenium_tools as st
+
+
+def _png(width=400, height=300):
+    image = Image.new("RGB", (width, height), "white")
+    image.paste((255, 0, 0), (100, 50, 200, 150))  # a red square to find after cropping
+    out = io.BytesIO()
+    image.save(out, "PNG")
+    return out.getvalue()
+
+
+def _decode(data):
+    return Image.open(io.BytesIO(data))
+
+
+def test_unchanged_png_is_passed_through():
+    png = _png()
+    assert st._encode_screenshot(png, "png", max_width=0) == (png, "image/png", 400, 300)
+
+
+@pytest.mark.parametrize("image_format, pil_format, mime", [
+    ("webp", "WEBP", "image/webp"), ("jpg", "JPEG", "image/jpeg"), ("png", "PNG", "image/png"),
+])
+def test_downscale_keeps_aspect_ratio_and_encodes(image_format, pil_format, mime):
+    data, mime_type, width, height = st._encode_screenshot(_png(), image_format, max_width=200)
+    image = _decode(data)
+    assert (mime_type, width, height) == (mime, 200, 150)
+    assert image.format == pil_format and image.size == (200, 150)
+
+
+def test_region_is_cropped_in_screenshot_pixels():
+    data, _, width, height = st._encode_screenshot(
+        _png(), "png", max_width=0, region=[50, 25, 50, 50], pixel_ratio=2.0,
+    )
+    image = _decode(data).convert("RGB")
+    assert (width, height) == (100, 100) and image.size == (100, 100)
+    assert image.getpixel((0, 0)) == (255, 0, 0) and image.getpixel((99, 99)) == (255, 0, 0)
+
+
+def test_region_is_clipped_to_the_screenshot_and_rejected_outside():
+    _, _, width, height = st._encode_screenshot(_png(), "png", max_width=0, region=[350, 250, 200, 200])
+    assert (width, height) == (50, 50)
+    with pytest.raises(ValueError, match="outside"):
+        st._encode_screenshot(_png(), "png", region=[500, 500, 10, 10])
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="image_format"):
+        st._encode_screenshot(_png(), "gif")
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from DevTools import code_parser_tools as cp
+from conftest import write_files
+
+
+def _project(tmp_path: Path) -> Path:
+    return write_files(tmp_path / "proj", {
+        "shop/__init__.py": "",
+        "shop/models.py": """
+            class Voyage:
+                \"\"\"One sailing of a vessel.\"\"\"
+                vessel_name = "unknown"
+
+                def close(self):
+                    raise ValueError("Invalid session id")
+        """,
+        "shop/views.py": """
+            from shop.models import Voyage
+
+            def list_voyages(request):
+                return [Voyage().vessel_name]
+        """,
+    })
+
+
+def _symbols(index: cp._ProjectIndex, query: str, kind=None):
+    search = index.search_index()
+    return [search.symbols[sid][1] for _, sid, _ in search.search(query, 5, kind)]
+
+
+def test_search_ranks_strings_fields_and_names(tmp_path):
+    index = cp._ProjectIndex(_project(tmp_path))
+    index.refresh(workers=1)
+    assert _symbols(index, "invalid session id")[0] == "shop.models.Voyage.close"
+    assert _symbols(index, "vessel_name", kind="class") == ["shop.models.Voyage"]
+    assert _symbols(index, "list voyages", kind="function")[0] == "shop.views.list_voyages"
+
+
+def test_search_terms_live_in_the_store_not_on_entries(tmp_path):
+    base = _project(tmp_path)
+    cp._ProjectIndex(base).refresh(workers=1)
+
+    warm = cp._ProjectIndex(base)  # loads entries from SQLite
+    warm.refresh(workers=1)
+    assert not hasattr(next(iter(warm.files.values())), "symbols")
+    assert warm.search is None
+    assert _symbols(warm, "invalid session id")[0] == "shop.models.Voyage.close"
+
+
+def test_search_follows_edits_and_deletions(tmp_path):
+    base = _project(tmp_path)
+    index = cp._ProjectIndex(base)
+    index.refresh(workers=1)
+    assert _symbols(index, "invalid session id")
+    views = base / "shop" / "views.py"
+    views.write_text(views.read_text() + "\n\ndef refund(request):\n    return 'refund issued'\n")
+    (base / "shop" / "models.py").unlink()
+    index.refresh(workers=1)
+    assert _symbols(index, "invalid session id") == []
+    assert _symbols(index, "refund issued")[0] == "shop.views.refund"